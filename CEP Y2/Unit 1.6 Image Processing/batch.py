@@ -0,0 +1,189 @@
+"""
+batch.py
+Runs the Unit 1.6 transforms over every image in a directory without opening any windows.
+
+    python batch.py SOURCE DEST -t sepia -t exposure:1.5 -t filter:sharpenMask [--workers 4]
+
+The files in SOURCE are read one at a time as they are needed, and each one is decoded,
+transformed and encoded again by a pool of worker processes.  Only the file names are sent
+to the workers.  At most --queue files are waiting or being worked on at once, so reading
+the directory never gets far ahead of the workers (and a huge directory does not fill the
+memory).  At the end the number of images per second is printed.
+
+Transforms (done in the order given; point operations next to each other run as one Pipeline):
+    negative, grayscale, sepia, exposure:FACTOR
+    double, rotate90, flip[:vertical], resize:FACTOR[:bilinear]
+    filter:MASK[:FACTOR[:BIAS]]        MASK is a name in kernels.KERNELS
+    whitescreen:BACKGROUND[:TOLERANCE[:RADIUS]]
+                                       white pixels show the background (like whiteScreen)
+    superimpose:BLANK:BACKGROUND[:TOLERANCE[:RADIUS]]
+                                       pixels equal to BLANK in all 3 channels show the background
+                                       (superImpose needs only one channel to be equal)
+                                       (RADIUS feathers the edges, see composite.py)
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from cImage import readImage, writeImage
+import pipeline
+import geometry
+import composite
+import convolution
+from kernels import KERNELS
+
+EXTENSIONS = ('.gif', '.jpg', '.jpeg', '.png', '.ppm', '.pgm', '.pnm', '.bmp', '.tif', '.tiff')
+
+#.ppm and .pgm files are read and written with numpy, and PIL is only imported for other types
+load = readImage
+save = writeImage
+
+def parse(spec):
+    """Return the function of pixels for one transform written as NAME[:ARG[:ARG]]"""
+    name, args = spec.split(":")[0], spec.split(":")[1:]
+    if name == "negative":
+        return pipeline.negative()
+    if name == "grayscale":
+        return pipeline.grayscale()
+    if name == "sepia":
+        return pipeline.sepia()
+    if name == "exposure":
+        return pipeline.exposure(float(args[0]))
+    if name == "double":
+        return geometry.double
+    if name == "rotate90":
+        return geometry.rotate90
+    if name == "flip":
+        if args not in ([], ["vertical"]):
+            raise ValueError("Error: flip takes nothing or vertical, not %r" % ":".join(args))
+        vertical = args == ["vertical"]
+        return lambda pixels: geometry.flip(pixels, vertical)
+    if name == "resize":
+        factor = float(args[0])
+        method = args[1] if len(args) > 1 else 'nearest'
+        if factor <= 0:
+            raise ValueError("Error: resize factor must be more than 0, not %s" % args[0])
+        if method not in ('nearest', 'bilinear'):
+            raise ValueError("Error: method must be 'nearest' or 'bilinear', not %r" % method)
+        return lambda pixels: geometry.resize(pixels, factor, method=method)
+    if name == "filter":
+        kernel = KERNELS[args[0]]
+        factor = float(args[1]) if len(args) > 1 else 1.0
+        bias = float(args[2]) if len(args) > 2 else 0.0
+        return lambda pixels: convolution.filter_array(pixels, kernel, factor, bias)
+    if name == "whitescreen":
+        background = load(args[0])
+        tolerance, radius = [int(arg) for arg in args[1:3]] + [0, 0][len(args[1:3]):]
+        return lambda pixels: composite.chromaKey(pixels, background, (255, 255, 255), tolerance, radius)
+    if name == "superimpose":
+        blank, background = load(args[0]), load(args[1])
+        tolerance, radius = [int(arg) for arg in args[2:4]] + [0, 0][len(args[2:4]):]
+        return lambda pixels: composite.differenceKey(pixels, blank, background, tolerance, radius)
+    raise ValueError("Error: unknown transform %r" % spec)
+
+def build(specs):
+    """Return one function of pixels which does every transform, joining point operations into Pipelines"""
+    steps = []
+    for spec in specs:
+        step = parse(spec)
+        if isinstance(step, (pipeline.Lut, pipeline.Matrix)):
+            if steps and isinstance(steps[-1], pipeline.Pipeline):
+                steps[-1] = steps[-1].then(step)
+            else:
+                steps.append(pipeline.Pipeline(step))
+        else:
+            steps.append(step)
+    def transform(pixels):
+        for step in steps:
+            if isinstance(step, pipeline.Pipeline):
+                #rotate90 and flip give views of the pixels in another order
+                pixels = step.apply_array(np.ascontiguousarray(pixels))
+            else:
+                pixels = step(pixels)
+        return np.ascontiguousarray(pixels)
+    return transform
+
+_transform = None
+
+def _setup(specs):
+    """Builds the transforms once in each worker process"""
+    global _transform
+    _transform = build(specs)
+
+def _process(source, dest):
+    """Decodes, transforms and encodes one file, and returns its number of pixels"""
+    pixels = load(source)
+    save(_transform(pixels), dest)
+    return pixels.shape[0] * pixels.shape[1]
+
+def files(source, dest, fmt=None):
+    """Yields (input file, output file) for each image in the source directory, as they are read.
+    Two inputs can have the same output file (apple.gif and apple.ppm with -f png): run checks that."""
+    for entry in os.scandir(source):
+        stem, ext = os.path.splitext(entry.name)
+        if entry.is_file() and ext.lower() in EXTENSIONS:
+            yield entry.path, os.path.join(dest, stem + ("." + fmt if fmt else ext))
+
+def run(source, dest, specs, workers=None, queue=None, fmt=None, report=sys.stdout):
+    """Transforms every image in source into dest and returns (images, failures, seconds)"""
+    os.makedirs(dest, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    queue = queue or 4 * workers
+    done = failures = 0
+    #output files already given to a worker, so a second input with the same name does not overwrite it
+    taken = set()
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers, initializer=_setup, initargs=(specs,)) as pool:
+        pending = {}
+        def finish(futures):
+            nonlocal done, failures
+            for future in futures:
+                name = pending.pop(future)
+                try:
+                    future.result()
+                    done += 1
+                except Exception as error:
+                    failures += 1
+                    print("Error: %s: %s" % (name, error), file=sys.stderr)
+        for paths in files(source, dest, fmt):
+            if os.path.normcase(paths[1]) in taken:
+                failures += 1
+                print("Error: %s: %s is already the output of another file" % paths, file=sys.stderr)
+                continue
+            taken.add(os.path.normcase(paths[1]))
+            #back-pressure: wait for a worker to finish before reading any further
+            while len(pending) >= queue:
+                finish(wait(pending, return_when=FIRST_COMPLETED).done)
+            pending[pool.submit(_process, *paths)] = paths[0]
+        finish(list(pending))
+    seconds = time.perf_counter() - start
+    if report:
+        print("%d images (%d failed) in %.2fs: %.1f images/s" % (done, failures, seconds, done / max(seconds, 1e-9)), file=report)
+    return done, failures, seconds
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Transform every image in a directory without opening any windows.")
+    parser.add_argument("source")
+    parser.add_argument("dest")
+    parser.add_argument("-t", "--transform", action="append", default=[], help="transform to do, in order (see the top of batch.py)")
+    parser.add_argument("-w", "--workers", type=int, help="number of worker processes (default: number of CPUs)")
+    parser.add_argument("-q", "--queue", type=int, help="most files in the pool at once (default: 4 per worker)")
+    parser.add_argument("-f", "--format", help="file type to save as, like png (default: the same as the input)")
+    args = parser.parse_args(argv)
+    #check every transform before starting the workers
+    for spec in args.transform:
+        try:
+            parse(spec)
+        except IndexError:
+            parser.error("transform %r is missing an argument (see the top of batch.py)" % spec)
+        except KeyError as error:
+            parser.error("transform %r: no mask called %s in kernels.KERNELS" % (spec, error))
+        except (ValueError, OSError) as error:
+            parser.error("transform %r: %s" % (spec, error))
+    done, failures, seconds = run(args.source, args.dest, args.transform, args.workers, args.queue, args.format)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -36,26 +36,218 @@ which serves a similar purpose in the graphics primitive world.
 #   Modify all code so that if PIL is not available then image.py will still
 #   function using Tkimages.  N.B.  Tk restricts image types to gif or ppm
 #
+# Version 1.4
+# Changes:
+#   Keep the pixels of every image in a height x width x 3 numpy array of uint8 instead of
+#   in the PIL or Tk image.  getPixel and setPixel use the array, so they no longer call Tk
+#   for every pixel, and the PIL or Tk image is only made when the image is drawn or saved.
+#   Add to_array and from_array to work on the whole array at once without copying it.
+#
+# Version 1.5
+# Changes:
+#   Importing the module no longer starts Tk.  The hidden Tk root is made the first time
+#   a window is made or an image is drawn, so images can be loaded, changed and saved on
+#   a computer without a display.  PIL is also only imported when it is first needed,
+#   from the PIL package (Pillow) or as the old Image and ImageTk modules.
+#   Read and write .ppm and .pgm files with numpy, without PIL or Tk.
+#
+# Version 1.6
+# Changes:
+#   Add histogram, mean and percentile to find out about the values in an image, and
+#   integral_image (a summed-area table) to find the sum of any rectangle in O(1).
+#
 
-try:
-    import tkinter
-except:
-    import Tkinter as tkinter
+import os
+import sys
+import importlib.util
+import numpy as np
 
-pilAvailable = True
 try:
-    import Image
-    import ImageTk
+    import tkinter
 except:
-    pilAvailable = False
+    try:
+        import Tkinter as tkinter
+    except:
+        tkinter = None
+
+# PIL is imported by _pil() the first time it is needed
+pilAvailable = bool(importlib.util.find_spec("PIL") or importlib.util.find_spec("Image"))
+Image = None
+ImageTk = None
+
+def _pil():
+    """Import PIL the first time it is needed, and return its Image module"""
+    global Image, ImageTk, pilAvailable
+    if Image is None and pilAvailable:
+        try:
+            from PIL import Image
+        except ImportError:
+            try:
+                import Image
+            except ImportError:
+                pilAvailable = False
+    return Image
+
+def _pilTk():
+    """Import PIL's ImageTk the first time an image is drawn"""
+    global ImageTk
+    if ImageTk is None:
+        try:
+            from PIL import ImageTk
+        except ImportError:
+            import ImageTk
+    return ImageTk
 
 #import exceptions
 
 # Borrow some ideas from Zelle
-# create an invisible global main root for all windows
+# an invisible global main root for all windows, made by _root() when it is first needed
 tk = tkinter
-_imroot = tk.Tk()
-_imroot.withdraw()
+_imroot = None
+
+def _root():
+    """Return the hidden Tk root, starting Tk the first time"""
+    global _imroot
+    if _imroot is None:
+        if tkinter is None:
+            raise RuntimeError("Error: tkinter is needed to show images")
+        _imroot = tk.Tk()
+        _imroot.withdraw()
+    return _imroot
+
+# .ppm and .pgm files are read and written with numpy, so they need neither PIL nor Tk
+PNM_TYPES = ['.ppm', '.pgm', '.pnm']
+
+def _pnmHeader(data):
+    """Return the type, width, height and largest value at the start of a .ppm or .pgm file, and
+    where the values start, or None if data does not have the whole header"""
+    # the header is the type, width, height and largest value, with # comments allowed
+    fields = []
+    pos = 0
+    while len(fields) < 4:
+        while data[pos:pos+1].isspace():
+            pos += 1
+        if data[pos:pos+1] == b'#':
+            pos = data.find(b'\n',pos)
+            if pos < 0:
+                return None
+            continue
+        start = pos
+        while pos < len(data) and not data[pos:pos+1].isspace():
+            pos += 1
+        if pos >= len(data):
+            return None
+        fields.append(data[start:pos])
+    return fields[0].decode(), int(fields[1]), int(fields[2]), int(fields[3]), pos
+
+def readPNM(fname, out=None):
+    """Return the pixels of a .ppm or .pgm file (binary P6 and P5 or text P3 and P2) as a
+    height x width x 3 uint8 array.  The gray of a .pgm file is copied into all three channels.
+    If out is a height x width x 3 uint8 array, the pixels are read into it instead of a new
+    array (straight from the file for 8-bit .ppm files), for reading many frames of the same size."""
+    with open(fname,'rb') as f:
+        data = f.read(1024)
+        header = _pnmHeader(data)
+        if header is None:
+            data += f.read()
+            header = _pnmHeader(data)
+        if header is None or header[0] not in ('P2','P3','P5','P6'):
+            raise ValueError("Error: %s is not a ppm or pgm file" % fname)
+        magic, width, height, maxval, pos = header
+        channels = 3 if magic in ('P3','P6') else 1
+        count = width*height*channels
+        if (out is not None and out.shape == (height,width,3) and out.dtype == np.uint8 and out.flags.c_contiguous
+                and magic == 'P6' and maxval == 255):
+            # one whitespace character after the header, then the values as bytes
+            f.seek(pos+1)
+            if f.readinto(out) != count:
+                raise ValueError("Error: %s is too short" % fname)
+            return out
+        data = data + f.read()
+    if magic in ('P5','P6'):
+        dtype = np.uint8 if maxval < 256 else np.dtype('>u2')
+        values = np.frombuffer(data,dtype,count,pos+1)
+    else:
+        values = np.array(data[pos:].split()[:count],np.int64)
+    if maxval != 255:
+        values = values.astype(np.int64)*255//maxval
+    pixels = values.astype(np.uint8).reshape(height,width,channels)
+    if channels == 1:
+        pixels = pixels.repeat(3,axis=2)
+    if out is not None:
+        out[...] = pixels
+        return out
+    return pixels
+
+def writePNM(pixels, fname):
+    """Write a height x width x 3 uint8 array as a binary .ppm file, or as a .pgm file of the
+    average of the three channels if fname ends with .pgm"""
+    height, width = pixels.shape[:2]
+    if fname.lower().endswith('.pgm'):
+        # the sum of a rotated or transposed view keeps its order, so make it one row after another
+        gray = np.ascontiguousarray((pixels.astype(np.uint16).sum(axis=2)//3).astype(np.uint8))
+        header, body = 'P5\n%d %d\n255\n' % (width,height), gray
+    else:
+        header, body = 'P6\n%d %d\n255\n' % (width,height), np.ascontiguousarray(pixels)
+    with open(fname,'wb') as f:
+        f.write(header.encode())
+        # the array is written straight from its memory, without a copy as bytes
+        f.write(memoryview(body).cast('B'))
+
+def _readTk(fname):
+    """Return the pixels of a .gif or .ppm file read by Tk"""
+    im = tkinter.PhotoImage(master=_root(),file=fname)
+    # Tk gives all the pixels at once as rows of #rrggbb colours
+    rows = im.tk.splitlist(im.tk.call(im.name,'data'))
+    text = ' '.join(row if isinstance(row,str) else ' '.join(row) for row in rows)
+    return np.frombuffer(bytes.fromhex(text.replace('#',' ')),np.uint8).reshape(im.height(),im.width(),3).copy()
+
+def _tkPhoto(pixels):
+    """Return a Tk PhotoImage of the pixels"""
+    height, width = pixels.shape[:2]
+    im = tkinter.PhotoImage(master=_root(),height=height,width=width)
+    # one put of every row of #rrggbb colours instead of one put per pixel
+    cells = np.frombuffer(np.ascontiguousarray(pixels).tobytes().hex().encode(),'S6').reshape(height,width)
+    im.put(' '.join('{#' + ' #'.join(c.decode() for c in row) + '}' for row in cells))
+    return im
+
+def integralImage(pixels):
+    """Return the summed-area table of an array of pixels (see AbstractImage.integral_image)"""
+    table = np.zeros((pixels.shape[0]+1,pixels.shape[1]+1)+pixels.shape[2:],np.int64)
+    np.cumsum(pixels,axis=0,dtype=np.int64,out=table[1:,1:])
+    np.cumsum(table[1:,1:],axis=1,out=table[1:,1:])
+    return table
+
+def integralSum(table,top,left,bottom,right):
+    """Return the sum of the pixels in rows top to bottom - 1 and columns left to right - 1 from a
+    summed-area table.  The arguments can also be arrays, to find many sums at once."""
+    return table[bottom,right] - table[top,right] - table[bottom,left] + table[top,left]
+
+def readImage(fname):
+    """Return the pixels of an image file as a height x width x 3 uint8 array.  .ppm and .pgm
+    files are read with numpy, other files with PIL, or with Tk (.gif only) without PIL."""
+    suffix = os.path.splitext(fname)[1].lower()
+    if suffix in PNM_TYPES:
+        return readPNM(fname)
+    if _pil():
+        with Image.open(fname) as im:
+            return np.array(im.convert("RGB"))
+    if suffix not in ['.gif', '.ppm']:
+        raise ValueError("Bad Image Type: %s : Without PIL, only .gif or .ppm files are allowed" % suffix)
+    return _readTk(fname)
+
+def writeImage(pixels, fname):
+    """Write a height x width x 3 uint8 array to an image file of the type of its name,
+    the same way as readImage.  Unlike AbstractImage.save, errors are raised."""
+    suffix = os.path.splitext(fname)[1].lower()
+    if suffix in PNM_TYPES:
+        writePNM(pixels,fname)
+    elif _pil():
+        Image.fromarray(np.ascontiguousarray(pixels),"RGB").save(fname)
+    elif suffix == '.gif':
+        _tkPhoto(pixels).write(fname,format='gif')
+    else:
+        raise ValueError("Without PIL, only .gif or .ppm files are allowed")
 
 def formatPixel(data):
     if type(data) == tuple:
@@ -63,7 +255,7 @@ def formatPixel(data):
     elif isinstance(data,Pixel):
         return '{#%02x%02x%02x}'%data.getColorTuple()
     
-class ImageWin(tk.Canvas):
+class ImageWin(tk.Canvas if tk else object):
     """
     ImageWin:  Make a frame to display one or more images.
     """
@@ -71,7 +263,7 @@ class ImageWin(tk.Canvas):
         """
         Create a window with a title, width and height.
         """
-        master = tk.Toplevel(_imroot)
+        master = tk.Toplevel(_root())
         master.protocol("WM_DELETE_WINDOW", self._close)
         #super(ImageWin, self).__init__(master, width=width, height=height)
         tk.Canvas.__init__(self, master, width=width, height=height)
@@ -87,13 +279,13 @@ class ImageWin(tk.Canvas):
         self.width = width
         self._mouseCallback = None
         self.trans = None
-        _imroot.update()
+        _root().update()
 
     def _close(self):
         """Close the window"""
         self.master.destroy()
         self.quit()
-        _imroot.update()
+        _root().update()
         
     def getMouse(self):
         """Wait for mouse click and return a tuple with x,y position in screen coordinates after
@@ -202,15 +394,20 @@ class Pixel(object):
         
 class AbstractImage(object):
     """
-    Create an image.  The image may be created in one of four ways:
+    Create an image.  The image may be created in one of five ways:
     1. From an image file such as gif, jpg, png, ppm  for example: i = image('fname.jpb)
     2. From a list of lists
     3. From another image object
     4. By specifying the height and width to create a blank image.
+    5. From a height x width x 3 numpy array of uint8 (see from_array)
+
+    The pixels are kept in a height x width x 3 numpy array of uint8, which is the only copy
+    of the image.  getPixel and setPixel read and write that array, and a PIL or Tk image is
+    only made from it when the image is drawn or saved.
     """
     imageCache = {} # tk photoimages go here to avoid GC while drawn 
     imageId = 1
-    def __init__(self,fname=None,data=[],imobj=None,height=0,width=0):
+    def __init__(self,fname=None,data=[],imobj=None,height=0,width=0,array=None):
         """
         An image can be created using any of the following keyword parameters. When image creation is 
         complete the image will be an rgb image.
@@ -220,51 +417,54 @@ class AbstractImage(object):
         imobj:  Make a copy of another image.
         height:
         width: Create a blank image of a particular height and width.
+        array: Use a height x width x 3 uint8 numpy array as the pixels, without copying it.
         """
         super(AbstractImage, self).__init__()
 
-        # if PIL is available then use the PIL functions otherwise fall back to Tk
-        if pilAvailable:
-            self.loadImage = self.loadPILImage
-            self.createBlankImage = self.createBlankPILImage
-            self.setPixel = self.setPILPixel
-            self.getPixel = self.getPILPixel
-            self.save = self.savePIL
-        else:
-            self.loadImage = self.loadTkImage
-            self.createBlankImage = self.createBlankTkImage
-            self.setPixel = self.setTkPixel
-            self.getPixel = self.getTkPixel
-            self.save = self.saveTk
-
-        if fname:
+        if array is not None:
+            self._pixels = array
+        elif fname:
             self.loadImage(fname)
             self.imFileName = fname
         elif data:
-            height = len(data)
-            width = len(data[0])
-            self.createBlankImage(height,width)
-            for row  in range(height):
-                for col in range(width):
-                    self.setPixel(x,y,Pixel(data[row][col]))
+            self._pixels = np.array([[(p[0],p[1],p[2]) for p in row] for row in data], np.uint8)
         elif height > 0 and width > 0:
             self.createBlankImage(height,width)
-        elif imobj:
-            self.im = imobj.copy()
-
-        if pilAvailable:
-            self.width,self.height = self.im.size
-        else:
-            self.width = self.im.width()
-            self.height = self.im.height()
+        elif imobj is not None:
+            if isinstance(imobj,AbstractImage):
+                self._pixels = imobj._pixels.copy()
+            else:
+                self._pixels = np.array(imobj,np.uint8)
+
+        self.height,self.width = self._pixels.shape[:2]
+        self.im = None
         self.centerX = self.width/2+3     # +3 accounts for the ~3 pixel border in Tk windows
         self.centerY = self.height/2+3
         self.id = None
 
+    @classmethod
+    def from_array(cls,array):
+        """Return an image whose pixels are the given height x width x 3 uint8 array.  The array
+        is not copied, so changes to it change the image and the other way around."""
+        array = np.asarray(array)
+        if array.ndim != 3 or array.shape[2] != 3 or array.dtype != np.uint8:
+            raise ValueError("Error: expected a height x width x 3 uint8 array, got %s %s" % (array.shape, array.dtype))
+        image = AbstractImage.__new__(cls)
+        AbstractImage.__init__(image,array=array)
+        return image
+
+    def to_array(self):
+        """Return the height x width x 3 uint8 array of pixels (not a copy) for whole-image
+        operations, for example: a = im.to_array(); a[:] = 255 - a  makes im a negative"""
+        return self._pixels
+
+    def loadImage(self,fname):
+        """Load the pixels of an image file (see readImage)"""
+        self._pixels = readImage(fname)
+
     def loadPILImage(self,fname):
-        self.im = Image.open(fname)
-        ni = self.im.convert("RGB")
-        self.im = ni
+        with _pil().open(fname) as im:
+            self._pixels = np.array(im.convert("RGB"))
 
     def loadTkImage(self,fname):
         sufstart = fname.rfind('.')
@@ -274,26 +474,23 @@ class AbstractImage(object):
             suffix = fname[sufstart:]
         if suffix not in ['.gif', '.ppm']:
             raise ValueError("Bad Image Type: %s : Without PIL, only .gif or .ppm files are allowed" % suffix)
-        self.im = tkinter.PhotoImage(file=fname)
+        self._pixels = _readTk(fname)
 
-    def createBlankPILImage(self,height,width):
-        self.im = Image.new("RGB",(width,height))
-        ni = self.im.convert("RGB")
-        self.im = ni
+    def createBlankImage(self,height,width):
+        self._pixels = np.zeros((height,width,3),np.uint8)
 
-    def createBlankTkImage(self,height,width):
-        self.im = tkinter.PhotoImage(height=height,width=width)
+    createBlankPILImage = createBlankTkImage = createBlankImage
 
 
     def copy(self):
         """Return a copy of this image"""
-        newI = AbstractImage(imobj=self.im)
+        newI = AbstractImage(imobj=self)
         return newI
 
 
     def clone(self):
 	     """Return a copy of this image"""
-	     newI = AbstractImage(imobj=self.im)
+	     newI = AbstractImage(imobj=self)
 	     return newI
         
     def getHeight(self):
@@ -304,25 +501,25 @@ class AbstractImage(object):
         """Return the width of the iamge"""
         return self.width
         
-    def getTkPixel(self,x,y):
+    def getPixel(self,x,y):
         """Get a pixel at the given x,y coordinate.  The pixel is returned as an rgb color tuple
         for eaxamplle foo.getPixel(10,10) --> (10,200,156) """
-        p = [int(j) for j in self.im.get(x,y)]
+        p = self._pixels[y,x].tolist()
         return Pixel(p[0],p[1],p[2])
         
-    def setTkPixel(self,x,y,pixel):
+    def setPixel(self,x,y,pixel):
         """Set the color of a pixel at position x,y.  The color must be specified as an rgb tuple (r,g,b) where 
         the rgb values are between 0 and 255."""
-        self.im.put(formatPixel(pixel.getColorTuple()),(x,y))
-    
-    def getPILPixel(self,x,y):
-        """docstring for getPILPIxel"""
-        p = self.im.getpixel((x,y))
-        return Pixel(p[0],p[1],p[2])
+        if isinstance(pixel,Pixel):
+            pixel = pixel.getColorTuple()
+        try:
+            self._pixels[y,x] = pixel
+        except OverflowError:
+            self._pixels[y,x] = [min(max(int(c),0),255) for c in pixel]
 
-    def setPILPixel(self,x,y,pixel):
-        """docstring for setPILPixel"""
-        self.im.putpixel((x,y),pixel.getColorTuple())
+    # the Tk and PIL versions are the same now that both use the array
+    getTkPixel = getPILPixel = getPixel
+    setTkPixel = setPILPixel = setPixel
     
     def setPosition(self,x,y):
         """Set the position in the window where the top left corner of the window should be."""
@@ -330,12 +527,21 @@ class AbstractImage(object):
         self.left = x
         self.centerX = x + (self.width/2)+3
         self.centerY = y + (self.height/2)+3
+
+    def _sync(self):
+        """Make self.im, the PIL or Tk image, from the array of pixels"""
+        if _pil():
+            self.im = Image.fromarray(self._pixels,"RGB")
+        else:
+            self.im = _tkPhoto(self._pixels)
+        return self.im
     
     def getImage(self):
-        if pilAvailable:
-            return ImageTk.PhotoImage(self.im)
+        if _pil():
+            _root()
+            return _pilTk().PhotoImage(self._sync())
         else:
-            return self.im
+            return self._sync()
 
     def draw(self,win):
         """Draw this image in the ImageWin window."""
@@ -344,7 +550,7 @@ class AbstractImage(object):
         AbstractImage.imageId = AbstractImage.imageId + 1
         self.canvas=win
         self.id = self.canvas.create_image(self.centerX,self.centerY,image=ig)
-        _imroot.update()
+        _root().update()
         
     def saveTk(self,fname=None,ftype='gif'):
         if fname == None:
@@ -360,7 +566,7 @@ class AbstractImage(object):
         if suffix not in ['.gif', '.ppm']:
             raise ValueError("Without PIL, only .gif or .ppm files are allowed")
         try:
-            self.im.write(fname,format=ftype)            
+            self._sync().write(fname,format=ftype)            
         except Exception as inst:
             print(type(inst))    # the exception instance
             print(inst.args)     # arguments stored in .args
@@ -369,6 +575,19 @@ class AbstractImage(object):
             
             print("Error saving, Could Not open ", fname, " to write.", sys.exc_info()[0])
 
+    def save(self,fname=None,ftype=None):
+        """Save the image to a file.  .ppm and .pgm files are written with numpy, other files
+        with PIL, or with Tk (.gif only) without PIL.  ftype is added to fname if it has no
+        suffix, and is jpg by default (gif without PIL)."""
+        if fname == None:
+            fname = self.imFileName
+        if os.path.splitext(fname)[1].lower() in PNM_TYPES:
+            writePNM(self._pixels,fname)
+        elif _pil():
+            self.savePIL(fname,ftype or 'jpg')
+        else:
+            self.saveTk(fname,ftype or 'gif')
+
     def savePIL(self,fname=None,ftype='jpg'):
         if fname == None:
             fname = self.imFileName
@@ -381,26 +600,59 @@ class AbstractImage(object):
             suffix = "."+ftype
             fname = fname+suffix
         try:
-            self.im.save(fname)            
+            self._sync().save(fname)            
         except:
             print("Error saving, Could Not open ", fname, " to write.")
 
 
+    def _channel(self,channel):
+        """Return the values of one channel (0 or 'red', 1 or 'green', 2 or 'blue'), or the
+        average of the three like a gray pixel if channel is None"""
+        if channel is None:
+            return (self._pixels.astype(np.uint16).sum(axis=2)//3).astype(np.uint8)
+        if isinstance(channel,str):
+            channel = ['red','green','blue'].index(channel)
+        return self._pixels[:,:,channel]
+
+    def histogram(self,channel=None):
+        """Return an array of 256 counts: how many pixels have each value from 0 to 255 in the channel
+        (see _channel, the average of red, green and blue by default)"""
+        return np.bincount(self._channel(channel).ravel(),minlength=256)
+
+    def mean(self,channel=None):
+        """Return the average value of the channel, or a tuple of the average red, green and blue
+        if channel is None"""
+        if channel is None:
+            return tuple(self._pixels.reshape(-1,3).mean(axis=0).tolist())
+        return float(self._channel(channel).mean())
+
+    def percentile(self,q,channel=None):
+        """Return the smallest value that at least q percent of the pixels are at or below,
+        for example percentile(50) is the median and percentile(99) ignores the brightest 1%"""
+        counts = np.cumsum(self.histogram(channel))
+        # at least one pixel, so percentile(0) is the smallest value in the image
+        return int(np.searchsorted(counts,max(q/100.0*counts[-1],1)))
+
+    def integral_image(self):
+        """Return the summed-area table of the image: a (height+1) x (width+1) x 3 array where
+        [y,x] is the sum of every pixel above and to the left of pixel (x,y).  The sum of any
+        rectangle of pixels is then found from its 4 corners, see integralSum."""
+        return integralImage(self._pixels)
+
     def toList(self):
         """
         Convert the image to a List of Lists representation
         """
-        res = []
-        for i in range(self.height):
-            res.append([])
-            for j in range(self.width):
-                res[i].append(self.getPixel(j,i))
-        return res
+        return [[Pixel(*p) for p in row] for row in self._pixels.tolist()]
 
 
 class FileImage(AbstractImage):
     def __init__(self,thefile):
-        super(FileImage, self).__init__(fname = thefile)
+        if isinstance(thefile,AbstractImage):
+            # an image that has already been loaded is copied instead of read again
+            super(FileImage, self).__init__(imobj = thefile)
+        else:
+            super(FileImage, self).__init__(fname = thefile)
 
 
 class EmptyImage(AbstractImage):
@@ -0,0 +1,145 @@
+"""
+composite.py
+Chroma-key compositing (whiteScreen and superImpose of Problem Set 3) and red-eye correction,
+done on whole arrays of pixels with masks instead of one pixel at a time.
+
+A key mask is True where the background should show through.  It can be feathered (blurred)
+into an alpha between 0 and 1, so the edge of the foreground fades into the background
+instead of having jagged edges, and the two images are then mixed by the alpha.
+
+Every function takes images or height x width x 3 uint8 arrays, and gives back the same kind
+as its first argument.
+"""
+import numpy as np
+from cImage import *
+
+def _pixels(image):
+    if isinstance(image, AbstractImage):
+        return image.to_array()
+    return np.asarray(image, np.uint8)
+
+def _same(image, pixels):
+    """Return the pixels as an image if the image was an image"""
+    if isinstance(image, AbstractImage):
+        return EmptyImage.from_array(pixels)
+    return pixels
+
+def behind(foreground, background):
+    """The part of the background behind the foreground: centred across and at the bottom,
+    like whiteScreen.  The background must be at least as big as the foreground."""
+    height, width = foreground.shape[:2]
+    if background.shape[0] < height or background.shape[1] < width:
+        raise ValueError("Error: the background must be at least as big as the foreground")
+    left = (background.shape[1] - width) // 2
+    top = background.shape[0] - height
+    return background[top:top + height, left:left + width]
+
+def keyMask(pixels, key=(255, 255, 255), tolerance=0, channels='all'):
+    """True where every channel of the pixel is within tolerance of the key colour (or of the
+    pixel in the same place, if key is an array like the blank image of superImpose).
+    With channels='any' one channel within tolerance is enough, which is what superImpose does
+    (it shows the background if the red, green or blue is the same as in the blank image)."""
+    if channels not in ('all', 'any'):
+        raise ValueError("Error: channels must be 'all' or 'any', not %r" % channels)
+    key = np.asarray(key)
+    if key.ndim == 1:
+        #Comparing with the lowest and highest values allowed keeps everything in uint8
+        low = np.clip(key.astype(int) - tolerance, 0, 255).astype(np.uint8)
+        high = np.clip(key.astype(int) + tolerance, 0, 255).astype(np.uint8)
+        inside = (pixels >= low) & (pixels <= high)
+        if channels == 'any':
+            return inside[:, :, 0] | inside[:, :, 1] | inside[:, :, 2]
+        return inside[:, :, 0] & inside[:, :, 1] & inside[:, :, 2]
+    difference = np.abs(pixels.astype(np.int16) - key.astype(np.int16))
+    if channels == 'any':
+        return difference.min(axis=2) <= tolerance
+    return difference.max(axis=2) <= tolerance
+
+def feather(mask, radius):
+    """Return the mask as a float32 alpha (1 where the mask is True) averaged over a square of
+    2 * radius + 1 pixels, using running sums so any radius takes the same time"""
+    alpha = mask.astype(np.float32)
+    if radius <= 0:
+        return alpha
+    size = 2 * radius + 1
+    for axis in (0, 1):
+        padded = np.pad(alpha, [(radius + 1, radius) if a == axis else (0, 0) for a in (0, 1)], 'edge')
+        sums = np.cumsum(padded, axis=axis, dtype=np.float64)
+        if axis == 0:
+            alpha = ((sums[size:] - sums[:-size]) / size).astype(np.float32)
+        else:
+            alpha = ((sums[:, size:] - sums[:, :-size]) / size).astype(np.float32)
+    return alpha
+
+def blend(foreground, background, alpha):
+    """Mix two arrays of pixels: the background where alpha is 1 (or True), the foreground where it is 0"""
+    if alpha.dtype == bool:
+        return np.where(alpha[:, :, None], background, foreground)
+    alpha = alpha[:, :, None]
+    mixed = foreground * (1 - alpha) + background * alpha
+    return (mixed + 0.5).astype(np.uint8)
+
+def chromaKey(foreground, background, key=(255, 255, 255), tolerance=0, radius=0):
+    """The foreground with the pixels near the key colour replaced by the background (see behind),
+    like whiteScreen.  radius feathers the edges."""
+    fore = _pixels(foreground)
+    back = behind(fore, _pixels(background))
+    mask = keyMask(fore, key, tolerance)
+    return _same(foreground, blend(fore, back, feather(mask, radius) if radius else mask))
+
+def differenceKey(foreground, blank, background, tolerance=0, radius=0, channels='all'):
+    """The foreground with the pixels that are the same as in the blank image (the same scene
+    without the person) replaced by the background.  By default a pixel must be the same (within
+    tolerance) in all three channels, which is not superImpose's rule: superImpose shows the
+    background when any one channel is equal, so a red shirt in front of a red wall partly
+    disappears.  channels='any' (with tolerance 0) gives exactly superImpose's result."""
+    fore = _pixels(foreground)
+    back = behind(fore, _pixels(background))
+    mask = keyMask(fore, _pixels(blank), tolerance, channels)
+    return _same(foreground, blend(fore, back, feather(mask, radius) if radius else mask))
+
+def eyeBox(x, y, size=5):
+    """The (left, top, right, bottom) of the square around a click, like redEyecorrect"""
+    return (x - size, y - size, x + size + 1, y + size + 1)
+
+def redEye(image, boxes=None, ratio=1.0):
+    """Return a copy of the image where pixels with more than ratio times as much red as the
+    average of green and blue have their red set to that average, like redEyecorrect.
+    boxes is a list of (left, top, right, bottom) to look in (the whole image by default)."""
+    pixels = _pixels(image).copy()
+    height, width = pixels.shape[:2]
+    for left, top, right, bottom in boxes or [(0, 0, width, height)]:
+        part = pixels[max(top, 0):bottom, max(left, 0):right]
+        red = part[:, :, 0].astype(np.int16)
+        average = (part[:, :, 1].astype(np.int16) + part[:, :, 2]) // 2
+        mask = red > ratio * average
+        part[:, :, 0][mask] = average[mask]
+    return _same(image, pixels)
+
+
+if __name__ == "__main__":
+    #frames per second on video frame sized (1920 x 1080) pixels
+    import time
+    rng = np.random.default_rng(0)
+    fore = rng.integers(0, 256, (1080, 1920, 3), dtype=np.uint8)
+    fore[200:900, 300:1500] = 255
+    back = rng.integers(0, 256, (1080, 1920, 3), dtype=np.uint8)
+    blank = fore.copy()
+    blank[:100] = 0
+    tests = [("chromaKey", lambda: chromaKey(fore, back)),
+             ("chromaKey tolerance 20", lambda: chromaKey(fore, back, tolerance=20)),
+             ("chromaKey feathered 4", lambda: chromaKey(fore, back, tolerance=20, radius=4)),
+             ("differenceKey", lambda: differenceKey(fore, blank, back, tolerance=10)),
+             ("differenceKey any", lambda: differenceKey(fore, blank, back, channels='any')),
+             ("redEye whole frame", lambda: redEye(fore)),
+             ("redEye 4 eyes", lambda: redEye(fore, [eyeBox(100 * i, 100, 5) for i in range(1, 5)]))]
+    #superImpose's rule: the background where the red, the green or the blue is the same as the blank
+    other = rng.integers(0, 256, fore.shape, dtype=np.uint8)
+    same = (fore == other).any(axis=2)
+    assert (differenceKey(fore, other, back, channels='any') == np.where(same[:, :, None], back, fore)).all()
+    assert (keyMask(fore, other) == (fore == other).all(axis=2)).all()
+    for name, test in tests:
+        start = time.perf_counter()
+        for i in range(10):
+            test()
+        print("%-24s %.1f frames/s" % (name, 10 / (time.perf_counter() - start)))
@@ -0,0 +1,98 @@
+import sys
+import time
+import numpy as np
+import convolution
+from convolution import *
+
+def timed(func):
+    """Returns the seconds taken to run func"""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def loopFilter(image, kernel):
+    """The filter one pixel at a time with convolution.convolve, like applyFilter used to be"""
+    convolution.filterWidth = convolution.filterHeight = len(kernel)
+    newim = EmptyImage(image.getWidth(), image.getHeight())
+    for row in range(1, image.getHeight() - 1):
+        for col in range(1, image.getWidth() - 1):
+            newim.setPixel(col, row, Pixel(*convolve(image, row, col, kernel)))
+    return newim
+
+def check(height=20, width=24, factor=1.0, bias=0.0):
+    """Returns (mask, number of pixels different from convolve, largest difference) for every mask
+    in KERNELS and box and Gaussian masks of other sizes, on the pixels far enough from the edges
+    for convolve.  Only separable masks bigger than SEPARABLE_MIN (and FFT masks) can be different."""
+    pixels = np.random.default_rng(height * width).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    image = EmptyImage.from_array(pixels)
+    masks = sorted(KERNELS.items()) + [("boxMask(5)", boxMask(5)), ("boxMask(11)", boxMask(11)), ("gaussianMask(7)", gaussianMask(7))]
+    results = []
+    for name, kernel in masks:
+        kh, kw = len(kernel), len(kernel[0])
+        convolution.filterHeight, convolution.filterWidth = kh, kw
+        convolution.factor, convolution.bias = factor, bias
+        fast = apply_filter(pixels, kernel, factor, bias)
+        different = largest = 0
+        for row in range(kh // 2, height - kh // 2):
+            for col in range(kw // 2, width - kw // 2):
+                #convolve puts the pixel one row and column in from the corner of the mask
+                expected = convolve(image, row - kh // 2 + 1, col - kw // 2 + 1, kernel)
+                difference = np.abs(fast[row, col].astype(int) - expected).max()
+                different += difference > 0
+                largest = max(largest, difference)
+        results.append((name, different, largest))
+    convolution.filterHeight = convolution.filterWidth = 3
+    convolution.factor, convolution.bias = 1.0, 0.0
+    return results
+
+def bench(size, loop):
+    """Returns (mask, path, seconds) for each mask on a size x size image of random pixels"""
+    pixels = np.random.default_rng(size).integers(0, 256, (size, size, 3), dtype=np.uint8)
+    image = EmptyImage.from_array(pixels)
+    dense = np.random.default_rng(0).normal(size=(31, 31))
+    results = []
+    if loop:
+        results.append(("sharpenMask", "getPixel loop", timed(lambda: loopFilter(image, sharpenMask))))
+    results.append(("sharpenMask", "shifted", timed(lambda: apply_filter(image, sharpenMask))))
+    results.append(("ContrastBlur 9x9", "shifted", timed(lambda: apply_filter(image, ContrastBlur, 1 / 9.0, 4.0))))
+    gaussian = KERNELS["gaussian15x15"]
+    results.append(("gaussian15x15", "separable", timed(lambda: apply_filter(image, gaussian))))
+    #The same mask with a tiny change in one corner, so that it is not separable any more
+    almost = np.array(gaussian)
+    almost[0, 0] += 0.01
+    results.append(("gaussian15x15", "shifted", timed(lambda: apply_filter(image, almost))))
+    results.append(("random 31x31", "fft", timed(lambda: apply_filter(image, dense))))
+    convolution.FFT_MIN = dense.size
+    results.append(("random 31x31", "shifted", timed(lambda: apply_filter(image, dense))))
+    convolution.FFT_MIN = 100
+    return results
+
+def scaling(size, counts=(1, 2, 4, 8)):
+    """Prints the time of ContrastBlur on a size x size image with each number of worker processes"""
+    pixels = np.random.default_rng(size).integers(0, 256, (size, size, 3), dtype=np.uint8)
+    print("%-8s %-10s %-8s" % ("workers", "seconds", "speedup"))
+    base = None
+    for workers in counts:
+        seconds = timed(lambda: apply_filter(pixels, ContrastBlur, 1 / 9.0, 4.0, workers=workers))
+        base = base or seconds
+        print("%-8d %-10.3f %-8.2f" % (workers, seconds, base / seconds))
+
+def main(sizes=(512, 4096)):
+    """Benchmark of apply_filter on each path (and the old getPixel loop on small images)
+Run with: python convbench.py [size size ...]"""
+
+    print("%-18s %-6s %-14s %-10s %-10s" % ("mask", "size", "path", "seconds", "Mpixel/s"))
+    for size in sizes:
+        for name, path, seconds in bench(size, size <= 512):
+            print("%-18s %-6d %-14s %-10.3f %-10.2f" % (name, size, path, seconds, size * size / seconds / 10**6))
+
+if __name__ == "__main__":
+    #python convbench.py scale [size] times 1, 2, 4 and 8 worker processes instead, and
+    #python convbench.py check compares every mask with convolve
+    if sys.argv[1:2] == ["check"]:
+        for name, different, largest in check() + check(60, 64) + check(factor=1 / 9.0, bias=4.0):
+            print("%-18s %d pixels different from convolve (by at most %d)" % (name, different, largest))
+    elif sys.argv[1:2] == ["scale"]:
+        scaling(*[int(size) for size in sys.argv[2:3]] or [4096])
+    else:
+        main(*[[int(size) for size in sys.argv[1:]]] if sys.argv[1:] else [])
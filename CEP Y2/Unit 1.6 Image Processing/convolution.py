@@ -1,98 +1,12 @@
 import math
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 from cImage import *
 filterWidth = 3
 filterHeight = 3
 
-#This filter does nothing more than returning the original image
-#since only the center value is 1 so every pixel is multiplied with 1.
-identityMask = [[-1,0,0],\
-                [0,1,0],\
-                [0,0,0]]
-
-#Blurring is done for example by taking the average of
-#the current pixel and its 4 neighbors. Take the sum of
-#the current pixel and its 4 neighbors, and divide it through 5,
-#or thus fill in 5 times the value 0.2 in the filter
-blurMask3x3 = [ [0.0,0.2,0.0],\
-                [0.2,0.2,0.2],\
-                [0.0,0.2,0.0]]
-
-
-#With a bigger filter you can blur it a bit more 
-#(don't forget to change the filterWidth and filterHeight values):
-blurryMask5x5 =[[-1,-1,-1,-1,-1],\
-                [-1,2,2,2,-1],\
-                [-1,2,6,2,-1],\
-                [-1,2,2,2,-1],\
-                [-1,-1,-1,-1,-1] ]
-
-'''
-#Motion blur is achieved by blurring in only 1 direction.
-#Here's a 9x9 motion blur filter
-'''
-motionBlur9x9 = [ [1,0,0,0,0,0,0,0,0],\
-                  [0,1,0,0,0,0,0,0,0],\
-                  [0,0,1,0,0,0,0,0,0],\
-                  [0,0,0,1,0,0,0,0,0],\
-                  [0,0,0,0,1,0,0,0,0],\
-                  [0,0,0,0,0,1,0,0,0],\
-                  [0,0,0,0,0,0,1,0,0],\
-                  [0,0,0,0,0,0,0,1,0],\
-                  [0,0,0,0,0,0,0,0,1]]
-ContrastBlur = [ [1,1,0,0,0,0,0,-1,-1],\
-                  [1,1,0,0,0,0,0,-1,-1],\
-                  [1,1,0,0,0,0,0,-1,-1],\
-                  [1,1,0,0,-1,0,0,-1,-1],\
-                  [1,1,0,-1,8,-1,0,-1,-1],\
-                  [1,1,0,0,-1,0,0,-1,-1],\
-                  [1,1,0,0,0,0,0,-1,-1],\
-                  [1,1,0,0,0,0,0,-1,-1],\
-                  [1,1,0,0,0,0,0,-1,-1]]
-CalligraphyBlur = [ [1,1,1,1,1,1,1,1,1],\
-                  [1,1,1,1,1,1,1,1,1],\
-                  [0,0,0,0,0,0,0,0,0],\
-                  [0,0,0,0,-0.25,0,0,0,0],\
-                  [0,0,0,-0.25,6,-0.25,0,0,0],\
-                  [0,0,0,0,-0.25,0,0,0,0],\
-                  [0,0,0,0,0,0,0,0,0],\
-                  [-1,-1,-1,-1,-1,-1,-1,-1,-1],\
-                  [-1,-1,-1,-1,-1,-1,-1,-1,-1]]
-#The reason why this filter can find horizontal edges, is that the
-#convolution operation with this filter can be seen as a sort of discrete
-#version of the derivative: you take the current pixel and subtract the value
-#of the previous one from it, so you get a value that represents the difference
-#between those two or the slope of the function.
-xMask = [ [-1, 0, 1],\
-          [-1, 0, 1],\
-          [-1, 0, 1]]
-
-#Here's a filter that'll find vertical edges instead,
-#and uses both pixel values below and above the current pixel
-yMask = [ [0,-1, 0],\
-          [0, 0, 0],\
-          [0, 1, 0]]
-
-
-'''
-To sharpen the image is very similar to finding edges, add the original image, and the image
-after the edge detection to each other, and the result will be a new image where the edges
-are enhanced, making it look sharper. Adding those two images is done by taking the edge
-detection filter from the previous example, and incrementing the center value of it with 1.
-Now the sum of the filter elements is 1 and the result will be an image with the same brightness
-as the original, but sharper.
-'''
-sharpenMask = [ [-1,-1,-1],\
-                [-1, 9,-1],\
-                [-1,-1,-1]]
-
-sharpenMask2 = [[ 0,-1, 0],\
-                [-1, 5,-1],\
-                [ 0,-1, 0]]
-
-sharpenMask3 = [[    0,-0.25,    0],\
-                [-0.25,    2,-0.25],\
-                [    0,-0.25,    0]]
-
+from kernels import *
 
 '''
 Apart from using a filter matrix, it also has a multiplier factor and a bias. After applying the filter,
@@ -104,6 +18,8 @@ so that element 0.25 is actually 0.5. The bias can be used if you want to make t
 factor = 1.0 
 bias = 0.0
 
+#convolve is the filter worked out one pixel at a time with getPixel, and applyFilter
+#uses apply_filter below, which works on the whole array of pixels at once
 def convolve(anImage,pixelRow,pixelCol,kernel):
     kernelColumnBase = pixelCol - 1
     kernelRowBase = pixelRow - 1
@@ -131,14 +47,178 @@ def convolve(anImage,pixelRow,pixelCol,kernel):
     blue = min(max(int((factor * bsum) + bias), 0), 255)
     return red, green, blue
 
-def applyFilter(theImage, ifilter):
-    newim = EmptyImage(theImage.getWidth(), theImage.getHeight())
-    ignore = filterWidth - 2
-    for row in range(1,theImage.getHeight()-ignore):    
-        for col in range(1,theImage.getWidth()-ignore):
-            red,green,blue = convolve(theImage, row, col, ifilter)
-            newim.setPixel(col,row,Pixel(red,green,blue))
-    return newim
+def applyFilter(theImage, ifilter, workers=None):
+    """Return theImage filtered with ifilter, using the factor and bias set at the top of this file
+    (and that many worker processes, see filter_array)"""
+    return apply_filter(theImage, ifilter, factor, bias, workers=workers)
+
+
+#How the edges are filled in so that the mask can be centred on the pixels at the edge
+#of the image, as the names of np.pad: 'reflect' mirrors the image (without repeating the
+#edge pixel), 'edge' repeats the edge pixel, 'constant' uses black and 'wrap' uses the other side.
+BORDERS = ('reflect', 'edge', 'constant', 'wrap')
+
+#Masks with more than this many non-zero numbers use the FFT instead of adding up shifted images.
+FFT_MIN = 100
+
+#Separable masks with more than this many non-zero numbers use two passes.  Smaller masks add up
+#the shifted images in the same order as convolve, so they give exactly the same pixels; two passes
+#(and the FFT) can be 1 different where convolve's own sum comes out just below a whole number.
+SEPARABLE_MIN = 50
+
+def separate(kernel, tolerance=1e-6):
+    """Return (column, row) if the mask is a column of numbers times a row of numbers,
+    like box and Gaussian blurs, otherwise None"""
+    kernel = np.asarray(kernel, np.float64)
+    if min(kernel.shape) < 2:
+        return None
+    u, s, vt = np.linalg.svd(kernel)
+    if s[0] == 0 or s[1] > tolerance * s[0]:
+        return None
+    return u[:, 0] * math.sqrt(s[0]), vt[0] * math.sqrt(s[0])
+
+def _shifted(padded, kernel, out):
+    """Add up the padded image shifted by every non-zero number of the mask, times that number, into out"""
+    height, width = out.shape[:2]
+    for i, j in zip(*np.nonzero(kernel)):
+        out += kernel[i, j] * padded[i:i + height, j:j + width]
+    return out
+
+def _fft(padded, kernel, out):
+    """Convolve each channel of the padded image with the mask by multiplying their Fourier transforms"""
+    height, width = out.shape[:2]
+    shape = padded.shape[:2]
+    #The mask is flipped because the masks here are slid over the image without flipping them
+    spectrum = np.fft.rfft2(kernel[::-1, ::-1], shape)
+    for c in range(padded.shape[2]):
+        full = np.fft.irfft2(np.fft.rfft2(padded[:, :, c]) * spectrum, shape)
+        kh, kw = kernel.shape
+        out[:, :, c] = full[kh - 1:kh - 1 + height, kw - 1:kw - 1 + width]
+    return out
+
+def _pad(pixels, kernel, border):
+    """Return the pixels with enough rows and columns added around them to centre the mask on every pixel"""
+    if border not in BORDERS:
+        raise ValueError("Error: border must be one of %s, not %r" % (BORDERS, border))
+    kh, kw = kernel.shape
+    top, left = kh // 2, kw // 2
+    return np.pad(pixels, ((top, kh - 1 - top), (left, kw - 1 - left), (0, 0)), border)
+
+def _filterPadded(padded, kernel, factor, bias, result=None):
+    """Return the uint8 pixels filtered from padded pixels, which are kernel height - 1 rows
+    and kernel width - 1 columns bigger than the result (written into result if given)"""
+    kh, kw = kernel.shape
+    #float64 like the Python floats of convolve, so the shifted sums are added up in the same
+    #order with the same rounding as convolve, and give exactly the same pixels
+    padded = padded.astype(np.float64)
+    out = np.zeros((padded.shape[0] - kh + 1, padded.shape[1] - kw + 1, padded.shape[2]), np.float64)
+    parts = separate(kernel)
+    exact = False
+    if parts is not None and np.count_nonzero(kernel) > SEPARABLE_MIN:
+        #Two passes: down the columns, then along the rows of what that gives
+        column, row = parts
+        middle = np.zeros((out.shape[0], padded.shape[1], out.shape[2]), np.float64)
+        _shifted(padded, column[:, None], middle)
+        _shifted(middle, row[None, :], out)
+    elif np.count_nonzero(kernel) > FFT_MIN:
+        _fft(padded, kernel, out)
+    else:
+        _shifted(padded, kernel, out)
+        exact = True
+    out *= factor
+    out += bias
+    if not exact:
+        #The separable and FFT sums are only close to the exact sum, so a sum which should be a
+        #whole number can come out just below it; make those whole numbers before int()
+        whole = np.rint(out)
+        close = np.abs(out - whole) < 1e-6
+        np.copyto(out, whole, where=close)
+    #Same as int() then min and max for every pixel in convolve
+    np.trunc(out, out)
+    np.clip(out, 0, 255, out)
+    if result is None:
+        return out.astype(np.uint8)
+    np.copyto(result, out, casting='unsafe')
+    return result
+
+def _filterRows(padName, padShape, outName, outShape, start, stop, kernel, factor, bias):
+    """Filters rows start to stop into the shared output array, in a worker process.
+    Both arrays are in shared memory, so only their names are sent to the worker."""
+    padMemory = shared_memory.SharedMemory(padName)
+    outMemory = shared_memory.SharedMemory(outName)
+    try:
+        padded = np.ndarray(padShape, np.uint8, padMemory.buf)
+        out = np.ndarray(outShape, np.uint8, outMemory.buf)
+        #The rows of the tile and the halo of kernel height - 1 rows around them
+        out[start:stop] = _filterPadded(padded[start:stop + kernel.shape[0] - 1], kernel, factor, bias)
+        del padded, out
+    finally:
+        padMemory.close()
+        outMemory.close()
+
+def _filterTiles(padded, kernel, factor, bias, workers):
+    """Filters the padded pixels in one tile of rows per worker process and returns the joined result"""
+    kh, kw = kernel.shape
+    outShape = (padded.shape[0] - kh + 1, padded.shape[1] - kw + 1, padded.shape[2])
+    padMemory = shared_memory.SharedMemory(create=True, size=padded.nbytes)
+    outMemory = shared_memory.SharedMemory(create=True, size=max(int(np.prod(outShape)), 1))
+    try:
+        np.ndarray(padded.shape, np.uint8, padMemory.buf)[:] = padded
+        bounds = np.linspace(0, outShape[0], workers + 1).astype(int)
+        with ProcessPoolExecutor(workers) as pool:
+            jobs = [pool.submit(_filterRows, padMemory.name, padded.shape, outMemory.name, outShape,
+                                start, stop, kernel, factor, bias)
+                    for start, stop in zip(bounds[:-1], bounds[1:]) if start < stop]
+            for job in jobs:
+                job.result()
+        return np.ndarray(outShape, np.uint8, outMemory.buf).copy()
+    finally:
+        padMemory.close()
+        padMemory.unlink()
+        outMemory.close()
+        outMemory.unlink()
+
+def filter_array(pixels, kernel, factor=1.0, bias=0.0, border='reflect', workers=None, out=None):
+    """Return the height x width x 3 uint8 array filtered with the mask, centred on each pixel:
+    factor * (the sum of the mask times the pixels under it) + bias, cut off at 0 and 255.
+    With workers, the rows are split into that many tiles which are filtered in separate processes.
+    If out is given, the result is written into it (it must not be pixels) instead of a new array."""
+    kernel = np.asarray(kernel, np.float64)
+    padded = _pad(pixels, kernel, border)
+    if workers is None or workers <= 1 or pixels.shape[0] < 2 * workers:
+        return _filterPadded(padded, kernel, factor, bias, out)
+    result = _filterTiles(padded, kernel, factor, bias, workers)
+    if out is None:
+        return result
+    out[...] = result
+    return out
+
+def apply_filter(image, kernel, factor=1.0, bias=0.0, border='reflect', workers=None, out=None):
+    """Return a new image of the image filtered with the mask (see filter_array).
+    The image can also be a height x width x 3 uint8 array, and then an array is returned.
+    out can be an array (or image) to write the result into instead of a new one."""
+    if isinstance(out, AbstractImage):
+        out = out.to_array()
+    if isinstance(image, AbstractImage):
+        return EmptyImage.from_array(filter_array(image.to_array(), kernel, factor, bias, border, workers, out))
+    return filter_array(np.asarray(image, np.uint8), kernel, factor, bias, border, workers, out)
+
+def box_blur(image, radius):
+    """Return the image with every pixel the average of the square of 2 * radius + 1 pixels
+    around it (only counting the pixels inside the image at the edges).  The sums come from the
+    summed-area table, so each pixel takes the same time whatever the radius."""
+    pixels = image.to_array() if isinstance(image, AbstractImage) else np.asarray(image, np.uint8)
+    height, width = pixels.shape[:2]
+    table = integralImage(pixels)
+    rows, cols = np.arange(height), np.arange(width)
+    top, bottom = np.clip(rows - radius, 0, height)[:, None], np.clip(rows + radius + 1, 0, height)[:, None]
+    left, right = np.clip(cols - radius, 0, width)[None, :], np.clip(cols + radius + 1, 0, width)[None, :]
+    sums = integralSum(table, top, left, bottom, right)
+    counts = ((bottom - top) * (right - left))[:, :, None]
+    blurred = ((sums + counts // 2) // counts).astype(np.uint8)
+    if isinstance(image, AbstractImage):
+        return EmptyImage.from_array(blurred)
+    return blurred
                            
 
 
@@ -190,25 +270,17 @@ def applyFilter(theImage, ifilter):
 ##newimage = applyFilter(image, blurMask5x5)
 ##newimage.draw(myimagewindow)
 ##myimagewindow.exitOnClick()
-motionBlurry9x9 = [[1,0,0,0,-1,0,0,0,1],\
-                  [0,1,0,0,-1,0,0,1,0],\
-                  [0,0,1,0,-1,0,1,0,0],\
-                  [0,0,0,1,-1,1,0,0,0],\
-                  [-1,-1,-1,-1,-1,-1,-1,-1,-1],\
-                  [0,1,0,1,-1,1,0,0,0],\
-                  [0,0,1,0,-1,0,1,0,0],\
-                  [0,1,0,0,-1,0,0,1,0],\
-                  [1,0,0,0,-1,0,0,0,1]]
 ##MotionBlur9x9 Filter
-image = FileImage("apple.gif")
-myimagewindow = ImageWin("motionBlur9x9", image.getWidth(), image.getHeight())
-filterWidth = 9
-filterHeight = 9
-factor = 1.0 / 9.0
-bias = 4.0
-newimage = applyFilter(image, ContrastBlur)
-newimage.draw(myimagewindow)
-newimage.save("alienapple.gif")
+if __name__ == "__main__":
+    image = FileImage("apple.gif")
+    myimagewindow = ImageWin("motionBlur9x9", image.getWidth(), image.getHeight())
+    filterWidth = 9
+    filterHeight = 9
+    factor = 1.0 / 9.0
+    bias = 4.0
+    newimage = applyFilter(image, ContrastBlur)
+    newimage.draw(myimagewindow)
+    newimage.save("alienapple.gif")
 
 ##image = FileImage("bigapple.gif")
 ##myimagewindow = ImageWin("Identity Filter", image.getWidth(), image.getHeight())
@@ -0,0 +1,370 @@
+"""
+framestream.py
+Runs the Unit 1.6 filters over a sequence of frames of the same size: numbered image files
+(frame0001.ppm, frame0002.ppm, ...) or raw RGB bytes from a pipe, like the output of
+ffmpeg -f rawvideo -pix_fmt rgb24.
+
+    python framestream.py "in/frame%04d.ppm" "out/frame%04d.ppm" -t filter:gaussian5x5 --average 4
+    ffmpeg -i in.mp4 -f rawvideo -pix_fmt rgb24 - | python framestream.py - - --raw 1280x720 -t sepia | ffplay ...
+
+Unlike opening every frame with FileImage, no new arrays are made for each frame:
+- the frames are read into a few input arrays made at the start, which are used again and
+  again (.ppm files and pipes are read straight into them)
+- every filter writes into its own output array, made once for the first frame
+- the results are written from a few output arrays, also made at the start
+Reading, filtering and writing run in three threads, with the arrays passed between them in
+queues, so a frame can be read while the one before it is filtered and the one before that is
+written.  When there are no free arrays left the reading waits, so it never gets far ahead.
+
+A filter is a function filter(frame, out) which writes the new frame into out and returns it
+(or returns a new array when out is None).  Temporal filters like FrameAverage also keep the
+frames before.  At the end the frames per second and the average time of each stage are printed.
+"""
+import os
+import sys
+import time
+import queue
+import argparse
+import threading
+import numpy as np
+from cImage import readImage, writeImage, readPNM, PNM_TYPES
+import pipeline
+import convolution
+import batch
+from kernels import KERNELS
+
+#Frames read ahead and waiting to be written (the number of input and output arrays)
+BUFFERS = 3
+
+class FileSource(object):
+    """Frames read from numbered files, given as a pattern like "frame%04d.png" (numbered from
+    start until a file is missing), a directory (every image in it, sorted by name) or a list of names"""
+    def __init__(self, files, start=0):
+        if isinstance(files, str) and os.path.isdir(files):
+            files = sorted(entry.path for entry in os.scandir(files)
+                           if os.path.splitext(entry.name)[1].lower() in batch.EXTENSIONS)
+        elif isinstance(files, str):
+            pattern = files
+            files = []
+            while os.path.exists(pattern % (start + len(files))):
+                files.append(pattern % (start + len(files)))
+        if not files:
+            raise ValueError("Error: no frames found")
+        self.files = list(files)
+        self._first = readImage(self.files[0])
+        self.shape = self._first.shape
+        self._next = 0
+
+    def read(self, out):
+        """Read the next frame into out and return True, or return False after the last frame"""
+        if self._next >= len(self.files):
+            return False
+        fname = self.files[self._next]
+        if self._first is not None:
+            out[...] = self._first
+            self._first = None
+        elif os.path.splitext(fname)[1].lower() in PNM_TYPES:
+            readPNM(fname, out)
+        else:
+            pixels = readImage(fname)
+            if pixels.shape != out.shape:
+                raise ValueError("Error: %s is %dx%d, not %dx%d like the first frame" % (fname, pixels.shape[1], pixels.shape[0], out.shape[1], out.shape[0]))
+            out[...] = pixels
+        self._next += 1
+        return True
+
+
+class RawSource(object):
+    """Frames of width x height x 3 bytes (rgb24) one after the other in a binary stream"""
+    def __init__(self, stream, width, height):
+        self.stream = stream
+        self.shape = (height, width, 3)
+
+    def read(self, out):
+        """Read the next frame into out and return True, or return False at the end of the stream"""
+        view = memoryview(out).cast('B')
+        got = 0
+        #a pipe can give less than was asked for, so keep reading until the frame is whole
+        while got < len(view):
+            n = self.stream.readinto(view[got:])
+            if not n:
+                break
+            got += n
+        if got == 0:
+            return False
+        if got < len(view):
+            raise ValueError("Error: the stream ended part way through a frame")
+        return True
+
+
+class FileSink(object):
+    """Writes each frame to a numbered file, like "frame%04d.png" (the type comes from the name)"""
+    def __init__(self, pattern, start=0):
+        self.pattern = pattern
+        self.start = start
+        directory = os.path.dirname(pattern)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def write(self, frame, index):
+        writeImage(frame, self.pattern % (self.start + index))
+
+
+class RawSink(object):
+    """Writes each frame as rgb24 bytes to a binary stream"""
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, frame, index):
+        #straight from the memory of the array, without a copy as bytes
+        self.stream.write(memoryview(np.ascontiguousarray(frame)).cast('B'))
+
+
+def spatial(kernel, factor=1.0, bias=0.0, border='reflect'):
+    """A filter which convolves each frame with the mask (see convolution.filter_array)"""
+    kernel = np.asarray(kernel, np.float64)
+    return lambda frame, out: convolution.filter_array(frame, kernel, factor, bias, border, out=out)
+
+def point(*steps):
+    """A filter which does point operations (Lut, Matrix or a Pipeline) on each frame"""
+    if len(steps) == 1 and isinstance(steps[0], pipeline.Pipeline):
+        p = steps[0]
+    else:
+        p = pipeline.Pipeline(*steps)
+    return lambda frame, out: p.apply_array(frame, out)
+
+def wrap(func):
+    """A filter from a function of an array of pixels which returns a new array (or a view),
+    like those of geometry.py and composite.py.  The result is copied into out."""
+    def apply(frame, out):
+        result = func(frame)
+        if out is None:
+            #a copy in row order, as the result can be a view of the frame in another order
+            return np.array(result, np.uint8, order='C')
+        out[...] = result
+        return out
+    return apply
+
+
+class FrameAverage(object):
+    """Motion blur: each new frame is the average of the last n frames (fewer at the start).
+    A running total is kept, so each frame only adds the newest frame and takes away the oldest,
+    whatever n is."""
+    def __init__(self, n):
+        if n < 1:
+            raise ValueError("Error: n must be at least 1")
+        self.n = n
+        self.history = None
+
+    def __call__(self, frame, out):
+        if self.history is None or self.history.shape[1:] != frame.shape:
+            self.history = np.empty((self.n,) + frame.shape, np.uint8)
+            self.total = np.zeros(frame.shape, np.uint32)
+            self.average = np.empty(frame.shape, np.uint32)
+            self.count = 0
+        slot = self.history[self.count % self.n]
+        if self.count >= self.n:
+            self.total -= slot
+        self.total += frame
+        slot[...] = frame
+        self.count += 1
+        np.floor_divide(self.total, min(self.count, self.n), out=self.average)
+        if out is None:
+            out = np.empty(frame.shape, np.uint8)
+        np.copyto(out, self.average, casting='unsafe')
+        return out
+
+
+def transform(spec):
+    """Return the filter for one transform of batch.py written as NAME[:ARG[:ARG]],
+    or average:N for FrameAverage"""
+    name, args = spec.split(":")[0], spec.split(":")[1:]
+    if name == "average":
+        return FrameAverage(int(args[0]))
+    if name == "filter":
+        factor = float(args[1]) if len(args) > 1 else 1.0
+        bias = float(args[2]) if len(args) > 2 else 0.0
+        return spatial(KERNELS[args[0]], factor, bias)
+    step = batch.parse(spec)
+    if isinstance(step, (pipeline.Lut, pipeline.Matrix)):
+        return point(step)
+    return wrap(step)
+
+def build(specs):
+    """Return the list of filters for the transforms, joining point operations next to each other
+    into one Pipeline like batch.build"""
+    filters = []
+    steps = []
+    for spec in specs:
+        name = spec.split(":")[0]
+        if name in ("negative", "grayscale", "sepia", "exposure"):
+            steps.append(batch.parse(spec))
+            continue
+        if steps:
+            filters.append(point(*steps))
+            steps = []
+        filters.append(transform(spec))
+    if steps:
+        filters.append(point(*steps))
+    return filters
+
+
+class FrameStream(object):
+    """Reads every frame from the source, runs it through the filters in order and writes it to
+    the sink (or throws it away if the sink is None), with reading, filtering and writing each in
+    their own thread.  buffers is the number of input and output arrays."""
+    STAGES = ("decode", "filter", "encode", "latency")
+
+    def __init__(self, source, filters=(), sink=None, buffers=BUFFERS):
+        self.source = source
+        self.filters = list(filters)
+        self.sink = sink
+        self.buffers = buffers
+        self.times = dict((stage, []) for stage in self.STAGES)
+        self.frames = 0
+        self.seconds = 0.0
+
+    def _decode(self, free, decoded):
+        index = 0
+        while not self._stop.is_set():
+            try:
+                buf = free.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            start = time.perf_counter()
+            if not self.source.read(buf):
+                break
+            self.times["decode"].append(time.perf_counter() - start)
+            decoded.put((index, buf, start))
+            index += 1
+
+    def _filter(self, decoded, free, encoded, done):
+        #every filter but the last writes into its own array, made for the first frame
+        scratch = None
+        while True:
+            item = decoded.get()
+            if item is None:
+                break
+            index, frame, begun = item
+            start = time.perf_counter()
+            if scratch is None:
+                #the first frame shows the shape that comes out of each filter, and the arrays
+                #made for it are kept for the frames after
+                scratch = []
+                result = frame
+                for f in self.filters:
+                    result = f(result, None)
+                    scratch.append(result)
+                out = result if self.filters else frame.copy()
+                for i in range(self.buffers - 1):
+                    done.put(np.empty(out.shape, np.uint8))
+            else:
+                out = None
+                while out is None and not self._stop.is_set():
+                    try:
+                        out = done.get(timeout=0.1)
+                    except queue.Empty:
+                        pass
+                if out is None:
+                    break
+                result = frame
+                for i, f in enumerate(self.filters):
+                    result = f(result, out if i == len(self.filters) - 1 else scratch[i])
+                if not self.filters:
+                    out[...] = frame
+            free.put(frame)
+            self.times["filter"].append(time.perf_counter() - start)
+            encoded.put((index, out, begun))
+
+    def _encode(self, encoded, done):
+        while True:
+            item = encoded.get()
+            if item is None:
+                break
+            index, frame, begun = item
+            start = time.perf_counter()
+            if self.sink is not None:
+                self.sink.write(frame, index)
+            end = time.perf_counter()
+            done.put(frame)
+            self.times["encode"].append(end - start)
+            self.times["latency"].append(end - begun)
+            self.frames += 1
+
+    def _thread(self, target, *args, after=None):
+        """Runs target in a thread, keeping the first error and stopping the others if it fails,
+        and putting None in the after queue (to say there are no more frames) when it ends"""
+        def run():
+            try:
+                target(*args)
+            except BaseException as error:
+                self._errors.append(error)
+                self._stop.set()
+            finally:
+                if after is not None:
+                    after.put(None)
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def run(self):
+        """Process every frame and return the number of frames"""
+        self._stop = threading.Event()
+        self._errors = []
+        free, decoded, encoded, done = queue.Queue(), queue.Queue(), queue.Queue(), queue.Queue()
+        for i in range(self.buffers):
+            free.put(np.empty(self.source.shape, np.uint8))
+        start = time.perf_counter()
+        threads = [self._thread(self._decode, free, decoded, after=decoded),
+                   self._thread(self._filter, decoded, free, encoded, done, after=encoded),
+                   self._thread(self._encode, encoded, done)]
+        for thread in threads:
+            thread.join()
+        self.seconds = time.perf_counter() - start
+        if self._errors:
+            raise self._errors[0]
+        return self.frames
+
+    def report(self, file=sys.stdout):
+        """Print the frames per second and the average milliseconds of each stage"""
+        fps = self.frames / max(self.seconds, 1e-9)
+        print("%d frames in %.2fs: %.1f frames/s" % (self.frames, self.seconds, fps), file=file)
+        for stage in self.STAGES:
+            if self.times[stage]:
+                print("  %-8s %8.2f ms/frame" % (stage, 1000 * np.mean(self.times[stage])), file=file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Filter a sequence of frames without opening any windows.")
+    parser.add_argument("source", help='numbered files like "frame%%04d.ppm", a directory, or - for raw rgb24 from stdin')
+    parser.add_argument("dest", nargs="?", help='numbered files like "out%%04d.png", or - for raw rgb24 to stdout (default: no output)')
+    parser.add_argument("-t", "--transform", action="append", default=[], help="transform to do, in order (see the top of batch.py)")
+    parser.add_argument("-a", "--average", type=int, help="average each frame with the frames before it (motion blur), after the transforms")
+    parser.add_argument("-r", "--raw", help="WIDTHxHEIGHT of the frames from stdin")
+    parser.add_argument("-s", "--start", type=int, default=0, help="number of the first file (default: 0)")
+    parser.add_argument("-b", "--buffers", type=int, default=BUFFERS, help="number of input and output arrays (default: %d)" % BUFFERS)
+    args = parser.parse_args(argv)
+    if args.source == "-":
+        if not args.raw:
+            parser.error("--raw WIDTHxHEIGHT is needed to read frames from stdin")
+        width, height = [int(n) for n in args.raw.lower().split("x")]
+        source = RawSource(sys.stdin.buffer, width, height)
+    else:
+        source = FileSource(args.source, args.start)
+    if args.dest == "-":
+        sink = RawSink(sys.stdout.buffer)
+    elif args.dest:
+        sink = FileSink(args.dest, args.start)
+    else:
+        sink = None
+    filters = build(args.transform)
+    if args.average:
+        filters.append(FrameAverage(args.average))
+    stream = FrameStream(source, filters, sink, args.buffers)
+    stream.run()
+    #the report goes to stderr when the frames go to stdout
+    stream.report(sys.stderr if args.dest == "-" else sys.stdout)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import numpy as np
+from cImage import *
+import geometry
+import batch
+
+def timed(func):
+    """Returns the seconds taken to run func"""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+#The loops of 6_4_double.py and Problem Set 3.py, one getPixel and setPixel at a time
+def loopDouble(oldimage):
+    oldw, oldh = oldimage.getWidth(), oldimage.getHeight()
+    newim = EmptyImage(oldw * 2, oldh * 2)
+    for row in range(oldh):
+        for col in range(oldw):
+            oldpixel = oldimage.getPixel(col, row)
+            newim.setPixel(2 * col, 2 * row, oldpixel)
+            newim.setPixel(2 * col + 1, 2 * row, oldpixel)
+            newim.setPixel(2 * col, 2 * row + 1, oldpixel)
+            newim.setPixel(2 * col + 1, 2 * row + 1, oldpixel)
+    return newim
+
+def loopRotate(image):
+    w, h = image.getWidth(), image.getHeight()
+    newimage = EmptyImage(h, w)
+    for row in range(h):
+        for col in range(w):
+            #rotateImage90CW uses h - row, which is one past the last column when row is 0
+            newimage.setPixel(h - 1 - row, col, image.getPixel(col, row))
+    return newimage
+
+def loopCut(image, x1, y1, x2, y2):
+    newimage = EmptyImage(x2 - x1 + 1, y2 - y1 + 1)
+    for col in range(x1, x2 + 1):
+        for row in range(y1, y2 + 1):
+            newimage.setPixel(col - x1, row - y1, image.getPixel(col, row))
+    return newimage
+
+def bench(image):
+    """Returns (operation, loop seconds, geometry seconds) for each operation on the image"""
+    w, h = image.getWidth(), image.getHeight()
+    results = []
+    for name, loop, fast in [("double", lambda: loopDouble(image), lambda: geometry.double(image)),
+                             ("rotate90", lambda: loopRotate(image), lambda: geometry.rotate90(image)),
+                             ("cut (middle half)", lambda: loopCut(image, w // 4, h // 4, 3 * w // 4, 3 * h // 4),
+                              lambda: geometry.crop(image, w // 4, h // 4, 3 * w // 4 + 1, 3 * h // 4 + 1))]:
+        results.append((name, timed(loop), timed(fast)))
+    #The same results as the loops
+    assert (loopDouble(image).to_array() == geometry.double(image).to_array()).all()
+    assert (loopRotate(image).to_array() == geometry.rotate90(image).to_array()).all()
+    #a point operation after a view which is not one row after another in memory
+    pixels = image.to_array()
+    assert (batch.build(["rotate90", "negative"])(pixels) == 255 - np.rot90(pixels, -1)).all()
+    assert (batch.build(["flip", "sepia"])(pixels) == batch.build(["sepia", "flip"])(pixels)).all()
+    assert geometry.resize(pixels, 0.001).shape == (1, 1, 3)
+    #nearest picks the same pixels as PIL, bigger and smaller, by whole and not whole factors
+    from PIL import Image
+    for factor in (1.5, 2.3, 3, 0.5, 0.37):
+        ours = geometry.resize(pixels, factor)
+        theirs = np.asarray(Image.fromarray(pixels).resize(ours.shape[1::-1], Image.NEAREST))
+        assert (ours == theirs).all(), factor
+    #writing turned and transposed views (not one row after another in memory) as .ppm and .pgm
+    folder = tempfile.mkdtemp()
+    for view in (geometry.rotate90(pixels), geometry.transpose(pixels), pixels[:, ::2]):
+        gray = (view.astype(np.uint16).sum(axis=2) // 3).astype(np.uint8)
+        writeImage(view, os.path.join(folder, "view.ppm"))
+        writeImage(view, os.path.join(folder, "view.pgm"))
+        assert (readPNM(os.path.join(folder, "view.ppm")) == view).all()
+        assert (readPNM(os.path.join(folder, "view.pgm")) == gray[:, :, None]).all()
+    shutil.rmtree(folder)
+    results.append(("resize 1.5 nearest", None, timed(lambda: geometry.resize(image, 1.5))))
+    results.append(("resize 1.5 bilinear", None, timed(lambda: geometry.resize(image, 1.5, method='bilinear'))))
+    return results
+
+def main(files=("apple.gif",)):
+    """Benchmark of the geometry functions against the getPixel / setPixel loops
+Run with: python geombench.py [image file ...]"""
+
+    print("%-16s %-22s %-10s %-12s %-8s" % ("image", "operation", "loop(s)", "geometry(s)", "ratio"))
+    for fname in files:
+        for name, loop, fast in bench(FileImage(fname)):
+            if loop is None:
+                print("%-16s %-22s %-10s %-12.5f %-8s" % (fname, name, "-", fast, "-"))
+            else:
+                print("%-16s %-22s %-10.3f %-12.5f %-8.0f" % (fname, name, loop, fast, loop / fast))
+
+if __name__ == "__main__":
+    main(*[sys.argv[1:]] if sys.argv[1:] else [])
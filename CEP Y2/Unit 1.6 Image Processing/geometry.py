@@ -0,0 +1,98 @@
+"""
+geometry.py
+Rotating, flipping, cropping and resizing images by working on their whole array of pixels.
+
+Turning by quarter turns, flipping, transposing and cropping do not copy any pixels: the
+new image is a view of the same array with the rows and columns read in another order
+(so changing a pixel of one changes the other; use .copy() to get a separate image).
+Resizing makes a new array, picking the nearest pixel or mixing the 4 nearest pixels.
+
+Every function takes an image or a height x width x 3 uint8 array, and gives back the
+same kind.
+"""
+import numpy as np
+from cImage import *
+
+def _pixels(image):
+    if isinstance(image, AbstractImage):
+        return image.to_array()
+    return np.asarray(image, np.uint8)
+
+def _same(image, pixels):
+    """Return the pixels as an image if the image was an image"""
+    if isinstance(image, AbstractImage):
+        return EmptyImage.from_array(pixels)
+    return pixels
+
+def rotate90(image, turns=1):
+    """Turn the image clockwise by that many quarter turns (without copying), like rotateImage90CW"""
+    return _same(image, np.rot90(_pixels(image), -turns))
+
+def flip(image, vertical=False):
+    """Mirror the image left to right (or upside down if vertical), without copying"""
+    pixels = _pixels(image)
+    return _same(image, pixels[::-1] if vertical else pixels[:, ::-1])
+
+def transpose(image):
+    """Swap the rows and columns of the image, without copying"""
+    return _same(image, _pixels(image).transpose(1, 0, 2))
+
+def crop(image, left, top, right, bottom):
+    """The part of the image from column left and row top up to (not including) column right
+    and row bottom, without copying.  imageCut's points (x1, y1) and (x2, y2) are
+    crop(image, x1, y1, x2 + 1, y2 + 1)."""
+    return _same(image, _pixels(image)[top:bottom, left:right])
+
+def _sources(old, new):
+    """The position in the old rows (or columns) that the centre of each new one comes from"""
+    return (np.arange(new) + 0.5) * (old / float(new)) - 0.5
+
+def _nearest(old, new):
+    """The old row (or column) that each new one copies, picked the way PIL's NEAREST does: it starts
+    at half a step and adds old / new one new pixel at a time, so where the exact position is a whole
+    number the rounding can leave it just under and pick the pixel before"""
+    steps = np.full(new, old / float(new))
+    steps[0] /= 2
+    return np.minimum(np.add.accumulate(steps).astype(int), old - 1)
+
+def resize(image, factor=None, width=None, height=None, method='nearest'):
+    """Make the image factor times bigger (or smaller if factor < 1), or a given width and height.
+    factor can also be (height factor, width factor), and the result is always at least 1 x 1.
+    method is 'nearest' to copy the nearest pixel (the same pixel as PIL's NEAREST picks), or
+    'bilinear' to mix the 4 nearest pixels by
+    how near they are.  Bilinear only looks at 4 pixels, so it is close to PIL's BILINEAR when
+    making images bigger, but when making them smaller (factor < 1) it skips the pixels in
+    between instead of averaging them, and can be very different from PIL."""
+    pixels = _pixels(image)
+    oldHeight, oldWidth = pixels.shape[:2]
+    if factor is not None:
+        fy, fx = factor if isinstance(factor, tuple) else (factor, factor)
+        height, width = max(1, int(round(oldHeight * fy))), max(1, int(round(oldWidth * fx)))
+    height = height or oldHeight
+    width = width or oldWidth
+    if method == 'nearest':
+        if height % oldHeight == 0 and width % oldWidth == 0:
+            #Every pixel is made into a whole block of pixels, like double
+            result = pixels.repeat(height // oldHeight, axis=0).repeat(width // oldWidth, axis=1)
+        else:
+            rows, cols = _nearest(oldHeight, height), _nearest(oldWidth, width)
+            result = pixels[rows[:, None], cols]
+    elif method == 'bilinear':
+        y = np.clip(_sources(oldHeight, height), 0, oldHeight - 1)
+        x = np.clip(_sources(oldWidth, width), 0, oldWidth - 1)
+        y0, x0 = y.astype(int), x.astype(int)
+        y1, x1 = np.minimum(y0 + 1, oldHeight - 1), np.minimum(x0 + 1, oldWidth - 1)
+        wy = (y - y0).astype(np.float32)[:, None, None]
+        wx = (x - x0).astype(np.float32)[None, :, None]
+        #Mix the rows first, then the columns of the mixed rows
+        top, bottom = pixels[y0].astype(np.float32), pixels[y1].astype(np.float32)
+        rows = top + (bottom - top) * wy
+        left, right = rows[:, x0], rows[:, x1]
+        result = np.clip(left + (right - left) * wx + 0.5, 0, 255).astype(np.uint8)
+    else:
+        raise ValueError("Error: method must be 'nearest' or 'bilinear', not %r" % method)
+    return _same(image, result)
+
+def double(image):
+    """Make every pixel into 2 x 2 pixels, like double in 6_4_double.py"""
+    return resize(image, 2)
@@ -0,0 +1,140 @@
+"""
+kernels.py
+The convolution masks used by convolution.py, kept in one place so that any script can
+use them, and functions that make box and Gaussian blur masks of any size.
+
+Every mask is a list of rows.  KERNELS maps the name of each mask to the mask.
+"""
+import math
+
+#This filter does nothing more than returning the original image
+#since only the center value is 1 so every pixel is multiplied with 1.
+identityMask = [[-1,0,0],\
+                [0,1,0],\
+                [0,0,0]]
+
+#Blurring is done for example by taking the average of
+#the current pixel and its 4 neighbors. Take the sum of
+#the current pixel and its 4 neighbors, and divide it through 5,
+#or thus fill in 5 times the value 0.2 in the filter
+blurMask3x3 = [ [0.0,0.2,0.0],\
+                [0.2,0.2,0.2],\
+                [0.0,0.2,0.0]]
+
+
+#With a bigger filter you can blur it a bit more 
+#(don't forget to change the filterWidth and filterHeight values):
+blurryMask5x5 =[[-1,-1,-1,-1,-1],\
+                [-1,2,2,2,-1],\
+                [-1,2,6,2,-1],\
+                [-1,2,2,2,-1],\
+                [-1,-1,-1,-1,-1] ]
+
+'''
+#Motion blur is achieved by blurring in only 1 direction.
+#Here's a 9x9 motion blur filter
+'''
+motionBlur9x9 = [ [1,0,0,0,0,0,0,0,0],\
+                  [0,1,0,0,0,0,0,0,0],\
+                  [0,0,1,0,0,0,0,0,0],\
+                  [0,0,0,1,0,0,0,0,0],\
+                  [0,0,0,0,1,0,0,0,0],\
+                  [0,0,0,0,0,1,0,0,0],\
+                  [0,0,0,0,0,0,1,0,0],\
+                  [0,0,0,0,0,0,0,1,0],\
+                  [0,0,0,0,0,0,0,0,1]]
+ContrastBlur = [ [1,1,0,0,0,0,0,-1,-1],\
+                  [1,1,0,0,0,0,0,-1,-1],\
+                  [1,1,0,0,0,0,0,-1,-1],\
+                  [1,1,0,0,-1,0,0,-1,-1],\
+                  [1,1,0,-1,8,-1,0,-1,-1],\
+                  [1,1,0,0,-1,0,0,-1,-1],\
+                  [1,1,0,0,0,0,0,-1,-1],\
+                  [1,1,0,0,0,0,0,-1,-1],\
+                  [1,1,0,0,0,0,0,-1,-1]]
+CalligraphyBlur = [ [1,1,1,1,1,1,1,1,1],\
+                  [1,1,1,1,1,1,1,1,1],\
+                  [0,0,0,0,0,0,0,0,0],\
+                  [0,0,0,0,-0.25,0,0,0,0],\
+                  [0,0,0,-0.25,6,-0.25,0,0,0],\
+                  [0,0,0,0,-0.25,0,0,0,0],\
+                  [0,0,0,0,0,0,0,0,0],\
+                  [-1,-1,-1,-1,-1,-1,-1,-1,-1],\
+                  [-1,-1,-1,-1,-1,-1,-1,-1,-1]]
+#The reason why this filter can find horizontal edges, is that the
+#convolution operation with this filter can be seen as a sort of discrete
+#version of the derivative: you take the current pixel and subtract the value
+#of the previous one from it, so you get a value that represents the difference
+#between those two or the slope of the function.
+xMask = [ [-1, 0, 1],\
+          [-1, 0, 1],\
+          [-1, 0, 1]]
+
+#Here's a filter that'll find vertical edges instead,
+#and uses both pixel values below and above the current pixel
+yMask = [ [0,-1, 0],\
+          [0, 0, 0],\
+          [0, 1, 0]]
+
+
+'''
+To sharpen the image is very similar to finding edges, add the original image, and the image
+after the edge detection to each other, and the result will be a new image where the edges
+are enhanced, making it look sharper. Adding those two images is done by taking the edge
+detection filter from the previous example, and incrementing the center value of it with 1.
+Now the sum of the filter elements is 1 and the result will be an image with the same brightness
+as the original, but sharper.
+'''
+sharpenMask = [ [-1,-1,-1],\
+                [-1, 9,-1],\
+                [-1,-1,-1]]
+
+sharpenMask2 = [[ 0,-1, 0],\
+                [-1, 5,-1],\
+                [ 0,-1, 0]]
+
+sharpenMask3 = [[    0,-0.25,    0],\
+                [-0.25,    2,-0.25],\
+                [    0,-0.25,    0]]
+
+motionBlurry9x9 = [[1,0,0,0,-1,0,0,0,1],\
+                  [0,1,0,0,-1,0,0,1,0],\
+                  [0,0,1,0,-1,0,1,0,0],\
+                  [0,0,0,1,-1,1,0,0,0],\
+                  [-1,-1,-1,-1,-1,-1,-1,-1,-1],\
+                  [0,1,0,1,-1,1,0,0,0],\
+                  [0,0,1,0,-1,0,1,0,0],\
+                  [0,1,0,0,-1,0,0,1,0],\
+                  [1,0,0,0,-1,0,0,0,1]]
+
+
+def boxMask(size):
+    """Return a size x size mask which averages the pixels around each pixel"""
+    return [[1.0 / (size * size)] * size for row in range(size)]
+
+def gaussianMask(size, sigma=None):
+    """Return a size x size Gaussian blur mask (sigma defaults to size / 6), which adds up to 1"""
+    if sigma is None:
+        sigma = size / 6.0
+    line = [math.exp(-((i - size // 2) ** 2) / (2.0 * sigma * sigma)) for i in range(size)]
+    total = sum(line)
+    line = [value / total for value in line]
+    return [[a * b for b in line] for a in line]
+
+#Box and Gaussian blurs are separable: each is a column of numbers times a row of numbers,
+#so convolution.apply_filter runs them as two passes of size numbers instead of one of size * size.
+KERNELS = {"identityMask": identityMask,
+           "blurMask3x3": blurMask3x3,
+           "blurryMask5x5": blurryMask5x5,
+           "motionBlur9x9": motionBlur9x9,
+           "motionBlurry9x9": motionBlurry9x9,
+           "ContrastBlur": ContrastBlur,
+           "CalligraphyBlur": CalligraphyBlur,
+           "xMask": xMask,
+           "yMask": yMask,
+           "sharpenMask": sharpenMask,
+           "sharpenMask2": sharpenMask2,
+           "sharpenMask3": sharpenMask3,
+           "box5x5": boxMask(5),
+           "gaussian5x5": gaussianMask(5),
+           "gaussian15x15": gaussianMask(15)}
@@ -0,0 +1,246 @@
+"""
+pipeline.py
+Point operations (ones where each new pixel only depends on the old pixel in the same place,
+like negative, grayscale, sepia and exposure) declared once and run as one pass over the image.
+
+A Pipeline is a list of steps.  Before it runs, the steps are compiled:
+- steps which change each channel on its own become 256-entry lookup tables, and
+  lookup tables in a row are joined into one table
+- steps which mix the channels linearly (grayscale, sepia) become 3 x 3 matrices, and
+  matrices of whole numbers in a row are multiplied into one matrix when nothing has to be cut
+  off in between (other matrices are kept apart, as int() after each one changes the result)
+- any other function of a pixel is called once for each different colour in the image
+The compiled stages are then run on blocks of rows, so that every stage works on a block
+while it is still in the cache, instead of going over the whole image once for every stage.
+
+Example:
+    p = Pipeline(sepia(), exposure(1.5), negative())
+    newimage = p.apply(FileImage("apple.gif"))
+"""
+import numpy as np
+from cImage import *
+
+#Number of pixels in each block of rows (at least one row)
+BLOCK = 1 << 16
+
+class Lut(object):
+    """A step which changes each channel on its own.  Each function takes a value from 0 to 255
+    and returns the new value; give one function for all three channels or one each for
+    red, green and blue."""
+    def __init__(self, *funcs):
+        if len(funcs) == 1:
+            funcs = funcs * 3
+        self.table = np.array([[min(max(int(f(v)), 0), 255) for v in range(256)] for f in funcs], np.uint8)
+
+    def then(self, other):
+        """Return one Lut which does this Lut and then the other"""
+        joined = Lut.__new__(Lut)
+        joined.table = np.array([other.table[c][self.table[c]] for c in range(3)])
+        return joined
+
+    def run(self, block):
+        if (self.table[0] == self.table[1]).all() and (self.table[0] == self.table[2]).all():
+            return self.table[0][block]
+        out = np.empty_like(block)
+        for c in range(3):
+            np.take(self.table[c], block[:, c], out=out[:, c])
+        return out
+
+
+class Matrix(object):
+    """A step which makes each new channel from a mix of the old ones: the new (r, g, b) is
+    matrix times the old (r, g, b), plus offset, divided by divisor, then int() and cut off at 0
+    and 255.  Each channel is added up in float64 in the same order as r * m[0] + g * m[1] + b * m[2]
+    in Python, so the result is the same as an rgbFunction written that way (like sepiaPixel);
+    a whole number matrix with a divisor (like grayscale) gives the same as // on the exact sum."""
+    def __init__(self, matrix, offset=(0, 0, 0), divisor=1):
+        self.matrix = np.array(matrix, np.float64)
+        self.offset = np.array(offset, np.float64)
+        self.divisor = divisor
+
+    def inRange(self):
+        """Return whether the result is always from 0 to 255, so it never has to be cut off"""
+        positive = (self.matrix >= 0).all() and (self.offset >= 0).all()
+        return positive and (self.matrix.sum(axis=1) * 255 + self.offset <= 255 * self.divisor).all()
+
+    def whole(self):
+        """Return whether the matrix and offset are whole numbers, so whole numbers in give exact sums"""
+        return bool((self.matrix == np.round(self.matrix)).all() and (self.offset == np.round(self.offset)).all())
+
+    def joinsExactly(self, other):
+        """Return whether this Matrix and then the other can be one Matrix with exactly the same result:
+        this one must give whole numbers from 0 to 255 (nothing to cut off or int()), and the other must
+        be whole numbers too, as joining changes the order of adding up fractions"""
+        return self.divisor == 1 and self.whole() and self.inRange() and other.whole()
+
+    def then(self, other):
+        """Return one Matrix which does this Matrix and then the other (see joinsExactly)"""
+        return Matrix(other.matrix.dot(self.matrix), other.matrix.dot(self.offset) + other.offset, other.divisor)
+
+    def run(self, block):
+        channels = block.T.astype(np.float64)
+        out = np.empty_like(block)
+        for c in range(3):
+            m = self.matrix[c]
+            total = channels[0] * m[0]
+            total += channels[1] * m[1]
+            total += channels[2] * m[2]
+            if self.offset[c]:
+                total += self.offset[c]
+            if self.divisor != 1:
+                total /= self.divisor
+            np.trunc(total, total)
+            out[:, c] = np.clip(total, 0, 255)
+        return out
+
+
+class PixelFunction(object):
+    """A step which calls an rgbFunction like those of 6_3_generalTransform.py (a function from
+    a Pixel to a new Pixel), once for every different colour instead of once for every pixel"""
+    def __init__(self, rgbFunction):
+        self.rgbFunction = rgbFunction
+        self.cache = {}
+
+    def run(self, block):
+        keys = (block[:, 0].astype(np.int32) << 16) | (block[:, 1].astype(np.int32) << 8) | block[:, 2]
+        colours, inverse = np.unique(keys, return_inverse=True)
+        newColours = np.empty((len(colours), 3), np.uint8)
+        for i, key in enumerate(colours.tolist()):
+            if key not in self.cache:
+                p = self.rgbFunction(Pixel(key >> 16, (key >> 8) & 255, key & 255))
+                self.cache[key] = [min(max(int(p[c]), 0), 255) for c in range(3)]
+            newColours[i] = self.cache[key]
+        return newColours[inverse.reshape(-1)]
+
+
+def negative():
+    """255 - each channel, like negativePixel"""
+    return Lut(lambda v: 255 - v)
+
+def exposure(factor):
+    """Each channel times factor, cut off at 255, like incExposure (and decExposure with 1 / factor)"""
+    return Lut(lambda v: v * factor)
+
+def autoExposure(image, q=99, target=255):
+    """An exposure step with the factor that brings the q-th percentile of the brightness of the
+    image (see AbstractImage.percentile) to target, instead of a factor chosen by hand"""
+    if not isinstance(image, AbstractImage):
+        image = AbstractImage.from_array(np.asarray(image, np.uint8))
+    return exposure(target / float(max(image.percentile(q), 1)))
+
+def grayscale():
+    """The average of the three channels in every channel, like grayPixel (the sum // 3)"""
+    return Matrix([[1, 1, 1]] * 3, divisor=3)
+
+def sepia():
+    """The sepia tone of sepiaPixel"""
+    return Matrix([[0.393, 0.769, 0.189],
+                   [0.349, 0.686, 0.168],
+                   [0.272, 0.534, 0.131]])
+
+
+class Pipeline(object):
+    """A list of steps (Lut, Matrix or PixelFunction) which are done one after the other"""
+    def __init__(self, *steps):
+        self.steps = list(steps)
+        self._stages = None
+
+    def then(self, step):
+        """Return a new Pipeline with the step added to the end"""
+        return Pipeline(*(self.steps + [step]))
+
+    def compile(self):
+        """Return the list of stages after joining the steps that can be joined"""
+        if self._stages is None:
+            stages = []
+            for step in self.steps:
+                last = stages[-1] if stages else None
+                if isinstance(step, Lut) and isinstance(last, Lut):
+                    stages[-1] = last.then(step)
+                elif isinstance(step, Matrix) and isinstance(last, Matrix) and last.joinsExactly(step):
+                    stages[-1] = last.then(step)
+                else:
+                    stages.append(step)
+            self._stages = stages
+        return self._stages
+
+    def apply_array(self, pixels, out=None):
+        """Return the height x width x 3 uint8 array after every step (written into out if given).
+        pixels and out can be views in any layout, like a rotated image or some columns of a bigger array."""
+        stages = self.compile()
+        if out is None:
+            out = np.empty(pixels.shape, np.uint8)
+        height, width = pixels.shape[:2]
+        rows = max(1, BLOCK // max(width, 1))
+        for top in range(0, height, rows):
+            #reshape only copies the block if its rows are not one after the other in memory
+            block = pixels[top:top + rows].reshape(-1, 3)
+            for stage in stages:
+                block = stage.run(block)
+            out[top:top + rows] = block.reshape(-1, width, 3)
+        return out
+
+    def apply(self, image):
+        """Return a new image after every step.  The image can also be a uint8 array."""
+        if isinstance(image, AbstractImage):
+            return EmptyImage.from_array(self.apply_array(image.to_array()))
+        return self.apply_array(np.asarray(image, np.uint8))
+
+    __call__ = apply
+
+
+if __name__ == "__main__":
+    #sepia, then exposure, then negative, one Python call per pixel per step against the pipeline
+    import time
+    image = FileImage("apple.gif")
+
+    def sepiaPixel(p):
+        r, g, b = p.getRed(), p.getGreen(), p.getBlue()
+        return Pixel(r * 0.393 + g * 0.769 + b * 0.189, r * 0.349 + g * 0.686 + b * 0.168, r * 0.272 + g * 0.534 + b * 0.131)
+
+    def exposurePixel(p):
+        return Pixel(min(int(p.getRed() * 1.5), 255), min(int(p.getGreen() * 1.5), 255), min(int(p.getBlue() * 1.5), 255))
+
+    def negativePixel(p):
+        return Pixel(255 - p.getRed(), 255 - p.getGreen(), 255 - p.getBlue())
+
+    start = time.perf_counter()
+    loopimage = image
+    for rgbFunction in (sepiaPixel, exposurePixel, negativePixel):
+        newim = EmptyImage(loopimage.getWidth(), loopimage.getHeight())
+        for row in range(loopimage.getHeight()):
+            for col in range(loopimage.getWidth()):
+                newim.setPixel(col, row, rgbFunction(loopimage.getPixel(col, row)))
+        loopimage = newim
+    loop = time.perf_counter() - start
+
+    p = Pipeline(sepia(), exposure(1.5), negative())
+    start = time.perf_counter()
+    newimage = p.apply(image)
+    fused = time.perf_counter() - start
+    difference = np.abs(newimage.to_array().astype(int) - loopimage.to_array()).max()
+    print("per pixel: %.3fs  pipeline: %.4fs  (%d stages, largest difference %d)" % (loop, fused, len(p.compile()), difference))
+
+    #views which are not one row after another in memory give the same result as a copy
+    pixels = image.to_array()
+    expected = p.apply_array(pixels)
+    assert (p.apply_array(np.rot90(pixels, -1)) == np.rot90(expected, -1)).all()
+    assert (p.apply_array(pixels.transpose(1, 0, 2)) == expected.transpose(1, 0, 2)).all()
+    big = np.zeros((pixels.shape[0], pixels.shape[1] + 60, 3), np.uint8)
+    p.apply_array(pixels, big[:, :pixels.shape[1]])
+    assert (big[:, :pixels.shape[1]] == expected).all() and not big[:, pixels.shape[1]:].any()
+    print("rotated, transposed and column views: same as a copy")
+
+    #every colour, against grayPixel and sepiaPixel (worked out with numpy in the same order as Python)
+    colours = np.arange(1 << 24, dtype=np.uint32)
+    every = np.stack([colours >> 16, (colours >> 8) & 255, colours & 255], axis=1).astype(np.uint8).reshape(4096, 4096, 3)
+    r, g, b = [every[:, :, c].astype(np.float64) for c in range(3)]
+    gray = ((r + g + b) // 3).astype(np.uint8)
+    assert (Pipeline(grayscale()).apply_array(every) == gray[:, :, None]).all()
+    tone = np.stack([r * 0.393 + g * 0.769 + b * 0.189, r * 0.349 + g * 0.686 + b * 0.168, r * 0.272 + g * 0.534 + b * 0.131], axis=2)
+    assert (Pipeline(sepia()).apply_array(every) == np.clip(np.trunc(tone), 0, 255).astype(np.uint8)).all()
+    #grayscale then sepia is not joined, so it is the same as doing them one at a time
+    both = Pipeline(grayscale(), sepia())
+    assert len(both.compile()) == 2
+    assert (both.apply_array(every) == Pipeline(sepia()).apply_array(Pipeline(grayscale()).apply_array(every))).all()
+    print("grayscale and sepia: same as grayPixel and sepiaPixel for all 2^24 colours")
@@ -0,0 +1,76 @@
+'''
+Benchmark of scripted command line sessions on the Contact Book
+----------------------------------------------------------------
+Feeds 100k mixed commands (user lookups, AND/OR attribute searches, edits, max searches
+and invalid input) through command_line.main() on a book of each size, with all output
+thrown away, to measure the per-command overhead of high-rate scripted use.
+
+Usage (from anywhere):
+    python bench/bench_commands.py                          (writes commands_results.json)
+    python bench/bench_commands.py --sizes 1000 --compare old.json
+'''
+import io
+import os
+import sys
+import random
+import contextlib
+from harness import workload, main
+from fixtures import keys, contacts, tmpfile
+
+from cds_contactbook import ContactBook
+from cds_attributes import parse
+import command_line
+
+sys.setrecursionlimit(20000)
+
+COMMANDS = 100000
+
+def script(n, count=COMMANDS):
+    '''Returns the lines typed into a session which opens the bench book, runs count commands and exits'''
+    rand = random.Random(count)
+    lyst = keys(n)
+    lines = ['OPEN ' + tmpfile('commands' + str(n))]
+    for i in range(count):
+        pick = rand.random()
+        user = lyst[rand.randrange(n)]
+        if pick < 0.4: lines.append('SEARCH ' + user)
+        elif pick < 0.6: lines.append('SEARCH BY ATTRIBUTE AND [first name=first%d, last name=last%d]' % (rand.randrange(500), rand.randrange(2000)))
+        elif pick < 0.75: lines.append('SEARCH BY ATTRIBUTE OR [first name=first%d, email=%s@mail.com]' % (rand.randrange(500), user))
+        elif pick < 0.9: lines.append('EDIT %s [phone number=%d]' % (user, 90000000 + i))
+        elif pick < 0.95: lines.append('SEARCH MAX ATTRIBUTE phone number')
+        else: lines.append('SEARCH BY ATTRIBUTE AND [sex=X, birthday=%d]' % rand.randrange(10**7))
+    #don't save, then confirm exit
+    return '\n'.join(lines + ['EXIT', 'n', 'y']) + '\n'
+
+def book(n):
+    '''Saves the bench book of size n (once) and returns its name'''
+    name = tmpfile('commands' + str(n))
+    if not os.path.exists(name + '.txt'):
+        newbook = ContactBook(name)
+        for username, data in contacts(n): newbook.adduser(data, username)
+        newbook.save(newfile=True)
+    return name
+
+@workload('CLI', 'mixed', ops=lambda n: COMMANDS)
+def _(n):
+    book(n)
+    lines = script(n)
+    def run():
+        stdin = sys.stdin
+        sys.stdin = io.StringIO(lines)
+        try:
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull): command_line.main()
+        finally: sys.stdin = stdin
+    return run
+
+@workload('CLI', 'parse', ops=lambda n: COMMANDS)
+def _(n):
+    '''Just the attribute parsing and validation done for every search and edit'''
+    rand = random.Random(n)
+    strings = ['[first name=first%d, sex=%s, phone number=%d, birthday=%02d%02d19%02d]' % (rand.randrange(500), 'MF'[i % 2], 80000000 + i, rand.randrange(1, 29), rand.randrange(1, 13), rand.randrange(100)) for i in range(COMMANDS)]
+    def run():
+        for string in strings: parse(string, date_added=True)
+    return run
+
+if __name__ == '__main__':
+    sys.exit(main('commands', sizes=(10**3, 10**4)))
@@ -0,0 +1,450 @@
+'''
+Benchmarks for every ds_* structure (and the ContactBook) in the CEP Final Project
+-----------------------------------------------------------------------------------
+Each structure runs the same workloads as a built-in baseline (list, dict, set,
+or a bisect-sorted list for the trees), so the complexities claimed in the
+docstrings can be checked against real numbers across sizes from 10^3 to 10^6.
+
+Usage (from anywhere):
+    python bench/bench_structures.py                          (all sizes, writes structures_results.json)
+    python bench/bench_structures.py --sizes 1000 10000 --only AVLBST HashTable
+    python bench/bench_structures.py --compare old.json       (exits with 1 on regressions)
+
+Slow structures are skipped at sizes projected to go over --budget seconds,
+and structures that crash at a size have the error recorded in the JSON.
+'''
+import os
+import sys
+import bisect
+from harness import workload, main
+from fixtures import keys, misses, tmpfile, contacts, query
+
+from ds_dyarray import DyArray
+from ds_hashtable import HashTable
+from ds_set import Set
+from ds_avltree import AVLBST
+from ds_splaytree import SplayBST
+from cds_contactbook import ContactBook
+from cds_snapshot import snapshot, ContactSnapshot
+
+#the trees and the cuckoo hash table are recursive
+sys.setrecursionlimit(20000)
+
+#front insert/remove are O(n) each, so only this many are timed per size
+SHIFTS = 1000
+
+#---LIST BASELINE---
+@workload('list', 'append')
+def _(n):
+    def run():
+        lyst = []
+        for i in range(n): lyst.append(i)
+    return run
+
+@workload('list', 'index')
+def _(n):
+    lyst = list(range(n))
+    def run():
+        for i in range(n): lyst[i]
+    return run
+
+@workload('list', 'iterate')
+def _(n):
+    lyst = list(range(n))
+    def run():
+        for i in lyst: pass
+    return run
+
+@workload('list', 'insert_front', ops=lambda n: SHIFTS)
+def _(n):
+    lyst = list(range(n))
+    def run():
+        for i in range(SHIFTS): lyst.insert(0, i)
+    return run
+
+@workload('list', 'remove_front', ops=lambda n: SHIFTS)
+def _(n):
+    lyst = list(range(n + SHIFTS))
+    def run():
+        for i in range(SHIFTS): lyst.pop(0)
+    return run
+
+#---DYARRAY---
+@workload('DyArray', 'append', compare='list')
+def _(n):
+    def run():
+        array = DyArray(0)
+        for i in range(n): array.append(i)
+    return run
+
+@workload('DyArray', 'index', compare='list')
+def _(n):
+    array = DyArray(0, iterator=list(range(n)))
+    def run():
+        for i in range(n): array[i]
+    return run
+
+@workload('DyArray', 'iterate', compare='list')
+def _(n):
+    array = DyArray(0, iterator=list(range(n)))
+    def run():
+        for i in array: pass
+    return run
+
+@workload('DyArray', 'insert_front', compare='list', ops=lambda n: SHIFTS)
+def _(n):
+    array = DyArray(0, iterator=list(range(n)))
+    def run():
+        for i in range(SHIFTS): array.insert(0, i)
+    return run
+
+@workload('DyArray', 'remove_front', compare='list', ops=lambda n: SHIFTS)
+def _(n):
+    array = DyArray(0, iterator=list(range(n + SHIFTS)))
+    def run():
+        for i in range(SHIFTS): array.remove(0)
+    return run
+
+#---DICT BASELINE---
+@workload('dict', 'insert')
+def _(n):
+    lyst = keys(n)
+    def run():
+        table = {}
+        for key in lyst: table[key] = None
+    return run
+
+@workload('dict', 'lookup')
+def _(n):
+    lyst = keys(n)
+    table = dict.fromkeys(lyst)
+    def run():
+        for key in lyst: table.get(key)
+    return run
+
+@workload('dict', 'miss')
+def _(n):
+    table, lyst = dict.fromkeys(keys(n)), misses(n)
+    def run():
+        for key in lyst: table.get(key)
+    return run
+
+@workload('dict', 'delete')
+def _(n):
+    lyst = keys(n)
+    table = dict.fromkeys(lyst)
+    def run():
+        for key in lyst: del table[key]
+    return run
+
+@workload('dict', 'iterate')
+def _(n):
+    table = dict.fromkeys(keys(n))
+    def run():
+        for item in table.items(): pass
+    return run
+
+#---HASHTABLE---
+def _table(n):
+    table = HashTable()
+    for key in keys(n): table[key] = None
+    return table
+
+@workload('HashTable', 'insert', compare='dict')
+def _(n):
+    lyst = keys(n)
+    def run():
+        table = HashTable()
+        for key in lyst: table[key] = None
+    return run
+
+@workload('HashTable', 'lookup', compare='dict')
+def _(n):
+    table, lyst = _table(n), keys(n)
+    def run():
+        for key in lyst: table[key]
+    return run
+
+@workload('HashTable', 'miss', compare='dict')
+def _(n):
+    table, lyst = _table(n), misses(n)
+    def run():
+        for key in lyst: table[key]
+    return run
+
+@workload('HashTable', 'delete', compare='dict')
+def _(n):
+    table, lyst = _table(n), keys(n)
+    def run():
+        for key in lyst: del table[key]
+    return run
+
+@workload('HashTable', 'iterate', compare='dict')
+def _(n):
+    table = _table(n)
+    def run():
+        for item in table: pass
+    return run
+
+#---SET BASELINE---
+@workload('set', 'insert')
+def _(n):
+    lyst = keys(n)
+    def run():
+        new = set()
+        for key in lyst: new.add(key)
+    return run
+
+@workload('set', 'lookup')
+def _(n):
+    lyst = keys(n)
+    new = set(lyst)
+    def run():
+        for key in lyst: key in new
+    return run
+
+@workload('set', 'union')
+def _(n):
+    a, b = set(keys(n)[::2]), set(keys(n)[n // 4:])
+    def run(): a | b
+    return run
+
+@workload('set', 'intersect')
+def _(n):
+    a, b = set(keys(n)[::2]), set(keys(n)[n // 4:])
+    def run(): a & b
+    return run
+
+@workload('set', 'delete')
+def _(n):
+    lyst = keys(n)
+    new = set(lyst)
+    def run():
+        for key in lyst: new.discard(key)
+    return run
+
+#---SET---
+@workload('Set', 'insert', compare='set')
+def _(n):
+    lyst = keys(n)
+    def run():
+        new = Set()
+        for key in lyst: new.add(key)
+    return run
+
+@workload('Set', 'lookup', compare='set')
+def _(n):
+    lyst = keys(n)
+    new = Set(lyst)
+    def run():
+        for key in lyst: key in new
+    return run
+
+@workload('Set', 'union', compare='set')
+def _(n):
+    a, b = Set(keys(n)[::2]), Set(keys(n)[n // 4:])
+    def run(): a.union(b)
+    return run
+
+@workload('Set', 'intersect', compare='set')
+def _(n):
+    a, b = Set(keys(n)[::2]), Set(keys(n)[n // 4:])
+    def run(): a.intersect(b)
+    return run
+
+@workload('Set', 'delete', compare='set')
+def _(n):
+    lyst = keys(n)
+    new = Set(lyst)
+    def run():
+        for key in lyst: new.delete(key)
+    return run
+
+#---BISECT BASELINE (sorted list standing in for the trees)---
+@workload('bisect', 'insert')
+def _(n):
+    lyst = keys(n)
+    def run():
+        ordered = []
+        for key in lyst: bisect.insort(ordered, key)
+    return run
+
+@workload('bisect', 'lookup')
+def _(n):
+    lyst = keys(n)
+    ordered = sorted(lyst)
+    def run():
+        for key in lyst: ordered[bisect.bisect_left(ordered, key)]
+    return run
+
+@workload('bisect', 'iterate')
+def _(n):
+    ordered = sorted(keys(n))
+    def run():
+        for key in ordered: pass
+    return run
+
+@workload('bisect', 'delete')
+def _(n):
+    lyst = keys(n)
+    ordered = sorted(lyst)
+    def run():
+        for key in lyst: del ordered[bisect.bisect_left(ordered, key)]
+    return run
+
+#---TREES---
+def _treeworkloads(name, cls):
+    '''Registers the same insert/lookup/iterate/delete workloads for both trees'''
+    def _tree(n):
+        tree = cls()
+        for key in keys(n): tree.add(key, None)
+        return tree
+
+    @workload(name, 'insert', compare='bisect')
+    def _(n):
+        lyst = keys(n)
+        def run():
+            tree = cls()
+            for key in lyst: tree.add(key, None)
+        return run
+
+    @workload(name, 'lookup', compare='bisect')
+    def _(n):
+        tree, lyst = _tree(n), keys(n)
+        def run():
+            for key in lyst: tree.search(key)
+        return run
+
+    @workload(name, 'iterate', compare='bisect')
+    def _(n):
+        tree = _tree(n)
+        def run():
+            for item in tree: pass
+        return run
+
+    @workload(name, 'delete', compare='bisect')
+    def _(n):
+        tree, lyst = _tree(n), keys(n)
+        def run():
+            for key in lyst: tree.delete(key)
+        return run
+
+_treeworkloads('AVLBST', AVLBST)
+_treeworkloads('SplayBST', SplayBST)
+
+#---CONTACT BOOK---
+def _book(n, name):
+    book = ContactBook(tmpfile(name + str(n)))
+    for username, data in contacts(n): book.adduser(data, username)
+    return book
+
+@workload('ContactBook', 'insert')
+def _(n):
+    data = contacts(n)
+    def run():
+        book = ContactBook(tmpfile('insert'))
+        for username, attrs in data: book.adduser(attrs, username)
+    return run
+
+@workload('ContactBook', 'lookup')
+def _(n):
+    book, lyst = _book(n, 'lookup'), keys(n)
+    def run():
+        for username in lyst: book.usersearch(username)
+    return run
+
+@workload('ContactBook', 'andsearch', ops=lambda n: 1000)
+def _(n):
+    book = _book(n, 'andsearch')
+    queries = [query(fname='first' + str(i % 500), sex=i % 2) for i in range(1000)]
+    def run():
+        for data in queries: book.andsearch(data)
+    return run
+
+@workload('ContactBook', 'orsearch', ops=lambda n: 1000)
+def _(n):
+    book = _book(n, 'orsearch')
+    queries = [query(fname='first' + str(i % 500), lname='last' + str(i % 2000)) for i in range(1000)]
+    def run():
+        for data in queries: book.orsearch(data)
+    return run
+
+@workload('ContactBook', 'delete')
+def _(n):
+    book, lyst = _book(n, 'delete'), keys(n)
+    def run():
+        for username in lyst: book.deleteuser(username)
+    return run
+
+@workload('ContactBook', 'save')
+def _(n):
+    book = _book(n, 'save')
+    if not os.path.exists(book.filename): book.save(newfile=True)
+    def run():
+        book.save()
+    return run
+
+@workload('ContactBook', 'build')
+def _(n):
+    name = tmpfile('build' + str(n))
+    if not os.path.exists(name + '.txt'): _book(n, 'build').save(newfile=True)
+    def run():
+        book = ContactBook(name)
+        if book.build() != 1: raise ValueError('Book failed to build')
+        book.loadall()
+    return run
+
+@workload('ContactBook', 'open_search', ops=lambda n: 1)
+def _(n):
+    '''OPEN followed by a single SEARCH <username>, which only needs the user tree'''
+    name = tmpfile('build' + str(n))
+    if not os.path.exists(name + '.txt'): _book(n, 'build').save(newfile=True)
+    username = keys(n)[n // 2]
+    def run():
+        book = ContactBook(name)
+        if book.build() != 1: raise ValueError('Book failed to build')
+        book.usersearch(username)
+    return run
+
+#---CONTACT SNAPSHOT---
+class _Users:
+    '''Stands in for a ContactBook when writing snapshots, since snapshot() only reads the user tree'''
+    __slots__ = ('users',)
+    def __init__(self, users): self.users = users
+
+def _snapshot(n):
+    name = tmpfile('snapshot' + str(n))
+    if not os.path.exists(name + '.snap'): snapshot(_Users(contacts(n)), name)
+    return name
+
+@workload('ContactSnapshot', 'write')
+def _(n):
+    users = _Users(contacts(n))
+    def run(): snapshot(users, tmpfile('write' + str(n)))
+    return run
+
+@workload('ContactSnapshot', 'open_search', ops=lambda n: 1)
+def _(n):
+    '''Same as ContactBook.open_search'''
+    name, username = _snapshot(n), keys(n)[n // 2]
+    def run():
+        with ContactSnapshot(name) as snap: snap.usersearch(username)
+    return run
+
+@workload('ContactSnapshot', 'lookup')
+def _(n):
+    snap, lyst = ContactSnapshot(_snapshot(n)), keys(n)
+    def run():
+        for username in lyst: snap.usersearch(username)
+    return run
+
+@workload('ContactSnapshot', 'andsearch', ops=lambda n: 1000)
+def _(n):
+    snap = ContactSnapshot(_snapshot(n))
+    queries = [query(fname='first' + str(i % 500), sex=i % 2) for i in range(1000)]
+    def run():
+        for data in queries: snap.andsearch(data)
+    return run
+
+if __name__ == '__main__':
+    sys.exit(main('structures'))
@@ -0,0 +1,66 @@
+'''
+Shared test data for the bench scripts
+----------------------------------------
+Keys and contacts are generated from a fixed seed, so every run (and every commit)
+times exactly the same data.
+'''
+import os
+import stat
+import atexit
+import random
+import shutil
+import tempfile
+#sets up the import path for the ds_* and cds_* modules
+import harness
+
+from ds_dyarray import DyArray
+from cds_date import Date
+
+_keycache = {}
+def keys(n):
+    '''Returns n unique string keys in a fixed random order (same order every run)'''
+    if n not in _keycache:
+        lyst = ['key' + str(i) for i in range(n)]
+        random.Random(n).shuffle(lyst)
+        _keycache[n] = lyst
+    return _keycache[n]
+
+def misses(n):
+    '''Returns n keys that are never inserted'''
+    return ['miss' + str(i) for i in range(n)]
+
+_tmpdir = None
+def tmpfile(name):
+    '''Returns a path (without .txt) in a temp folder that is removed on exit'''
+    global _tmpdir
+    if _tmpdir is None:
+        _tmpdir = tempfile.mkdtemp(prefix='cepbench')
+        #saved books are write-protected, so permissions are restored before removing
+        def cleanup():
+            for file in os.listdir(_tmpdir): os.chmod(os.path.join(_tmpdir, file), stat.S_IWUSR | stat.S_IREAD)
+            shutil.rmtree(_tmpdir, ignore_errors=True)
+        atexit.register(cleanup)
+    return os.path.join(_tmpdir, name)
+
+def contacts(n):
+    '''Returns n (username, attribute DyArray) pairs with realistic value repetition'''
+    rand = random.Random(n)
+    data = []
+    for i, username in enumerate(keys(n)):
+        attrs = DyArray(7, capacity=7)
+        attrs[0] = 'first' + str(rand.randrange(500))
+        attrs[1] = 'last' + str(rand.randrange(2000))
+        attrs[2] = rand.randrange(2)
+        attrs[3] = 80000000 + i
+        attrs[4] = username + '@mail.com'
+        attrs[5] = Date('%02d%02d%04d' % (rand.randrange(1, 29), rand.randrange(1, 13), rand.randrange(1950, 2010)))
+        attrs[6] = Date('%02d%02d%04d' % (rand.randrange(1, 29), rand.randrange(1, 13), rand.randrange(2015, 2019)))
+        data.append((username, attrs))
+    return data
+
+def query(**given):
+    '''Returns the 7-slot attribute DyArray the ContactBook searches with'''
+    data = DyArray(7, capacity=7)
+    for i, name in enumerate(('fname', 'lname', 'sex', 'phone', 'email', 'birthday', 'date')):
+        if name in given: data[i] = given[name]
+    return data
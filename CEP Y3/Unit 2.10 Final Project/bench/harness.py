@@ -0,0 +1,173 @@
+import os
+import sys
+import json
+import time
+import platform
+import datetime
+import subprocess
+
+#lets the bench scripts import the ds_* and cds_* modules sitting one folder up
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path: sys.path.insert(0, ROOT)
+
+class Workload:
+    '''
+    A single benchmark workload for the CEP Final Project bench suite
+    -------------------------------------------------------------------
+    The setup function is given the size n and returns a zero-argument callable,
+    so building the structure is never counted in the timing of the workload itself.
+    The callable is timed, and the number of operations it does (n by default) is used
+    to work out the time taken per operation.
+
+    The built-in baselines (list, dict, set, bisect) are registered as workloads too,
+    and any workload naming one of them in 'compare' gets a ratio against the baseline
+    workload of the same name and size in the results.
+    '''
+    __slots__ = ('structure', 'name', 'setup', 'compare', 'ops')
+
+    def __init__(self, structure, name, setup, compare=None, ops=None):
+        '''Initializes structure name, workload name, setup function, baseline name and operation counter'''
+        self.structure, self.name, self.setup, self.compare, self.ops = structure, name, setup, compare, ops
+
+    def __str__(self):
+        '''Returns string of structure.workload'''
+        return self.structure + '.' + self.name
+
+    __repr__ = __str__
+
+REGISTRY = []
+
+def workload(structure, name, compare=None, ops=None):
+    '''
+    Decorator that registers a setup function as a workload
+
+    E.g:
+    >> @workload('HashTable', 'insert', compare='dict')
+    >> def _(n):
+    >>     ...
+    >>     return run
+    '''
+    def register(setup):
+        REGISTRY.append(Workload(structure, name, setup, compare, ops))
+        return setup
+    return register
+
+def timed(func):
+    '''Returns the wall time taken to run func'''
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def run(workloads, sizes, budget=60.0, repeat=1, log=print):
+    '''
+    Runs every workload across every size and returns a list of result dicts
+
+    Sizes are run from smallest to largest. If the time taken at the last size,
+    scaled up linearly to the next size, goes over the budget (in seconds), the
+    remaining sizes of that workload are skipped and marked as such instead of
+    hanging the whole suite on one slow structure.
+
+    Exceptions raised by a workload are recorded in the result instead of
+    stopping the run, since some structures fail outright at larger sizes.
+    '''
+    results = []
+    for wl in workloads:
+        last = None
+        for n in sorted(sizes):
+            result = {'structure': wl.structure, 'workload': wl.name, 'size': n}
+            if wl.compare is not None: result['compare'] = wl.compare
+            #skip if the projected time would go over budget
+            if last is not None and last[1] * (n / last[0]) > budget:
+                result['skipped'] = 'projected over budget of ' + str(budget) + 's'
+                results.append(result)
+                log('%-40s n=%-8d skipped' % (wl, n))
+                continue
+            best = None
+            try:
+                #setup is redone for every repeat since most workloads change the structure
+                for i in range(repeat):
+                    taken = timed(wl.setup(n))
+                    if best is None or taken < best: best = taken
+            except Exception as error:
+                result['error'] = type(error).__name__ + ': ' + str(error)[:200]
+                results.append(result)
+                log('%-40s n=%-8d %s' % (wl, n, result['error']))
+                #no point in trying a larger size after failing
+                last = (n, float('inf'))
+                continue
+            ops = wl.ops(n) if wl.ops else n
+            result['seconds'], result['ops'] = best, ops
+            result['ns_per_op'] = best / ops * 1e9 if ops else None
+            results.append(result)
+            last = (n, best)
+            log('%-40s n=%-8d %10.4fs %12.1f ns/op' % (wl, n, best, result['ns_per_op'] or 0))
+    #ratio against the built-in baselines
+    times = {(r['structure'], r['workload'], r['size']): r['seconds'] for r in results if 'seconds' in r}
+    for r in results:
+        base = times.get((r.get('compare'), r['workload'], r['size']))
+        if 'seconds' in r and base: r['vs_baseline'] = r['seconds'] / base
+    return results
+
+def commit():
+    '''Returns the current git commit hash (or None outside of a git checkout)'''
+    try: return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError): return None
+
+def save(results, filename, name='bench'):
+    '''Saves results as JSON along with enough metadata to compare between commits'''
+    data = {'suite': name,
+            'commit': commit(),
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'results': results}
+    if filename == '-': json.dump(data, sys.stdout, indent=1)
+    else:
+        with open(filename, 'w') as file: json.dump(data, file, indent=1)
+    return data
+
+def compare(oldfile, newfile, threshold=1.25, log=print):
+    '''
+    Compares two JSON result files and returns a list of regressions
+    A regression is any workload and size that got slower by more than the threshold ratio
+    '''
+    with open(oldfile) as file: old = json.load(file)
+    with open(newfile) as file: new = json.load(file)
+    oldtimes = {(r['structure'], r['workload'], r['size']): r['seconds'] for r in old['results'] if 'seconds' in r}
+    regressions = []
+    for r in new['results']:
+        key = (r['structure'], r['workload'], r['size'])
+        if 'seconds' in r and key in oldtimes and oldtimes[key] > 0:
+            ratio = r['seconds'] / oldtimes[key]
+            if ratio > threshold:
+                regressions.append((key, ratio))
+                log('REGRESSION %-40s n=%-8d %.2fx slower' % (key[0] + '.' + key[1], key[2], ratio))
+            elif ratio < 1 / threshold:
+                log('improved   %-40s n=%-8d %.2fx faster' % (key[0] + '.' + key[1], key[2], 1 / ratio))
+    return regressions
+
+def main(name, argv=None, sizes=(10**3, 10**4, 10**5, 10**6)):
+    '''Shared command line for the bench scripts: run (and optionally compare) the registered workloads'''
+    import argparse
+    parser = argparse.ArgumentParser(description='Runs the ' + name + ' benchmarks and writes JSON results')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(sizes), help='problem sizes (default: ' + ' '.join(map(str, sizes)) + ')')
+    parser.add_argument('--only', nargs='+', default=None, help='only run structures (or structure.workload) with these names, plus their baselines')
+    parser.add_argument('--budget', type=float, default=60.0, help='skip sizes projected to take longer than this many seconds')
+    parser.add_argument('--repeat', type=int, default=1, help='runs per size, the best time is kept')
+    parser.add_argument('--output', default=name + '_results.json', help='JSON file to write results to (- for stdout)')
+    parser.add_argument('--compare', default=None, help='previous JSON results to check for regressions against')
+    parser.add_argument('--threshold', type=float, default=1.25, help='slowdown ratio counted as a regression')
+    args = parser.parse_args(argv)
+
+    workloads = REGISTRY
+    if args.only:
+        chosen = [wl for wl in REGISTRY if wl.structure in args.only or str(wl) in args.only]
+        baselines = set((wl.compare, wl.name) for wl in chosen)
+        workloads = [wl for wl in REGISTRY if wl in chosen or (wl.structure, wl.name) in baselines]
+    #logs go to stderr when results go to stdout
+    log = print if args.output != '-' else (lambda msg: print(msg, file=sys.stderr))
+    results = run(workloads, args.sizes, args.budget, args.repeat, log)
+    save(results, args.output, name)
+    if args.compare and args.output != '-':
+        return 1 if compare(args.compare, args.output, args.threshold, log) else 0
+    return 0
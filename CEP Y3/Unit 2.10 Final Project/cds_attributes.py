@@ -0,0 +1,107 @@
+from cds_date import Date
+from ds_dyarray import DyArray
+import re
+
+#compiled once instead of on every command
+EMAIL = re.compile(r'[^@]+@[^@]+\.[^@]+')
+SEXES = {'M': 0, 'F': 1}
+SIMSEXES = dict([(prefix, 0) for prefix in ('M', 'MA', 'MAL', 'MALE')] + [(prefix, 1) for prefix in ('F', 'FE', 'FEM', 'FEMA', 'FEMAL', 'FEMALE')])
+
+#---PARSERS---
+#each takes the string given by the user and the attribute name (for error messages),
+#and returns the value to store, or raises ValueError with the message to show
+def _str(value, name):
+    return value
+
+def _int(value, name):
+    try: return int(value)
+    except ValueError: raise ValueError('Invalid data format: Variable ' + name + ' should be an integer')
+
+def _date(value, name):
+    if len(value) != 8: raise ValueError('Invalid data format: Variable ' + name + ' must be in valid date format (DDMMYYYY)')
+    if not value.isdigit(): raise ValueError('Invalid data format: Variable ' + name + ' must be in numerical form')
+    if int(value[-4:]) >= 2020: raise ValueError('Invalid data format: Date comes from the future!!!')
+    #given as a string so days starting with 0 keep their leading 0
+    return Date(value)
+
+def _sex(value, name):
+    if value.upper() in SEXES: return SEXES[value.upper()]
+    raise ValueError('Invalid data format: Variable ' + name + ' should be "M" or "F"')
+
+def _email(value, name):
+    if EMAIL.match(value): return value
+    raise ValueError('Invalid data format: Variable ' + name + ' should have a valid email format')
+
+def _simsex(value, name):
+    #anything that is not the start of male or female is ignored
+    return SIMSEXES.get(value.upper())
+
+class Attribute:
+    '''
+    A single user attribute of the Contact Book
+    --------------------------------------------
+    Holds everything the ContactBook and command line need to know about an attribute, so they
+    no longer build dicts of trees and type codes on every call:
+
+    * index: position in the attribute DyArray of a user
+    * name: name used in commands (e.g. 'first name')
+    * tree: name of the ContactBook tree storing it (e.g. 'fname')
+    * kind: type of value stored ('str', 'int' or 'date')
+    * prompt: question asked when adding a user (None if it is not asked)
+    * parser: converts a string from the user into the value (raises ValueError if invalid)
+    * simparser: same as parser, but for similarity search (None return means ignore)
+    '''
+    __slots__ = ('index', 'name', 'tree', 'kind', 'prompt', 'parser', 'simparser')
+
+    def __init__(self, index, name, tree, kind, prompt, parser, simparser):
+        self.index, self.name, self.tree, self.kind, self.prompt, self.parser, self.simparser = index, name, tree, kind, prompt, parser, simparser
+
+    def __str__(self):
+        return self.name
+
+    __repr__ = __str__
+
+    def parse(self, value, sim=False):
+        '''Returns value converted by the parser (or simparser if sim)'''
+        return self.simparser(value, self.name) if sim else self.parser(value, self.name)
+
+#in the same order as the attribute DyArray
+ATTRIBUTES = (Attribute(0, 'first name', 'fname', 'str', 'First Name? ', _str, _str),
+              Attribute(1, 'last name', 'lname', 'str', 'Last Name? ', _str, _str),
+              Attribute(2, 'sex', 'sex', 'int', 'Sex? [M/F] ', _sex, _simsex),
+              Attribute(3, 'phone number', 'phone', 'int', 'Phone Number? ', _int, _int),
+              Attribute(4, 'email', 'email', 'str', 'Email? ', _email, _str),
+              Attribute(5, 'birthday', 'birthday', 'date', 'Birthday? [DDMMYYYY] ', _date, _str),
+              Attribute(6, 'date added', 'date', 'date', None, _date, _str))
+BYNAME = {attribute.name: attribute for attribute in ATTRIBUTES}
+#date added cannot be edited
+EDITABLE = ATTRIBUTES[:6]
+#attributes which can be averaged
+AVERAGES = ('sex', 'phone number')
+
+def parse(string, sim=False, date_added=False, username=False):
+    '''
+    Parses a string of [<attribute>=value, <attribute>=value, <attribute>=value ...] into
+    (attribute DyArray, new username), raising ValueError with the message to show if it is invalid
+
+    'date added' is only accepted if date_added is enabled, and 'username' is only read if username is enabled
+    (otherwise it is ignored). With sim enabled, values are parsed for similarity search.
+
+    E.g:
+    >> print(parse('[first name=Tom, sex=M]'))
+    (['Tom', None, 0, None, None, None, None], None)
+    '''
+    string = string.strip()
+    if not (string.startswith('[') and string.endswith(']')): raise ValueError('Invalid data format: List of values not given')
+    data, newname = DyArray(7, capacity=7), None
+    for pair in string[1:-1].split(','):
+        pair = pair.split('=')
+        if len(pair) != 2: continue
+        name, value = pair[0].strip().lower(), pair[1].strip()
+        if name == 'username':
+            if username and not sim: newname = value
+            continue
+        attribute = BYNAME.get(name)
+        if attribute is None or (attribute.index == 6 and not date_added): raise ValueError('Invalid data: Attributes given are invalid')
+        data[attribute.index] = attribute.parse(value, sim)
+    return data, newname
@@ -5,6 +5,7 @@ from ds_treenode import AVLNode
 from ds_dyarray import DyArray
 from ds_set import Set
 from cds_date import Date
+import ds_stats
 
 #This file contains custom versions of the trees (AVL and Splay) with modifications and specific functions to the contact book
 
@@ -107,7 +108,8 @@ class Attribute_AVL(AVLBST):
                     root = createnode(lyst[0], root)
                     root = createnode(lyst[2], root)
             return root
-        if eval(lyststr, {'__builtins__':{}}): self.root = createnode(eval(lyststr, {'__builtins__':{}}))
+        with ds_stats.timer('treebuild.eval'): lyst = eval(lyststr, {'__builtins__':{}})
+        if lyst: self.root = createnode(lyst)
 
 class Attribute_Date_AVL(Attribute_AVL):
     def simsearch(self, string):
@@ -148,7 +150,8 @@ class Attribute_Date_AVL(Attribute_AVL):
                     root = createnode(lyst[0], root)
                     root = createnode(lyst[2], root)
             return root
-        if eval(lyststr, {'__builtins__':{}}): self.root = createnode(eval(lyststr, {'__builtins__':{}}))
+        with ds_stats.timer('treebuild.eval'): lyst = eval(lyststr, {'__builtins__':{}})
+        if lyst: self.root = createnode(lyst)
 
 class User_BST(SplayBST):
     def simsearch(self, string):
@@ -198,4 +201,5 @@ class User_BST(SplayBST):
                     root = createnode(lyst[0], root)
                     root = createnode(lyst[2], root)
             return root
-        if eval(lyststr, {'__builtins__':{}}): self.root = createnode(eval(lyststr, {'__builtins__':{}}))
+        with ds_stats.timer('treebuild.eval'): lyst = eval(lyststr, {'__builtins__':{}})
+        if lyst: self.root = createnode(lyst)
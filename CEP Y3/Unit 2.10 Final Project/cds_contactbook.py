@@ -1,11 +1,32 @@
 from cds_attributetrees import Attribute_AVL, Attribute_Date_AVL, User_BST
+from cds_attributes import ATTRIBUTES, BYNAME, EDITABLE, AVERAGES
 from cds_date import Date
 from ds_set import Set
 from ds_dyarray import DyArray
 from stat import S_IREAD, S_IRGRP, S_IROTH, S_IWUSR
 import itertools
+import ds_stats
 import os
 
+#order of the tree sections in a book file, and the tree class each one is built into
+SECTIONS = ('users', 'fname', 'lname', 'email', 'sex', 'phone', 'birthday', 'date')
+TREES = {'users': User_BST, 'fname': Attribute_AVL, 'lname': Attribute_AVL, 'email': Attribute_AVL, 'sex': Attribute_AVL,
+         'phone': Attribute_AVL, 'birthday': Attribute_Date_AVL, 'date': Attribute_Date_AVL}
+
+class BookCorrupted(ValueError):
+    '''Raised when a tree section of a book file cannot be built the first time it is used'''
+
+def _lazytree(name):
+    '''Property for a ContactBook tree that is only built from its section of the book file when first used'''
+    attr = '_' + name
+    def get(self):
+        if name in self._pending: self._load(name)
+        return getattr(self, attr)
+    def set(self, tree):
+        self._pending.pop(name, None)
+        setattr(self, attr, tree)
+    return property(get, set)
+
 class ContactBook:
     '''
     Contact Book ADT for CEP Final Project
@@ -35,14 +56,34 @@ class ContactBook:
     In addition, the tree supports saving to write-protected plaintext files,
     and building all user and attribute trees from said plaintext files
 
+    The file is split into sections (one per tree) with an offset table at the top:
+        <filename>
+        #SECTIONS users:<start>:<length> fname:<start>:<length> ... date:<start>:<length>
+        <users treestr>
+        <fname treestr>
+        ...
+    so build() only reads the offset table, and each tree is built from its own section the
+    first time it is used. A session that only runs SEARCH <username> never builds the attribute trees.
+    Older 9-line books without the offset table are still built all at once.
+
     The front-end command line interface can be found in command_line.py
     '''
-    __slots__ = ('filename','fname','lname','sex','phone','email','birthday','date','users')
+    __slots__ = ('filename','_fname','_lname','_sex','_phone','_email','_birthday','_date','_users','_pending','_source','_datastart')
+
+    #---LAZY TREES---
+    users = _lazytree('users')
+    fname = _lazytree('fname')
+    lname = _lazytree('lname')
+    email = _lazytree('email')
+    sex = _lazytree('sex')
+    phone = _lazytree('phone')
+    birthday = _lazytree('birthday')
+    date = _lazytree('date')
 
     def __init__(self, filename=None):
         '''Initializes all trees and filename'''
-        self.filename, self.users, self.fname, self.lname, self.email, self.sex, self.phone, self.birthday, self.date =  \
-        str(filename) + '.txt', User_BST(),Attribute_AVL(),Attribute_AVL(),Attribute_AVL(),Attribute_AVL(),Attribute_AVL(),Attribute_Date_AVL(),Attribute_Date_AVL()
+        self.filename, self._pending, self._source, self._datastart = str(filename) + '.txt', {}, None, 0
+        for name in SECTIONS: setattr(self, name, TREES[name]())
 
     def __str__(self):
         '''Returns string of user tree'''
@@ -54,13 +95,11 @@ class ContactBook:
 
     def adduser(self, data, username):
         '''Adds username and attribute data into all user and attribute trees'''
-        refdict = {0:self.fname, 1:self.lname, 2:self.sex, 3:self.phone, 4:self.email, 5:self.birthday, 6:self.date}
         #USER TREE ADDITION
         self.users.add(username, data)
         #ATTRIBUTE TREE ADDITION
-        for i in refdict.keys():
-            if data[i] != None: refdict[i].add(data[i], Set([username]))
-        del refdict
+        for attribute in ATTRIBUTES:
+            if data[attribute.index] != None: getattr(self, attribute.tree).add(data[attribute.index], Set([username]))
 
     def edituser(self, olduser, data, username=None):
         '''Edits any user's 8 attributes' values'''
@@ -77,81 +116,69 @@ class ContactBook:
             self.adduser(newdata, username)
         else:
             #if username is not changing
-            refdict2 = {0:self.fname, 1:self.lname, 2:self.sex, 3:self.phone, 4:self.email, 5:self.birthday}
-            for i in range(len(data)):
+            for attribute in EDITABLE:
+                i = attribute.index
                 #only data that has changed will be updated
                 if data[i] != None:
-                    tmp = newdata[i]
+                    tree, tmp = getattr(self, attribute.tree), newdata[i]
                     #updates entry in user tree
                     newdata[i] = data[i]
                     #removes old entry in attribute tree
-                    refdict2[i][tmp].delete(olduser)
+                    tree[tmp].delete(olduser)
                     #adds new entry in attribute tree
-                    refdict2[i].add(data[i], Set([olduser]))
-            del refdict2
+                    tree.add(data[i], Set([olduser]))
 
     def deleteuser(self, user):
         '''Removes all instance of user from all trees'''
-        refdict = {0:self.fname, 1:self.lname, 2:self.sex, 3:self.phone, 4:self.email, 5:self.birthday, 6:self.date}
         #store attribute data
         data = self.users[user]
         #delete from user tree
         self.users.delete(user)
-        for i in refdict.keys():
+        for attribute in ATTRIBUTES:
+            tree, value = getattr(self, attribute.tree), data[attribute.index]
             #delete from attribute tree
-            refdict[i][data[i]].delete(user)
+            tree[value].delete(user)
             #remove any empty sets
-            if len(refdict[i][data[i]]) == 0: refdict[i].delete(data[i])
-        del refdict
+            if len(tree[value]) == 0: tree.delete(value)
 
     def orsearch(self, data):
         '''OR search: Search for username sets based on given attribute data and finds the union'''
-        refdict = {0:self.fname, 1:self.lname, 2:self.sex, 3:self.phone, 4:self.email, 5:self.birthday, 6:self.date}
         baseset = Set()
-        for i in refdict.keys():
+        for attribute in ATTRIBUTES:
             #if data for that attribute is provided
-            if data[i] != None:
+            if data[attribute.index] != None:
                 #search for the corresponding username set
-                attributeset = refdict[i][data[i]]
+                attributeset = getattr(self, attribute.tree)[data[attribute.index]]
                 #union if there is a result
                 if attributeset != None: baseset = baseset.union(attributeset)
-        del refdict
         return baseset
 
     def andsearch(self, data):
         '''AND search: Search for username sets based on given attribute data and finds the intersection'''
-        refdict = {0:self.fname, 1:self.lname, 2:self.sex, 3:self.phone, 4:self.email, 5:self.birthday, 6:self.date}
-        for i in refdict.keys():
+        baseset = None
+        for attribute in ATTRIBUTES:
             #if data for that attribute is provided
-            if data[i] != None:
+            if data[attribute.index] != None:
                 #search for the corresponding username set
-                attributeset = refdict[i][data[i]]
+                attributeset = getattr(self, attribute.tree)[data[attribute.index]]
                 #intersect if there is a result
-                if attributeset != None:
-                    try: baseset = baseset.intersect(attributeset)
-                    except UnboundLocalError: baseset = attributeset.copy()
-        del refdict
-        try: return baseset
-        except NameError: return []
+                if attributeset != None: baseset = attributeset.copy() if baseset is None else baseset.intersect(attributeset)
+        return [] if baseset is None else baseset
 
     def attrsimsearch(self, data, ors=None):
         '''
         Similarity OR search (if ors is enabled): Search for all username sets based on string similarity to given data and finds the union
         Similarity AND search: Search for username sets based on given attribute data and finds the intersection
         '''
-        refdict = {0:self.fname, 1:self.lname, 2:self.sex, 3:self.phone, 4:self.email, 5:self.birthday, 6:self.date}
-        if ors: baseset = Set()
-        for i in refdict.keys():
-            if data[i] != None:
+        baseset = Set() if ors else None
+        for attribute in ATTRIBUTES:
+            if data[attribute.index] != None:
+                found = Set(list(itertools.chain.from_iterable(x.tolist() for x in getattr(self, attribute.tree).simsearch(data[attribute.index]))))
                 #union if OR search
-                if ors: baseset = baseset.union(Set(list(itertools.chain.from_iterable(x.tolist() for x in refdict[i].simsearch(data[i])))))
-                else:
-                    #intersect if AND search
-                    try: baseset = baseset.intersect(Set(list(itertools.chain.from_iterable(x.tolist() for x in refdict[i].simsearch(data[i])))))
-                    except UnboundLocalError: baseset = Set(list(itertools.chain.from_iterable(x.tolist() for x in refdict[i].simsearch(data[i]))))
-        del refdict
-        try: return baseset
-        except NameError: return []
+                if ors: baseset = baseset.union(found)
+                #intersect if AND search
+                else: baseset = found if baseset is None else baseset.intersect(found)
+        return [] if baseset is None else baseset
 
     def usersimsearch(self, user):
         '''Similarity username search: Search for all users with given string in their usernames'''
@@ -163,10 +190,8 @@ class ContactBook:
 
     def listbyattribute(self, attribute, reverse=False):
         '''Lists all users by any of the specified attributes'''
-        refdict3 = {'first name': self.fname, 'last name':self.lname, 'sex':self.sex, 'phone number':self.phone, 'email':self.email, 'birthday':self.birthday, 'date added':self.date}
-        users = list(refdict3[attribute]._inOrderReverseGen(refdict3[attribute].root)) if reverse else list(refdict3[attribute]._inOrderGen(refdict3[attribute].root))
-        del refdict3
-        return users
+        tree = getattr(self, BYNAME[attribute].tree)
+        return list(tree._inOrderReverseGen(tree.root)) if reverse else list(tree._inOrderGen(tree.root))
 
     def listbyusername(self, sorted=False, reverse=False):
         '''Lists all users by username (recently accessed by default)'''
@@ -175,28 +200,20 @@ class ContactBook:
 
     def min(self, attribute):
         '''Returns minimum value and corresponding user(s)'''
-        refdict3 = {'first name': self.fname, 'last name':self.lname, 'sex':self.sex, 'phone number':self.phone, 'email':self.email, 'birthday':self.birthday, 'date added':self.date}
-        if attribute in refdict3.keys(): min = refdict3[attribute].min()
+        if attribute in BYNAME: min = getattr(self, BYNAME[attribute].tree).min()
         else: min = None, None
-        del refdict3
         return (min.key, min.val)
 
     def max(self, attribute):
         '''Returns maximum value and corresponding user(s)'''
-        refdict3 = {'first name': self.fname, 'last name':self.lname, 'sex':self.sex, 'phone number':self.phone, 'email':self.email, 'birthday':self.birthday, 'date added':self.date}
-        if attribute in refdict3.keys(): max = refdict3[attribute].max()
+        if attribute in BYNAME: max = getattr(self, BYNAME[attribute].tree).max()
         else: max = None, None
-        del refdict3
         return (max.key, max.val)
 
     def avg(self, attribute):
         '''Returns average value'''
         #the phone number compatibility is just a dumb joke
-        refdict4 = {'sex':self.sex, 'phone number':self.phone}
-        if attribute in refdict4.keys():
-            value = refdict4[attribute].avg()
-            del refdict4
-            return value
+        if attribute in AVERAGES: return getattr(self, BYNAME[attribute].tree).avg()
         return None
 
     def today(self):
@@ -210,52 +227,110 @@ class ContactBook:
 
 
     def build(self):
-        '''Builds all trees from plaintext in file (this does use eval() but its uses are justified below)'''
-        with open(self.filename, 'r') as file:
-            data = file.read()
-            file.close()
-        refdict = {1: self.users, 2:self.fname, 3:self.lname, 4:self.email, 5:self.sex, 6:self.phone, 7:self.birthday, 8:self.date}
-        builddata = data.split('\n')
-        if len(builddata) == 9:
-            if builddata[0] == self.filename:
-                for i in range(len(builddata)):
-                    if i != 0:
-                        if '__' in builddata:
-                            self.reset()
-                            return 0
-                        #eval can be dangerous when user input is accidentally executed
-                        #however, this is controlled and formatted data being run
-                        #checks have also been made to make sure packages cannot be imported
-                        #hence, eval is safe to use
-                        refdict[i].treebuild(builddata[i])
-                return 1
-        return 0
+        '''
+        Reads the offset table of the file, so that each tree is built from its section when first used
+        Older 9-line files without an offset table are built all at once
+        (this does use eval() but its uses are justified in ContactBook._treebuild)
+        '''
+        with open(self.filename, 'rb') as file:
+            if file.readline().decode().rstrip('\r\n') != self.filename: return 0
+            header = file.readline().decode().rstrip('\r\n')
+            datastart = file.tell()
+        #OLD FORMAT
+        if not header.startswith('#SECTIONS '): return self._buildall()
+        #NEW FORMAT (checks offset table before trusting it)
+        try: offsets = {name: (int(start), int(length)) for name, start, length in (section.split(':') for section in header.split()[1:])}
+        except ValueError: return 0
+        if set(offsets) != set(SECTIONS): return 0
+        if max(start + length for start, length in offsets.values()) > os.path.getsize(self.filename) - datastart: return 0
+        for name in SECTIONS: setattr(self, name, TREES[name]())
+        self._pending, self._source, self._datastart = offsets, self.filename, datastart
+        return 1
+
+    def loadall(self):
+        '''Builds any trees which have not been built from the file yet (needed before the file is removed or renamed)'''
+        for name in list(self._pending): self._load(name)
 
     def save(self, newfile=False):
-        '''Gathers the treestr of each tree, and saves it along with the filename in a write-protected file'''
-        #creates string
-        string = self.filename + '\n' + \
-                self.users.treestr() + '\n' + \
-                self.fname.treestr() + '\n' + \
-                self.lname.treestr() + '\n' + \
-                self.email.treestr() + '\n' + \
-                self.sex.treestr() + '\n' + \
-                self.phone.treestr() + '\n' + \
-                self.birthday.treestr() + '\n' + \
-                self.date.treestr()
+        '''
+        Gathers the treestr of each tree, and saves it along with the filename and offset table in a write-protected file
+        Sections of trees which were never built are copied from the old file as-is instead of being built and converted back
+        '''
+        sections = []
+        for name in SECTIONS:
+            if name in self._pending: sections.append(self._read(name))
+            else: sections.append(getattr(self, name).treestr().encode())
+        #creates offset table
+        header, start = [], 0
+        for name, section in zip(SECTIONS, sections):
+            header.append(name + ':' + str(start) + ':' + str(len(section)))
+            start += len(section) + 1
+        data = (self.filename + '\n#SECTIONS ' + ' '.join(header) + '\n').encode()
         #set file to write mode temporarily
         if not newfile: os.chmod(self.filename, S_IWUSR|S_IREAD)
-        #writes string to file
-        with open(self.filename, 'w') as file:
-            file.write(string)
+        #writes sections to file
+        with open(self.filename, 'wb') as file:
+            file.write(data + b'\n'.join(sections))
             file.close()
         #sets file back to read only
         os.chmod(self.filename, S_IREAD|S_IRGRP|S_IROTH)
+        #unbuilt trees now come from the new file
+        offsets, start = {}, 0
+        for name, section in zip(SECTIONS, sections):
+            if name in self._pending: offsets[name] = (start, len(section))
+            start += len(section) + 1
+        self._pending, self._source, self._datastart = offsets, self.filename, len(data)
 
     def reset(self):
         '''Empties out all users, and saves'''
         #makes new trees
-        self.users, self.fname, self.lname, self.email, self.sex, self.phone, self.birthday, self.date =  \
-        User_BST(),Attribute_AVL(),Attribute_AVL(),Attribute_AVL(),Attribute_AVL(),Attribute_AVL(),Attribute_Date_AVL(),Attribute_Date_AVL()
+        for name in SECTIONS: setattr(self, name, TREES[name]())
         #and save
-        self.save()
\ No newline at end of file
+        self.save()
+
+    #---HIDDEN FUNCTIONS---
+    def _read(self, name):
+        '''Returns the bytes of a tree's section in the file'''
+        start, length = self._pending[name]
+        with open(self._source, 'rb') as file:
+            file.seek(self._datastart + start)
+            return file.read(length)
+
+    def _load(self, name):
+        '''
+        Builds a tree from its section in the file
+        Raises BookCorrupted if the section cannot be built, since this can happen in the middle of any command
+        '''
+        try:
+            with ds_stats.timer('ContactBook.load'): data = self._read(name).decode()
+            tree = TREES[name]()
+            self._treebuild(tree, data)
+        #eval of a damaged section can raise almost anything (SyntaxError, NameError, TypeError...)
+        except Exception as error: raise BookCorrupted('Book ' + self.filename[:-4] + ' corrupted') from error
+        setattr(self, name, tree)
+
+    def _treebuild(self, tree, data):
+        '''Builds a tree from its treestr'''
+        #eval can be dangerous when user input is accidentally executed
+        #however, this is controlled and formatted data being run
+        #checks have also been made to make sure packages cannot be imported
+        #hence, eval is safe to use
+        if '__' in data: raise ValueError('Book ' + self.filename[:-4] + ' corrupted')
+        with ds_stats.timer('ContactBook.treebuild'): tree.treebuild(data)
+
+    def _buildall(self):
+        '''Builds all trees at once from the older 9-line plaintext file'''
+        with open(self.filename, 'r') as file:
+            data = file.read()
+            file.close()
+        builddata = data.split('\n')
+        if len(builddata) == 9:
+            trees = {name: TREES[name]() for name in SECTIONS}
+            try:
+                for name, string in zip(SECTIONS, builddata[1:]): self._treebuild(trees[name], string)
+            except ValueError:
+                self.reset()
+                return 0
+            for name in SECTIONS: setattr(self, name, trees[name])
+            return 1
+        return 0
\ No newline at end of file
@@ -0,0 +1,314 @@
+from cds_attributes import ATTRIBUTES, BYNAME
+from cds_date import Date
+from ds_set import Set
+from ds_dyarray import DyArray
+from array import array
+from bisect import bisect_left
+import struct
+import mmap
+import sys
+import os
+
+#kind of value stored for each attribute (in the same order as the ContactBook attribute DyArray)
+KINDS = tuple(attribute.kind for attribute in ATTRIBUTES)
+
+#magic, number of users, user table offset, heap offset, postings offset, then (offset, count) of the 7 key tables
+HEADER = struct.Struct('<8sIQQQ' + 'QI' * 7)
+MAGIC = b'CEPSNAP1'
+#each user is 9 int64s: username, the 7 attributes, and a bitmask of attributes which are None
+USERWIDTH = 9
+
+def _ref(off, length):
+    '''Packs the offset and length of a string in the heap into one int64'''
+    return (off << 32) | length
+
+def _encode(kind, value):
+    '''Returns the int64 stored for a value (strings are stored in the heap, so this is only for int and date)'''
+    if kind == 'date':
+        if not isinstance(value, Date): raise TypeError('Date expected, got ' + type(value).__name__)
+        return value.val
+    if not isinstance(value, int): raise TypeError('Integer expected, got ' + type(value).__name__)
+    return value
+
+def snapshot(book, filename):
+    '''
+    Writes a read-only snapshot of a ContactBook to <filename>.snap, which can be opened instantly with ContactSnapshot
+    Only the user tree of the book is needed, so the attribute trees are never built if the book was opened lazily
+
+    File layout (all integers are little-endian):
+    * Header (magic, counts and offsets of each section below)
+    * String heap: every username and string attribute value in UTF-8, with no separators
+    * User table: fixed-width entries of 9 int64s, sorted by username
+      (strings are stored as heap offset << 32 | length)
+    * 7 key tables (one per attribute): pairs of int64 (key, postings offset << 32 | count),
+      sorted in the same order the attribute trees list them in (dates newest first)
+    * Postings: uint32 arrays of user table indexes (in increasing order), one array per attribute value
+
+    Raises ValueError for an integer attribute (like a very long phone number) outside the int64 range,
+    which cannot be stored in the fixed-width tables
+
+    E.g:
+    >> snapshot(book, 'directory')
+    >> snap = ContactSnapshot('directory')
+    '''
+    heap, heapsize, strings = [], 0, {}
+    def store(string):
+        '''Adds string to heap (only once) and returns its reference'''
+        nonlocal heapsize
+        if string not in strings:
+            data = string.encode()
+            strings[string] = _ref(heapsize, len(data))
+            heap.append(data)
+            heapsize += len(data)
+        return strings[string]
+
+    users = array('q')
+    postings = [{} for i in ATTRIBUTES]
+    for index, (username, data) in enumerate(sorted(book.users, key=lambda x: x[0].encode())):
+        users.append(store(username))
+        mask = 0
+        for i, kind in enumerate(KINDS):
+            value = data[i]
+            if value is None:
+                mask |= 1 << i
+                users.append(0)
+                continue
+            if kind == 'str':
+                if not isinstance(value, str): raise TypeError('String expected, got ' + type(value).__name__)
+                users.append(store(value))
+                postings[i].setdefault(value.encode(), array('I')).append(index)
+            else:
+                value = _encode(kind, value)
+                if not -2**63 <= value < 2**63:
+                    raise ValueError('User ' + username + ': ' + ATTRIBUTES[i].name + ' ' + str(value) + ' is too long to be stored in a snapshot (at most 18 digits)')
+                users.append(value)
+                postings[i].setdefault(value, array('I')).append(index)
+        users.append(mask)
+
+    #key tables and postings
+    tables, postarray = [], array('I')
+    for i, kind in enumerate(KINDS):
+        table = array('q')
+        #strings sort by UTF-8 bytes (same order as str), and dates are listed newest first like the Date class
+        for key in sorted(postings[i], reverse=(kind == 'date')):
+            table.append(strings[key.decode()] if kind == 'str' else key)
+            table.append(_ref(len(postarray), len(postings[i][key])))
+            postarray.extend(postings[i][key])
+        tables.append(table)
+
+    if sys.byteorder != 'little':
+        for table in [users, postarray] + tables: table.byteswap()
+    #lays out sections after the header
+    heapoff = HEADER.size
+    useroff = heapoff + heapsize
+    offsets, off = [], useroff + len(users) * 8
+    for table in tables:
+        offsets += [off, len(table) // 2]
+        off += len(table) * 8
+    postoff = off
+    with open(str(filename) + '.snap', 'wb') as file:
+        file.write(HEADER.pack(MAGIC, len(users) // USERWIDTH, useroff, heapoff, postoff, *offsets))
+        file.write(b''.join(heap))
+        file.write(users.tobytes())
+        for table in tables: file.write(table.tobytes())
+        file.write(postarray.tobytes())
+
+class ContactSnapshot:
+    '''
+    Read-only Contact Book snapshot for CEP Final Project
+    -----------------------------------------------------
+    A ContactBook written out by snapshot() into sorted fixed-width tables, which are memory-mapped
+    instead of read, so opening takes the same time no matter how many contacts there are.
+
+    Nothing is built on open. Searches go straight to the mapped file with binary search,
+    and only the users in the result are turned into Python objects.
+
+    It has the same search API as the ContactBook (usersearch, andsearch, orsearch,
+    listbyattribute, listbyusername), but users cannot be added, edited or deleted.
+
+    Time complexity (open): O(1)
+    Time complexity (usersearch): O(log n)
+    Time complexity (andsearch): O(log n + k log n), where k is the shortest list of users for one attribute value
+    Time complexity (orsearch): O(log n + number of matching users)
+
+    E.g:
+    >> snap = ContactSnapshot('directory')
+    >> print(snap.usersearch('tom'))
+    ['Tom', 'Lee', 0, 81234567, 'tom@mail.com', 1/1/2000, 20/5/2018]
+    '''
+    __slots__ = ('filename', 'file', 'map', 'heap', 'users', 'length', 'tables', 'postings')
+
+    def __init__(self, filename):
+        '''Opens and memory-maps the snapshot file (nothing else is read)'''
+        self.filename = str(filename) + '.snap'
+        self.file = open(self.filename, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(self.map) < HEADER.size: raise ValueError('Snapshot ' + self.filename + ' corrupted')
+            header = HEADER.unpack_from(self.map)
+            if header[0] != MAGIC: raise ValueError(self.filename + ' is not a contact book snapshot')
+            self.length, useroff, heapoff, postoff = header[1:5]
+            view = memoryview(self.map)
+            self.heap = view[heapoff:useroff]
+            self.users = self._cast(view, useroff, self.length * USERWIDTH, 'q')
+            self.tables = [self._cast(view, header[5 + 2*i], header[6 + 2*i] * 2, 'q') for i in range(len(ATTRIBUTES))]
+            self.postings = self._cast(view, postoff, (len(self.map) - postoff) // 4, 'I')
+        except Exception:
+            self.close()
+            raise
+
+    def __len__(self):
+        '''Returns number of users'''
+        return self.length
+
+    def __contains__(self, user):
+        '''Returns whether username is in the snapshot'''
+        return self._finduser(user) is not None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        '''Unmaps and closes the snapshot file'''
+        #views into the map must be released before the map can be closed
+        for name in ('heap', 'users', 'tables', 'postings'):
+            value = getattr(self, name, None)
+            for view in (value if isinstance(value, list) else [value]):
+                if isinstance(view, memoryview): view.release()
+            setattr(self, name, None)
+        if getattr(self, 'map', None) is not None: self.map.close()
+        self.map = None
+        self.file.close()
+
+    #---SEARCH FUNCTIONS---
+    def usersearch(self, user):
+        '''User Info search: Return all attribute info of a user based on username (None if not found)'''
+        index = self._finduser(user)
+        return None if index is None else self._userdata(index)
+
+    def orsearch(self, data):
+        '''OR search: Search for username sets based on given attribute data and finds the union'''
+        found = set()
+        for i in range(len(ATTRIBUTES)):
+            if data[i] != None:
+                postings = self._postings(i, data[i])
+                if postings is not None: found.update(postings)
+        return self._usernames(found)
+
+    def andsearch(self, data):
+        '''
+        AND search: Search for username sets based on given attribute data and finds the intersection
+        Only the shortest postings are gone through, and each of its users is binary searched for in the
+        other (sorted) postings, so long postings like those of sex are never read in full
+        '''
+        lists = []
+        for i in range(len(ATTRIBUTES)):
+            if data[i] != None:
+                #like in the ContactBook, attribute values which no user has are ignored
+                postings = self._postings(i, data[i])
+                if postings is not None: lists.append(postings)
+        if not lists: return []
+        lists.sort(key=len)
+        found = [index for index in lists[0] if all(self._has(postings, index) for postings in lists[1:])]
+        return self._usernames(found)
+
+    def listbyattribute(self, attribute, reverse=False):
+        '''Lists all (attribute value, Set of users) by any of the specified attributes, in the same order as the attribute trees'''
+        i = BYNAME[attribute].index
+        table = self.tables[i]
+        order = range(len(table) // 2 - 1, -1, -1) if reverse else range(len(table) // 2)
+        return [(self._decode(KINDS[i], table[2*j]), self._usernames(self._slice(table[2*j + 1]))) for j in order]
+
+    def listbyusername(self, sorted=False, reverse=False):
+        '''
+        Lists all (username, attribute data), taking the same arguments as ContactBook.listbyusername
+        A snapshot does not know which users were recently accessed, so they are always in username order
+        (reversed only if sorted and reverse, like the ContactBook)
+        '''
+        order = range(self.length - 1, -1, -1) if sorted and reverse else range(self.length)
+        return [(self._string(self.users[USERWIDTH * i]), self._userdata(i)) for i in order]
+
+    #---HIDDEN FUNCTIONS---
+    def _cast(self, view, offset, count, code):
+        '''Returns a typed view of count items at offset (copied and swapped to big-endian if needed)'''
+        size = array(code).itemsize
+        part = view[offset:offset + count * size]
+        if sys.byteorder == 'little' and size == {'q': 8, 'I': 4}[code]: return part.cast(code)
+        values = array(code, part.tobytes())
+        if sys.byteorder != 'little': values.byteswap()
+        return values
+
+    def _bytes(self, ref):
+        '''Returns the bytes of a string in the heap from its reference'''
+        off = ref >> 32
+        return self.heap[off:off + (ref & 0xFFFFFFFF)].tobytes()
+
+    def _string(self, ref):
+        '''Returns a string in the heap from its reference'''
+        return self._bytes(ref).decode()
+
+    def _decode(self, kind, value):
+        '''Converts stored int64 back to the attribute value'''
+        if kind == 'str': return self._string(value)
+        if kind == 'date': return Date('%02d%02d%04d' % (value % 100, value // 100 % 100, value // 10000))
+        return value
+
+    def _finduser(self, user):
+        '''Binary searches the user table for a username and returns its index (None if not found)'''
+        if not isinstance(user, str): return None
+        key, users = user.encode(), self.users
+        low, high = 0, self.length
+        while low < high:
+            mid = (low + high) // 2
+            if self._bytes(users[USERWIDTH * mid]) < key: low = mid + 1
+            else: high = mid
+        if low < self.length and self._bytes(users[USERWIDTH * low]) == key: return low
+        return None
+
+    def _userdata(self, index):
+        '''Returns attribute DyArray of the user at index in the user table'''
+        base = USERWIDTH * index
+        mask = self.users[base + USERWIDTH - 1]
+        data = DyArray(len(ATTRIBUTES), capacity=len(ATTRIBUTES))
+        for i, kind in enumerate(KINDS):
+            if not mask & (1 << i): data[i] = self._decode(kind, self.users[base + 1 + i])
+        return data
+
+    def _postings(self, i, value):
+        '''Binary searches the key table of attribute i for value and returns its postings (None if not found)'''
+        kind, table = KINDS[i], self.tables[i]
+        #converts value into the key and ordering used in the table
+        if kind == 'str':
+            if not isinstance(value, str): return None
+            key, keyof = value.encode(), lambda j: self._bytes(table[2*j])
+        elif kind == 'date':
+            if not isinstance(value, Date): return None
+            key, keyof = -value.val, lambda j: -table[2*j]
+        else:
+            if not isinstance(value, int): return None
+            key, keyof = value, lambda j: table[2*j]
+        low, high = 0, len(table) // 2
+        while low < high:
+            mid = (low + high) // 2
+            if keyof(mid) < key: low = mid + 1
+            else: high = mid
+        if low < len(table) // 2 and keyof(low) == key: return self._slice(table[2*low + 1])
+        return None
+
+    def _slice(self, ref):
+        '''Returns the postings (user indexes) from their reference'''
+        off = ref >> 32
+        return self.postings[off:off + (ref & 0xFFFFFFFF)]
+
+    def _has(self, postings, index):
+        '''Binary searches sorted postings for a user index'''
+        i = bisect_left(postings, index)
+        return i < len(postings) and postings[i] == index
+
+    def _usernames(self, indexes):
+        '''Returns Set of usernames of the users at the given indexes'''
+        return Set([self._string(self.users[USERWIDTH * i]) for i in indexes])
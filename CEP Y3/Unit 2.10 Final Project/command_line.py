@@ -1,12 +1,13 @@
 import os
-import re
 import itertools
 import datetime as dt
 from colorama import Fore, Back, Style
 from ds_dyarray import DyArray
 from ds_set import Set
-from cds_contactbook import ContactBook
+from cds_contactbook import ContactBook, BookCorrupted
 from cds_date import Date
+from cds_attributes import ATTRIBUTES, BYNAME, parse
+import ds_stats
 
 class Color:
     def red(msg): print(Fore.RED + Style.BRIGHT + msg + Style.RESET_ALL)
@@ -73,7 +74,10 @@ def main():
     - Possible Attributes: [first name, last name, sex, phone number, email, birthday, date added]
 
     LISTALL ~
-    - Use LISTALL instead of LIST to show all the user data instead of just listing usernames like in LIST ''')
+    - Use LISTALL instead of LIST to show all the user data instead of just listing usernames like in LIST
+
+    STATS - Shows operation counts (rotations, splays, rehashes...) and time taken by each command
+    STATS ON/OFF/RESET - Turns on, turns off, or clears the counters (off by default) ''')
 
     def _yesno(msg, bold=False):
         '''Asks users a question, and return True or False based on the reply'''
@@ -97,101 +101,13 @@ def main():
         '''
         Process string of [<attribute>=value, <attribute>=value, <attribute>=value ...]
         and analyses it to make sure the data is valid for searching or editing
+        (parsing and checks are done by the attribute registry in cds_attributes.py)
         '''
-        #checks format
-        if '[' in data[0] and ']' in data[-1]:
-            #removes square brackets
-            data[0] =  data[0][1:]
-            data[-1] = data[-1][:-1]
-            #attrdict stores the location and type of reply of each attribute
-            attrdict = {'username':(4,0),'first name':(0, 0), 'last name':(0, 1), 'sex':(3,2) ,'phone number':(1, 3), 'email':(3.5, 4), 'birthday':(2, 5)}
-            if date_added: attrdict['date added'] = (2, 6)
-            #heavily processing the strings into a dict such that {attribute:value}
-            datadict = {i[0].lower():i[1] for i in list(x.split('=') for x in ' '.join(data).replace(' =', '=').replace('= ', '=').replace(', ', ',').replace(' ,', ',').split(',')) if len(i) == 2}
-            #creates veriables to fill
-            newname = None
-            newdata = DyArray(7, capacity=7)
-            for i in datadict.keys():
-                if i in attrdict.keys():
-                    #---checks for normal search---
-                    if sim is None:
-                        type, pos = attrdict[i]
-                        #No Check (String)
-                        if type == 0:
-                            newdata[pos] = datadict[i]
-                        #Integer Check
-                        elif type == 1:
-                            try: newdata[pos] = int(datadict[i])
-                            except ValueError:
-                                Color.red('Invalid data format: Variable ' + i + ' should be an integer')
-                                return
-                        #Date Check
-                        elif type == 2:
-                            if sim: newdata[pos] = datadict[i]
-                            elif len(datadict[i]) == 8:
-                                try:
-                                    if int(datadict[i][-4:]) < 2020:
-                                        newdata[pos] = Date(int(datadict[i]))
-                                    else:
-                                        Color.red('Invalid data format: Date comes from the future!!!')
-                                except ValueError:
-                                    Color.red('Invalid data format: Variable ' + i + ' must be in numerical form')
-                                    return
-                            else:
-                                Color.red('Invalid data format: Variable ' + i + ' must be in valid date format (DDMMYYYY)')
-                                return
-                        #Sex Check
-                        elif type == 3:
-                            if datadict[i].upper() == 'M': newdata[pos] = 0
-                            elif datadict[i].upper() == 'F': newdata[pos] = 1
-                            else:
-                                Color.red('Invalid data format: Variable ' + i +' should be "M" or "F"')
-                                return
-                        #Email Check
-                        elif type == 3.5:
-                            if re.match(r'[^@]+@[^@]+\.[^@]+', datadict[i]): newdata[pos] = datadict[i]
-                            else:
-                                Color.red('Invalid data format: Variable ' + i +' should have a valid email format')
-                                return
-                        elif mode and type == 4: newname = datadict[i]
-
-                    else:
-                        #---checks for similarity search---
-                        type, pos = attrdict[i]
-                        #Sex Check
-                        if type == 3:
-                            if datadict[i].upper() in ['M', 'MA', 'MAL', 'MALE']: newdata[pos] = 0
-                            elif datadict[i].upper() in ['F','FE','FEM', 'FEMA', 'FEMAL', 'FEMALE']: newdata[pos] = 1
-                        #Date Check
-                        elif type == 2:
-                            if sim: newdata[pos] = datadict[i]
-                            elif len(datadict[i]) == 8:
-                                try:
-                                    if int(datadict[i][-4:]) < 2020:
-                                        newdata[pos] = Date(int(datadict[i]))
-                                    else:
-                                        Color.red('Invalid data format: Date comes from the future!!!')
-                                except ValueError:
-                                    Color.red('Invalid data format: Variable ' + i + ' must be in numerical form')
-                                    return
-                            else:
-                                Color.red('Invalid data format: Variable ' + i + ' must be in valid date format (DDMMYYYY)')
-                                return
-                        #Integer Check
-                        elif type == 1:
-                            try: newdata[pos] = int(datadict[i])
-                            except ValueError:
-                                Color.red('Invalid data format: Variable ' + i + ' should be an integer')
-                                return
-                        #No Check (String)
-                        else: newdata[pos] = datadict[i]
-
-                #error msg for no attributes
-                else:
-                    Color.red('Invalid data: Attributes given are invalid')
-                    return
-            return (newdata, newname) if mode is not None else newdata
-        else: Color.red('Invalid data format: List of values not given')
+        try: newdata, newname = parse(' '.join(data), sim=bool(sim), date_added=bool(date_added), username=bool(mode))
+        except ValueError as error:
+            Color.red(str(error))
+            return
+        return (newdata, newname) if mode is not None else newdata
 
     def create(commandlist):
         filename = ' '.join(commandlist[1:])
@@ -272,12 +188,13 @@ def main():
                 filename = ' '.join(commandlist[1:])
                 #makes sure file doesn't already exist
                 if not os.path.exists(filename + '.txt'):
-                    #removes old file
-                    os.remove(main.book.filename)
+                    oldfile = main.book.filename
                     #makes new setting
                     main.book.filename = filename + '.txt'
-                    #saves to new file
+                    #saves to new file (trees not loaded yet are copied over from the old file)
                     main.book.save(newfile=True)
+                    #removes old file
+                    os.remove(oldfile)
                     Color.green('Book renamed to ' + main.book.filename[:-4])
                 else: Color.red('File with name ' + ' '.join(commandlist[1:]) + ' already exists')
             else: Color.blue('Command cancelled')
@@ -327,38 +244,17 @@ def main():
         else: Color.red('No book open')
 
     def add(commandlist):
-        def ask(type, msg):
-            #Asks question
-            qn = input(msg)
-            #Integer Check
-            if type == 1:
-                try: return int(qn)
-                except ValueError: Color.red('Invalid response: Variable must be an integer')
-            #Date Check
-            elif type == 2:
-                if len(qn) == 8:
-                    try:
-                        if int(qn[-4:]) < 2020: return Date(int(qn))
-                        else: Color.red('Invalid data format: Date comes from the future!!!')
-                    except ValueError: Color.red('Invalid response: Variable must be in numerical form')
-                else: Color.red('Invalid response: Variable must be in valid date format (DDMMYYYY)')
-            #Sex Check
-            elif type == 3:
-                if qn.upper() == 'M': return 0
-                elif qn.upper() == 'F': return 1
-                else: Color.red('Invalid response: Variable should be "M" or "F"')
-            #Email Check
-            elif type == 3.5:
-                if re.match(r'[^@]+@[^@]+\.[^@]+', qn): return qn
-                else: Color.red('Invalid response: Variable should have a valid email format')
-            else: return qn
-            return ask(type, msg)
+        def ask(attribute):
+            #Asks question until the reply passes the attribute's checks
+            while True:
+                try: return attribute.parse(input(attribute.prompt))
+                except ValueError as error: Color.red(str(error))
 
         def aduser(id):
-            qndict = {'First Name? ':(0, 0), 'Last Name? ':(0, 1), 'Sex? [M/F] ':(3,2) ,'Phone Number? ':(1, 3), 'Email? ':(3.5, 4), 'Birthday? [DDMMYYYY] ':(2, 5)}
             data = DyArray(7, capacity=7)
             #ask for each attribute to prevent confusion
-            for i in qndict.keys(): data[qndict[i][1]] = ask(qndict[i][0], i)
+            for attribute in ATTRIBUTES:
+                if attribute.prompt: data[attribute.index] = ask(attribute)
             #creates final attribute (date added)
             now = dt.datetime.now()
             data[6] = Date(str('{0:0=2d}'.format(now.day)) + str('{0:0=2d}'.format(now.month)) + str(now.year))
@@ -686,19 +582,39 @@ def main():
                 else: userlist(main.book.listbyusername(False), 'recently accessed')
         else: Color.red('No book open')
 
+    def stats(commandlist):
+        if len(commandlist) == 1: print(ds_stats.report())
+        elif commandlist[1].upper() == 'ON':
+            ds_stats.on()
+            Color.green('Instrumentation on')
+        elif commandlist[1].upper() == 'OFF':
+            ds_stats.off()
+            Color.green('Instrumentation off')
+        elif commandlist[1].upper() == 'RESET':
+            ds_stats.reset()
+            Color.green('Counters cleared')
+        else: Color.red('Invalid command: Use STATS, STATS ON, STATS OFF or STATS RESET')
+
     def runcommand():
         command = input('> ')
         if command.replace(' ', ''):
             commandlist = command.split(' ')
             #classifies and run function based on first word
-            if commandlist[0].upper() in refdict.keys(): refdict[commandlist[0].upper()](commandlist)
+            if commandlist[0].upper() in refdict.keys():
+                #times each command (does nothing unless STATS ON)
+                try:
+                    with ds_stats.timer('command.' + commandlist[0].upper()): refdict[commandlist[0].upper()](commandlist)
+                #trees are only built from the book file when first used, so a damaged section is found here
+                except BookCorrupted as error:
+                    Color.red(str(error))
+                    main.book, main.saved = None, None
             else: Color.blue(commandlist[0] + ': Command not found')
 
     main.book, main.saved, main.done = None, None, False
-    refdict = {'OPEN': open, 'CREATE':create, 'ADD' : add,'EDIT':edit, 'DELETE':delete, 'SEARCH':search, 'LIST':lister, 'LISTALL':lister, 'SAVE':save, 'CLOSE':close, 'EXIT':exit, 'HELP': help, 'RESET': reset, 'RENAME': rename, 'REVERT':revert, 'TODAY':today, 'BURN':burn}
-    attrset = Set(['username', 'first name', 'last name', 'phone number', 'sex', 'email', 'birthday', 'date added'])
+    refdict = {'OPEN': open, 'CREATE':create, 'ADD' : add,'EDIT':edit, 'DELETE':delete, 'SEARCH':search, 'LIST':lister, 'LISTALL':lister, 'SAVE':save, 'CLOSE':close, 'EXIT':exit, 'HELP': help, 'RESET': reset, 'RENAME': rename, 'REVERT':revert, 'TODAY':today, 'BURN':burn, 'STATS':stats}
+    attrset = Set(['username'] + list(BYNAME))
     Color.bold('Session started\nType "HELP" to list all possible commands.')
     while not main.done: runcommand()
     Color.bold('Session ended')
 
-main()
+if __name__ == '__main__': main()
@@ -1,5 +1,6 @@
 from ds_treenode import AVLNode
 from ds_dyarray import DyArray
+import ds_stats
 
 class AVLBST:
     '''
@@ -265,6 +266,7 @@ class AVLBST:
 
     def _leftRotate(self, node):
         '''Rotate nodes left for AVLBST._addNode() and AVLBST._delNode()'''
+        if ds_stats.enabled: ds_stats.count('AVLBST.rotations')
         #shift positions
         child = node.right
         tmp = child.left
@@ -277,6 +279,7 @@ class AVLBST:
 
     def _rightRotate(self, node):
         '''Rotate nodes right for AVLBST._addNode() and AVLBST._delNode()'''
+        if ds_stats.enabled: ds_stats.count('AVLBST.rotations')
         #shift positions
         child = node.left
         tmp = child.right
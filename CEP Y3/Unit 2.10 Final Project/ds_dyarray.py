@@ -1,5 +1,6 @@
 #Dynamic Array ADT
 import ctypes
+import ds_stats
 PyArrayType = lambda x: ctypes.py_object * x
 array = lambda x: PyArrayType(x)(*[None]*x)
 
@@ -217,8 +218,10 @@ class DyArray:
         >> print(a)
         [None, None, None, None]
         '''
+        if ds_stats.enabled: ds_stats.count('DyArray.resizes')
         newElements = array(self.capacity * 2)
-        ctypes.memmove(newElements, self.elements, ctypes.sizeof(self.elements))
+        #slice assignment (unlike a raw memmove) keeps the reference counts of the elements right
+        newElements[:self.capacity] = self.elements[:self.capacity]
         self.capacity, self.elements = self.capacity * 2, newElements
 
     def merge(self, arrayB):
@@ -1,12 +1,13 @@
 import sys
 import math
-import ctypes
+from array import array
 from ds_dyarray import DyArray
+import ds_stats
 
 if sys.version_info[0] == 3: _get_byte = lambda c: c
 else: _get_byte = ord
-PyArrayType = lambda x: ctypes.py_object * x
-array = lambda x: PyArrayType(x)(*[(None,None)]*x)
+#cached hashes of each slot (FNV1 in the top 32 bits, CRC32 in the bottom 32 bits)
+hasharray = lambda x: array('Q', bytes(8 * x))
 #ignore this giant lookup table, scroll down for the ADT info
 TABLE = [0x00000000, 0x77073096, 0xee0e612c, 0x990951ba,
         0x076dc419, 0x706af48f, 0xe963a535, 0x9e6495a3,
@@ -87,13 +88,18 @@ class HashTable:
 
     However, what this ensures is constant O(1) access time and deletion, which would greatly help
     the union/intersection of sets.
+
+    Keys, values and the hashes of each key are kept in 3 parallel arrays instead of one array of
+    (key, value) tuples, so adding never creates a tuple, and lookups compare the cached hash before
+    touching the key. Since both hashes of a key are cached, resizing never hashes a key again.
     '''
-    __slots__ = ('size', 'taken', 'data')
+    __slots__ = ('size', 'taken', 'hashes', 'keys', 'values')
 
     #---BUILT-IN FUNCTIONS---
     def __init__(self, size=1):
-        '''Initializes array and length attributes'''
-        self.size, self.taken, self.data = size, 0, array(size)
+        '''Initializes arrays and length attributes'''
+        #plain lists are used for keys and values since indexing them is faster than a ctypes array
+        self.size, self.taken, self.hashes, self.keys, self.values = size, 0, hasharray(size), [None] * size, [None] * size
 
     def __str__(self):
         '''
@@ -108,8 +114,7 @@ class HashTable:
         {1: 2, 2: 3}
         '''
         string = ''
-        for i in self.data:
-            if i[0] is not None: string += str(i[0]) + ': ' + str(i[1]) + ' , '
+        for key, value in self: string += str(key) + ': ' + str(value) + ' , '
         return '{' + string[:-3] + '}'
 
     def __len__(self):
@@ -140,8 +145,8 @@ class HashTable:
         (2, 3)
         '''
         def generate():
-            for i in self.data:
-                if i[0] is not None: yield i
+            for key, value in zip(self.keys, self.values):
+                if key is not None: yield key, value
         return iter(generate())
 
     __repr__ = __str__
@@ -160,7 +165,7 @@ class HashTable:
         >> print(2 in a)
         False
         '''
-        return self._search(key) != (None, None)
+        return self._search(key, self._hash(key)) is not None
 
     def __setitem__(self,key,value):
         '''
@@ -175,13 +180,7 @@ class HashTable:
         {1: 2}
         '''
         self._checkrehash()
-        ans = self._cuckoo(key,value)
-        #update height
-        if ans[0] < 2: self.taken += ans[0]
-        else:
-            #rehash
-            self._rehash(self.size * 2)
-            self[ans[1]] = ans[2]
+        self._add(key, value, self._hash(key))
 
     def  __getitem__(self,key):
         '''
@@ -194,7 +193,8 @@ class HashTable:
         >> print(a[1])
         2
         '''
-        return self._search(key)[1]
+        index = self._search(key, self._hash(key))
+        return None if index is None else self.values[index]
 
     def __delitem__(self,key):
         '''
@@ -210,80 +210,102 @@ class HashTable:
         >> print(a)
         {}
         '''
-        foundindex = self._search(key)
-        if foundindex is not (None, None): self.data[foundindex[0]], self.taken = (None, None), self.taken - 1
+        index = self._search(key, self._hash(key))
+        if index is None: return None
+        value = self.values[index]
+        self.keys[index], self.values[index], self.hashes[index], self.taken = None, None, 0, self.taken - 1
         self._checkrehash()
-        return foundindex[1]
+        return value
 
     #---HIDDEN FUNCTIONS---
     def _rehash(self,size):
-        '''Resizes array and rehashes all existing key-value pairs'''
-        self.size, self.taken, self.data, olddata = size, 0, array(size), self.data
-        for i in olddata[:]:
-            if i[0] != None:
-                self[i[0]] = i[1]
+        '''Resizes arrays and moves all existing key-value pairs using their cached hashes'''
+        if ds_stats.enabled: ds_stats.count('HashTable.rehashes')
+        oldhashes, oldkeys, oldvalues = self.hashes, self.keys, self.values
+        self.size, self.taken, self.hashes, self.keys, self.values = size, 0, hasharray(size), [None] * size, [None] * size
+        for hval, key, value in zip(oldhashes, oldkeys, oldvalues):
+            if key is not None: self._add(key, value, hval)
 
     def _checkrehash(self,max=50,min=-1,multiplier=2,divisor=2):
         '''Checks whether a hash table has crossed the threshold and needs to be resized'''
         if self.taken >= (self.size * max / 100): self._rehash(int(self.size * multiplier))
         elif self.taken <= (self.size * min / 100): self._rehash(int(self.size / divisor))
 
-    def _cuckoo(self, key, value, original1 = None, original2 = None, prev=None):
+    def _add(self, key, value, hval):
+        '''Adds key-value pair with its cached hash, doubling the arrays whenever a key is left without a place'''
+        ans = self._cuckoo(key, value, hval)
+        while isinstance(ans, tuple):
+            #rehash, then place the key which was pushed out
+            self._rehash(self.size * 2)
+            ans = self._cuckoo(*ans)
+        self.taken += ans
+
+    def _cuckoo(self, key, value, hval):
         '''Adding with cuckoo hashing, which ensures O(1) lookup and deletion,
         but sadly creates amortized O(n) time
 
-        Read comments in the code to see how it works'''
-
-        #2 possible hashes: hash 1 is FNV1, hash 2 is CRC32
-        hash1 = self._fnv1(key)
-        hash2 = self._crc32(key)
+        Returns 0 if the key was already there, 1 if it was added, or the (key, value, hash)
+        which was left without a place if the keys pushing each other out looped around
 
-        #LOOP (Looping back to whether we started)
-        #If this happens, we have to resize and rehash the entire table befpre continuing
-        if (original1, original2) == (hash1, hash2) or (original2, original1) == (hash1, hash2):
-            return 2, key, value
-        else:
-            if original1 == None: original1 = hash1
-            if original2 == None: original2 = hash2
+        Read comments in the code to see how it works'''
+        hashes, keys, values, size = self.hashes, self.keys, self.values, self.size
+        original, prev = None, None
+        for kicks in range(size + 1):
+            #2 possible hashes: hash 1 is FNV1, hash 2 is CRC32
+            hash1, hash2 = (hval >> 32) % size, (hval & 0xFFFFFFFF) % size
+
+            #LOOP (Looping back to whether we started)
+            #If this happens, we have to resize and rehash the entire table befpre continuing
+            if original is None: original = (hash1, hash2)
+            elif original == (hash1, hash2) or original == (hash2, hash1): return key, value, hval
+
+            #UPDATING (Checks both indexes for the key first, since deleting
+            #from hash1's index can leave the key only in hash2's index)
+            if hashes[hash1] == hval and keys[hash1] == key:
+                values[hash1] = value
+                return 0
+            elif hashes[hash2] == hval and keys[hash2] == key:
+                values[hash2] = value
+                return 0
 
             #HASH1 (Checks if this index is available)
-            if self.data[hash1][0] == key:
-                self.data[hash1] = (self.data[hash1][0], value)
-                return 0, None, None
-            elif self.data[hash1][0] == None:
-                self.data[hash1] = (key, value)
-                return 1, None, None
+            elif keys[hash1] is None:
+                hashes[hash1], keys[hash1], values[hash1] = hval, key, value
+                return 1
 
             #HASH2 (Otherwise, it checks hash2's index for availability)
-            elif self.data[hash2][0] == key:
-                self.data[hash2] = (self.data[hash2][0], value)
-                return 0, None, None
-            elif self.data[hash2][0] == None:
-                self.data[hash2] = (key, value)
-                return 1, None, None
+            elif keys[hash2] is None:
+                hashes[hash2], keys[hash2], values[hash2] = hval, key, value
+                return 1
 
             #REPLACING (If both are taken, either the first hash or second hash's
             #original keys are pushed out and replaced by this one)
-            #then the function is repeated on the pushed-out keys
-            elif hash1 == prev:
-                newkey, newval = self.data[hash2]
-                self.data[hash2] = (key, value)
-                return self._cuckoo(newkey, newval, original1=original1, original2=original2, prev=hash2)
-            else:
-                newkey, newval = self.data[hash1]
-                self.data[hash1] = (key, value)
-                return self._cuckoo(newkey, newval, original1=original1, original2=original2, prev=hash1)
-
-    def _search(self,key):
+            #then the same is repeated on the pushed-out keys
+            if ds_stats.enabled: ds_stats.count('HashTable.kicks')
+            index = hash2 if hash1 == prev else hash1
+            hval, hashes[index] = hashes[index], hval
+            key, keys[index] = keys[index], key
+            value, values[index] = values[index], value
+            prev = index
+        #keys kept pushing each other out without looping back to the start
+        return key, value, hval
+
+    def _search(self, key, hval):
         '''
         Searching with cuckoo hashing, ensuring constant O(1) access
+        Returns the index of the key (None if not found)
         '''
         #Only needs to check one hash or the other, ensuring O(1) time
-        hash1 = self._fnv1(key)
-        hash2 = self._crc32(key)
-        if self.data[hash1][0] == key: return hash1, self.data[hash1][1]
-        elif self.data[hash2][0] == key: return hash2, self.data[hash2][1]
-        else: return None, None
+        #the cached hash is compared first, so most non-matching keys are never compared
+        hash1 = (hval >> 32) % self.size
+        if self.hashes[hash1] == hval and self.keys[hash1] == key: return hash1
+        hash2 = (hval & 0xFFFFFFFF) % self.size
+        if self.hashes[hash2] == hval and self.keys[hash2] == key: return hash2
+        return None
+
+    def _hash(self, key):
+        '''Returns both hashes of a key packed together (FNV1 in the top 32 bits, CRC32 in the bottom 32 bits)'''
+        return (self._fnv1(key) << 32) | self._crc32(key)
 
     def _fnv1(self, data):
         '''
@@ -295,7 +317,7 @@ class HashTable:
         else: data = bytes(data, 'utf-8')
         hval = 0x811c9dc5
         for byte in data: hval = ((hval * 0x01000193) % (2**32)) ^ _get_byte(byte)
-        return hval % self.size
+        return hval
 
     def _crc32(self, data):
         '''
@@ -306,4 +328,4 @@ class HashTable:
         else: data = bytes(data, 'utf-8')
         crc = 0
         for byte in data: crc = TABLE[(crc ^ _get_byte(byte)) & 0xff] ^ (crc >> 8)
-        return crc % self.size
\ No newline at end of file
+        return crc
\ No newline at end of file
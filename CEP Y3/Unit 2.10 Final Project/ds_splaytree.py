@@ -1,4 +1,5 @@
 from ds_treenode import Node
+import ds_stats
 
 class SplayBST:
     '''
@@ -268,6 +269,7 @@ class SplayBST:
         '''
         #Right Rotation(Zig)
         def _zig(node, parent, grandnode=None):
+            if ds_stats.enabled: ds_stats.count('SplayBST.splaysteps')
             parent.left = node.right
             node.right = parent
             if grandnode:
@@ -275,11 +277,13 @@ class SplayBST:
                 if grandnode.right == parent: grandnode.right = node
         #Left Rotation(Zag)
         def _zag(node, parent, grandnode=None):
+            if ds_stats.enabled: ds_stats.count('SplayBST.splaysteps')
             parent.right = node.left
             node.left = parent
             if grandnode:
                 if grandnode.left == parent: grandnode.left = node
                 if grandnode.right == parent: grandnode.right = node
+        if ds_stats.enabled: ds_stats.count('SplayBST.splays')
         #No need to rotate if node is already root
         if root == node or node is None or root is None: return root
         #if node is left child of root, a right rotation (or zig) is performed
@@ -0,0 +1,98 @@
+#Operation counters and timers
+'''
+Opt-in instrumentation for CEP Final Project
+---------------------------------------------
+The data structures call count() at interesting points (AVL rotations, splay steps,
+cuckoo kicks, rehashes and array resizes), and timer() wraps slower steps such as
+the eval() while building a book and each command in the command line.
+
+Everything is off by default. Every hook in the data structures is guarded by
+"if ds_stats.enabled:", so when disabled the only cost is one attribute lookup,
+and timer() gives back one shared do-nothing context instead of making a new one.
+
+E.g:
+>> import ds_stats
+>> ds_stats.on()
+>> tree = AVLBST()
+>> for i in range(100): tree.add(i, i)
+>> print(ds_stats.report())
+Instrumentation on
+Counters:
+  AVLBST.rotations                 93
+'''
+import time
+
+enabled = False
+counters = {}
+timers = {}
+
+def on():
+    '''Turns on counting and timing'''
+    global enabled
+    enabled = True
+
+def off():
+    '''Turns off counting and timing (existing values are kept)'''
+    global enabled
+    enabled = False
+
+def reset():
+    '''Clears all counters and timers'''
+    counters.clear()
+    timers.clear()
+
+def count(name, n=1):
+    '''Adds n to the counter with the given name'''
+    counters[name] = counters.get(name, 0) + n
+
+class _Timer:
+    '''Context manager that adds the wall time taken by its block to the timer with the given name'''
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name, self.start = name, None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            calls, total = timers.get(self.name, (0, 0.0))
+            timers[self.name] = (calls + 1, total + time.perf_counter() - self.start)
+        return False
+
+class _NoTimer:
+    '''Context manager that does nothing, shared by every timer() while instrumentation is off'''
+    __slots__ = ()
+
+    def __enter__(self): return self
+
+    def __exit__(self, *exc): return False
+
+_notimer = _NoTimer()
+
+def timer(name):
+    '''
+    Returns a context manager that adds the wall time taken by its block to the timer with the given name
+    Does nothing (and makes no new object) when instrumentation is off
+
+    E.g:
+    >> with ds_stats.timer('ContactBook.build'):
+    >>     book.build()
+    '''
+    return _Timer(name) if enabled else _notimer
+
+def report():
+    '''Returns a string of all counters and timers (calls, total and average time)'''
+    lines = ['Instrumentation ' + ('on' if enabled else 'off')]
+    if counters:
+        lines.append('Counters:')
+        for name in sorted(counters): lines.append('  %-32s %d' % (name, counters[name]))
+    if timers:
+        lines.append('Timers:' + ' ' * 27 + 'calls      total(s)    average(ms)')
+        for name in sorted(timers):
+            calls, total = timers[name]
+            lines.append('  %-32s %-10d %-11.4f %.3f' % (name, calls, total, total / calls * 1000))
+    if not counters and not timers: lines.append('No operations recorded')
+    return '\n'.join(lines)
@@ -0,0 +1,113 @@
+from LLQueue import LLQueue
+
+# Implementation of the bounded Priority Queue ADT using a list of
+# queues in which the queues are implemented using a linked list.
+# An integer is used as a bitmap of which levels are not empty (bit i is
+# set when level i has items), so the first non-empty level is found with
+# a few integer operations instead of checking every level in turn.
+class BPriorityQueue :
+    # Creates an empty bounded priority queue.
+    def __init__( self, numLevels ):
+        self._qSize = 0
+        self._nonEmpty = 0
+        self._qLevels = [LLQueue() for i in range( numLevels )]
+        # Number of items ever added to and removed from each level.
+        self._enqueued = [0] * numLevels
+        self._dequeued = [0] * numLevels
+
+    # Returns True if the queue is empty.
+    def isEmpty( self ):
+        return self._qSize == 0
+
+    # Returns the number of items in the queue.
+    def __len__( self ):
+        return self._qSize
+
+    # Adds the given item to the queue.
+    def enqueue( self, item, priority ):
+        assert priority >= 0 and priority < len(self._qLevels), \
+        "Invalid priority level."
+        self._qLevels[priority].enqueue( item )
+        self._nonEmpty |= 1 << priority
+        self._enqueued[priority] += 1
+        self._qSize += 1
+
+    # Adds each (item, priority) pair to the queue.
+    def enqueue_many( self, pairs ):
+        for item, priority in pairs :
+            self.enqueue( item, priority )
+
+    # Returns the highest priority (lowest) level which is not empty.
+    def _firstLevel( self ):
+        # mask & -mask keeps only the lowest set bit.
+        return (self._nonEmpty & -self._nonEmpty).bit_length() - 1
+
+    # Removes and returns the next item in the queue.
+    def dequeue( self ) :
+        # Make sure the queue is not empty.
+        assert not self.isEmpty(), "Cannot dequeue from an empty queue."
+        i = self._firstLevel()
+        item = self._qLevels[i].dequeue()
+        if self._qLevels[i].isEmpty() :
+            self._nonEmpty &= ~(1 << i)
+        self._dequeued[i] += 1
+        self._qSize -= 1
+        return item
+
+    # Removes and returns a list of the next n items (all of them if n is None).
+    def drain( self, n = None ):
+        if n is None or n > self._qSize :
+            n = self._qSize
+        items = []
+        while len( items ) < n :
+            # Empties as much of the first non-empty level as needed at once.
+            i = self._firstLevel()
+            level = self._qLevels[i]
+            take = min( n - len( items ), len( level ) )
+            for j in range( take ) :
+                items.append( level.dequeue() )
+            if level.isEmpty() :
+                self._nonEmpty &= ~(1 << i)
+            self._dequeued[i] += take
+            self._qSize -= take
+        return items
+
+    # Returns a list of (level, items waiting, items ever added, items ever removed)
+    # for every level which has been used.
+    def stats( self ):
+        return [(i, len(self._qLevels[i]), self._enqueued[i], self._dequeued[i])
+                for i in range( len(self._qLevels) ) if self._enqueued[i]]
+
+    # Same as enqueue and dequeue, but taking (item, priority) and returning
+    # (priority, item) like the PriorityQueue used by the Hospital A&E program.
+    def push( self, element ):
+        self.enqueue( element[0], element[1] )
+
+    def pop( self ):
+        i = self._firstLevel()
+        return (i, self.dequeue())
+
+
+if __name__ == "__main__":
+    Q = BPriorityQueue(6)
+
+    Q.enqueue("purple", 5)
+    Q.enqueue("black", 1)
+    Q.enqueue("orange", 3)
+    Q.enqueue("white", 0)
+    Q.enqueue("green", 1)
+    Q.enqueue("yellow", 5)
+
+    print(Q.stats())
+    while not Q.isEmpty():
+        print(Q.dequeue())
+
+    # 100,000 patients waiting at the lowest of 1000 levels,
+    # which the original BPriorityQueue would check every level to find.
+    import time
+    Q = BPriorityQueue(1000)
+    Q.enqueue_many(("patient" + str(i), 999) for i in range(100000))
+    start = time.perf_counter()
+    while not Q.isEmpty():
+        Q.dequeue()
+    print("dequeue: %.2f us per patient" % ((time.perf_counter() - start) * 10**6 / 100000))
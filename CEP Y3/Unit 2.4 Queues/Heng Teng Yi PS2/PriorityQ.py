@@ -1,39 +1,39 @@
-#Dynamic Array ADT
-import ctypes
+#Priority Queue ADT
 class PriorityQueue:
-    """An unbounded priority queue that stores priorities in a binary heap in the form of a ctypes
-array, and appends their corresponding item to other ctypes arrays in a dictionary             """
+    """An unbounded priority queue that stores [priority, order added, item, position] entries
+in a d-ary heap (binary by default) in one list. The lowest priority comes out first, and items
+of the same priority come out in the order they were added.
 
-    def __init__(self, alist = []):
-        """Declares the priority queue by adding elements from a list (empty by default)
-into their respective arrays, and heapsorts the priorities                           """
+Every entry keeps its own position in the heap, and a dictionary maps each item to its entries,
+so the priority of an item can be changed (decrease_key) or the item removed in O(log n),
+without searching through the heap. Items must therefore be hashable.
 
-        assert type(alist) is list, "Input provided must be list"
-        self._qList = _Array(len(alist) + 1)
-        self._size = len(alist)
-        self._nameDict = {}
+Sorting the heap is done with loops instead of recursion, and a list of many elements
+is sorted all at once from the bottom up (heapify), which takes O(n) instead of O(n log n).  """
 
-        for i in range(self._size):
-            self._qList[i + 1] = alist[i][1]
-            try:
-                self._nameDict[alist[i][1]].append(alist[i][0])
-            except KeyError:
-                self._nameDict[alist[i][1]] = _Array(1)
-                self._nameDict[alist[i][1]][0] = alist[i][0]
+    def __init__(self, alist = [], d = 2):
+        """Declares the priority queue of (item, priority) elements from a list (empty by default),
+and heapsorts them from the bottom up. d is the number of children of each node in the heap
+(2 by default), and a larger d makes the heap shallower, so pushing is faster.               """
 
-        self._build(alist)
+        assert d >= 2, "Each node must have at least 2 children"
+        self._d = d
+        self._heap = []
+        self._entries = {}
+        self._count = 0
+        self.push_many(alist)
 
     def __str__(self):
-        """Returns a string of a list of all the priorities within the binary heap
+        """Returns a string of a list of all the priorities within the heap
 
-Time complexity: O(1)
+Time complexity: O(n)
 
 E.g:
 >>> a = PriorityQueue([(0,1),(0,2)])
 >>> print(a)
-[1,2]                                                                          """
+[1, 2]                                                                         """
 
-        return str(self._qList._elements[1:self._size + 1])
+        return str([entry[0] for entry in self._heap])
 
     def __len__(self):
         """Returns the length of the priority queue
@@ -45,41 +45,109 @@ E.g:
 >>> print(len(a))
 2                                               """
 
-        return self._size
+        return len(self._heap)
+
+    def __contains__(self, item):
+        """Returns whether an item is in the priority queue
+
+Time complexity: O(1)
+
+E.g:
+>>> a = PriorityQueue([("Tom",1)])
+>>> print("Tom" in a)
+True                                               """
+
+        return item in self._entries
 
     def _swapUp(self,index):
-        """Sorts the binary heap by swapping the element in given index p with p // 2
-if the element in index p// 2 is higher in value, before repeating the function if needed"""
+        """Sorts the heap by moving the entry in the given index up past its parent (index - 1) // d
+for as long as the parent is higher in value. The entries moved down update their positions."""
 
-        nextindex = index // 2
-        if nextindex > 0:
-          if self._qList[index] < self._qList[nextindex]:
-             tmp = self._qList[nextindex]
-             self._qList[nextindex] = self._qList[index]
-             self._qList[index] = tmp
-             self._swapUp(nextindex)
+        heap, d = self._heap, self._d
+        entry = heap[index]
+        while index > 0:
+            parent = (index - 1) // d
+            if not entry < heap[parent]:
+                break
+            heap[index] = heap[parent]
+            heap[index][3] = index
+            index = parent
+        heap[index] = entry
+        entry[3] = index
 
     def _swapDown(self,index):
-        """Sorts the binary heap by swapping the element in given index p with 2p or 2p + 1,
-if the element in index 2p or 2p + 1 is lower in value, before repeating the function if needed"""
-
-        nextindex = index * 2
-        if nextindex <= self._size:
-            if not (nextindex + 1 > self._size or self._qList[nextindex] < self._qList[nextindex+1]):
-                nextindex += 1
-            if self._qList[index] > self._qList[nextindex]:
-                tmp = self._qList[index]
-                self._qList[index] = self._qList[nextindex]
-                self._qList[nextindex] = tmp
-            self._swapDown(nextindex)
-
-    def _build(self,alist):
-        """Sorts the initialized binary heap using the _swapDown function"""
-
-        index = len(alist) // 2
-        while index > 0:
-            self._swapDown(index)
-            index -= 1
+        """Sorts the heap by moving the entry in the given index down past its lowest child
+(d * index + 1 to d * index + d) for as long as that child is lower in value"""
+
+        heap, d, size = self._heap, self._d, len(self._heap)
+        entry = heap[index]
+        while True:
+            first = d * index + 1
+            if first >= size:
+                break
+            #Finds the lowest child
+            lowest = first
+            for child in range(first + 1, min(first + d, size)):
+                if heap[child] < heap[lowest]:
+                    lowest = child
+            if not heap[lowest] < entry:
+                break
+            heap[index] = heap[lowest]
+            heap[index][3] = index
+            index = lowest
+        heap[index] = entry
+        entry[3] = index
+
+    def _newEntry(self, element):
+        """Makes the [priority, order added, item, position] entry of an (item, priority) element"""
+
+        entry = [element[1], self._count, element[0], len(self._heap)]
+        self._count += 1
+        try:
+            self._entries[element[0]].append(entry)
+        except KeyError:
+            self._entries[element[0]] = [entry]
+        return entry
+
+    def _forget(self, entry):
+        """Removes an entry that is leaving the heap from the dictionary of items"""
+
+        entries = self._entries[entry[2]]
+        if len(entries) == 1:
+            del self._entries[entry[2]]
+        else:
+            entries.remove(entry)
+
+    def _removeAt(self, index):
+        """Removes and returns the entry in the given index, filling its place with the last entry"""
+
+        heap = self._heap
+        entry = heap[index]
+        last = heap.pop()
+        if index < len(heap):
+            heap[index] = last
+            last[3] = index
+            #The last entry can belong either above or below the index
+            self._swapUp(index)
+            self._swapDown(last[3])
+        self._forget(entry)
+        return entry
+
+    def heapify(self, alist):
+        """Replaces all elements in the priority queue with the (item, priority) elements in the list,
+sorting them from the bottom up
+
+Time complexity: O(n)
+
+E.g:
+>>> a = PriorityQueue()
+>>> a.heapify([("a",3),("b",1),("c",2)])
+>>> print(a)
+[1, 3, 2]                                                          """
+
+        self._heap = []
+        self._entries = {}
+        self.push_many(alist)
 
     def isEmpty(self):
         """Returns a boolean of whether the priority queue is empty
@@ -89,118 +157,121 @@ Time complexity: O(1)
 E.g:
 >>> a = PriorityQueue([(0,1),(0,2)])
 >>> print(a.isEmpty())
-True                                                            """
+False                                                           """
 
-        return self._size == 0
+        return len(self._heap) == 0
 
     def push(self, element):
-        """Pushes an element into the priority queue, adding the
-priority and name each into the respective binary heap and dictionary,
-and then sorts the binary heap using the _SwapUp function
+        """Pushes an (item, priority) element into the priority queue,
+and then sorts the heap using the _swapUp function
 
-Time complexity (Worst-case): O(n)
-Time complexity (Average): O(log n)
+Time complexity: O(log n)
 
 E.g:
 >>> a = PriorityQueue([(0,2),(0,3)])
 >>> print(a)
-[2,3]
+[2, 3]
 >>> a.push((0,1))
 >>> print(a)
-[1,2,3]                                                          """
+[1, 3, 2]                                                        """
 
-        try:
-            self._nameDict[element[1]].append(element[0])
-        except KeyError:
-            self._nameDict[element[1]] = _Array(1)
-            self._nameDict[element[1]][0] = element[0]
+        self._heap.append(self._newEntry(element))
+        self._swapUp(len(self._heap) - 1)
+
+    def push_many(self, elements):
+        """Pushes many (item, priority) elements into the priority queue. If there are more new
+elements than existing ones, the whole heap is sorted again from the bottom up, which is faster
+than pushing them one by one.
+
+Time complexity: O(min(n + k, k log n)) for k elements
 
-        self._qList.append(element[1])
-        self._size += 1
-        self._swapUp(self._size)
+E.g:
+>>> a = PriorityQueue()
+>>> a.push_many([("a",3),("b",1),("c",2)])
+>>> print(a.pop())
+(1, 'b')                                                         """
+
+        elements = list(elements)
+        if len(elements) <= len(self._heap):
+            for element in elements:
+                self.push(element)
+            return
+        for element in elements:
+            self._heap.append(self._newEntry(element))
+        #Sorts from the last entry with children up to the root
+        for index in range((len(self._heap) - 2) // self._d, -1, -1):
+            self._swapDown(index)
 
     def peek(self):
-        """Returns the name and priority of the item with the earliest enqueue and highest priority
+        """Returns the priority and item of the item with the earliest enqueue and highest priority
 
 Time complexity: O(1)
 
 E.g:
 >>> a = PriorityQueue([(0,2),(0,3)])
 >>> print(a.peek())
-(0,2)                                                                                 """
+(2, 0)                                                                                """
 
-        return (self._qList[1], self._nameDict[priority])
+        assert not self.isEmpty(), "Cannot peek at an empty priority queue"
+        return (self._heap[0][0], self._heap[0][2])
 
     def pop(self):
-        """Removes and returns the the name and priority of the item with the earliest enqueue and highest priority
+        """Removes and returns the the priority and item of the item with the earliest enqueue and highest priority
 
-Time complexity (Worst-case): O(n)
-Time complexity (Average): O(log n)
+Time complexity: O(log n)
 
 E.g:
 >>> a = PriorityQueue([(0,2),(0,3)])
 >>> print(a.pop(), a)
-(0,2) [(0,3)]                                                                                                   """
-        tmp = self._qList[1]
-        self._qList[1] = self._qList[self._size]
-        self._qList[self._size] = tmp
-        priority = self._qList.pop()
-        self._size -= 1
-        self._swapDown(1)
-        return (priority, self._nameDict[priority].pop(0))
-
-class _Array:
-    def __init__(self, size):
-        assert size > 0 , "Array size must be > 0"
-        self._size = size
-        self._capacity = size * 2
-        PyArrayType  =  ctypes.py_object * (self._capacity)
-        self._elements = PyArrayType(*([0] * self._capacity))
-
-    # Return the length of the sub-array
-    def __len__(self):
-        return self._size
-
-    # Gets the value of the index element
-    def __getitem__(self,index):
-        assert 0 <= index < self._size, "Array subscript out of range"
-        return self._elements[index]
-
-    #Sets a value in the index element
-    def __setitem__(self, index, value):
-        assert 0 <= index < self._size, "Array subscript out of range"
-        self._elements[index] = value
-
-    def  __iter__ (self):
-        return iter(self._elements[:self._size])
-
-    #Returns a string of the array
-    def __str__ (self):
-        return str(self._elements[:self._size])
-
-    __repr__ = __str__
-
-    def resize(self, size):
-        assert size >= self._size , "Size must be at least " + str(self._size)
-
-        newElements = (ctypes.py_object * (size * 2))(*([0] * size * 2))
-        ctypes.memmove(newElements, self._elements, ctypes.sizeof(self._elements))
-        self._elements = newElements
-        self._size = size
-        self._capacity = size * 2
-
-    def append(self, value):
-        if self._capacity - self._size <= 1:
-            self.resize(self._size)
-        self._elements[self._size] = value
-        self._size += 1
-
-    def pop(self, index = -1):
-        if index < 0:
-            index += self._size
-        tmp = self._elements[index]
-        for i in range(self._size):
-            if i > index:
-                self._elements[i-1] = self._elements[i]
-        self._size -= 1
-        return tmp
+(2, 0) [3]                                                                                                      """
+
+        assert not self.isEmpty(), "Cannot pop from an empty priority queue"
+        entry = self._removeAt(0)
+        return (entry[0], entry[2])
+
+    def pop_many(self, k):
+        """Removes and returns a list of (priority, item) of up to k items in the order they would be popped
+
+Time complexity: O(k log n)
+
+E.g:
+>>> a = PriorityQueue([("a",3),("b",1),("c",2)])
+>>> print(a.pop_many(2))
+[(1, 'b'), (2, 'c')]                                                                       """
+
+        popped = []
+        for i in range(min(k, len(self._heap))):
+            entry = self._removeAt(0)
+            popped.append((entry[0], entry[2]))
+        return popped
+
+    def decrease_key(self, item, priority):
+        """Changes the priority of an item (the one added first, if it was added more than once)
+and moves it to its new place in the heap. The priority can also be increased.
+Raises KeyError if the item is not in the priority queue.
+
+Time complexity: O(log n)
+
+E.g:
+>>> a = PriorityQueue([("Tom",3),("Jerry",2)])
+>>> a.decrease_key("Tom", 1)
+>>> print(a.peek())
+(1, 'Tom')                                                                                """
+
+        entry = self._entries[item][0]
+        entry[0] = priority
+        self._swapUp(entry[3])
+        self._swapDown(entry[3])
+
+    def remove(self, item):
+        """Removes an item (the one added first, if it was added more than once) and returns its priority.
+Raises KeyError if the item is not in the priority queue.
+
+Time complexity: O(log n)
+
+E.g:
+>>> a = PriorityQueue([("Tom",3),("Jerry",2)])
+>>> print(a.remove("Tom"), a)
+3 [2]                                                                                """
+
+        return self._removeAt(self._entries[item][0][3])[0]
@@ -0,0 +1,75 @@
+import sys
+import time
+import heapq
+import random
+from PriorityQ import PriorityQueue
+
+def timed(func):
+    """Returns the seconds taken to run func"""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def bench(n, d):
+    """Returns the time per element (in microseconds) of each operation on PriorityQueue(d=d) and heapq with n elements"""
+    rand = random.Random(n)
+    elements = [("patient" + str(i), rand.randrange(1000)) for i in range(n)]
+    entries = [(p, i, item) for i, (item, p) in enumerate(elements)]
+    results = {}
+
+    #pushing one by one
+    queue, heap = PriorityQueue(d=d), []
+    def push():
+        for element in elements:
+            queue.push(element)
+    def hpush():
+        for entry in entries:
+            heapq.heappush(heap, entry)
+    results["push"] = (timed(push), timed(hpush))
+
+    #popping everything
+    def pop():
+        while not queue.isEmpty():
+            queue.pop()
+    def hpop():
+        while heap:
+            heapq.heappop(heap)
+    results["pop"] = (timed(pop), timed(hpop))
+
+    #building from a list all at once
+    heap = list(entries)
+    results["heapify"] = (timed(lambda: PriorityQueue(elements, d=d)), timed(lambda: heapq.heapify(heap)))
+
+    #popping the k = n/10 most urgent
+    queue = PriorityQueue(elements, d=d)
+    k = n // 10
+    results["pop_many(n/10)"] = (timed(lambda: queue.pop_many(k)), timed(lambda: heapq.nsmallest(k, heap)))
+
+    #making n/10 patients more urgent (heapq has no decrease-key, so the usual way is to push
+    #a new entry and skip the old one when it is popped)
+    queue = PriorityQueue(elements, d=d)
+    heap = list(entries)
+    heapq.heapify(heap)
+    picks = [rand.randrange(n) for i in range(k)]
+    def decrease():
+        for i in picks:
+            queue.decrease_key(elements[i][0], 0)
+    def hdecrease():
+        for i in picks:
+            heapq.heappush(heap, (0, n + i, elements[i][0]))
+    results["decrease_key(n/10)"] = (timed(decrease), timed(hdecrease))
+    return results
+
+def main(sizes=(10**4, 10**5), arities=(2, 4)):
+    """Benchmark of PriorityQueue against heapq (times are microseconds per element)
+Run with: python PriorityQbench.py [size size ...]"""
+
+    print("%-20s %-8s %-3s %-14s %-12s %-8s" % ("operation", "n", "d", "PriorityQ(us)", "heapq(us)", "ratio"))
+    for n in sizes:
+        for d in arities:
+            for name, (ours, theirs) in bench(n, d).items():
+                count = n // 10 if "n/10" in name else n
+                print("%-20s %-8d %-3d %-14.3f %-12.3f %-8.1f" % (name, n, d, ours / count * 10**6, theirs / count * 10**6, ours / theirs))
+
+if __name__ == "__main__":
+    main(*[[int(size) for size in sys.argv[1:]]] if sys.argv[1:] else [])
@@ -0,0 +1,150 @@
+import asyncio
+import threading
+
+# Implementation of a bounded Queue ADT which can be shared between threads,
+# using the same circular array as CQueue. put() waits while the queue is
+# full and get() waits while it is empty, using condition variables, so
+# producer threads and consumer threads never have to poll.
+class BlockingCQueue :
+    def __init__( self, maxSize ) :
+        assert maxSize > 0, "Queue size must be > 0"
+        self._count = 0
+        self._front = 0
+        self._back = maxSize - 1
+        self._qArray = [None] * maxSize
+        # Both conditions share one lock, which guards the circular array.
+        self._lock = threading.Lock()
+        self._notEmpty = threading.Condition( self._lock )
+        self._notFull = threading.Condition( self._lock )
+
+    def isEmpty( self ) :
+        return self._count == 0
+
+    def isFull( self ) :
+        return self._count == len(self._qArray)
+
+    def __len__( self ) :
+        return self._count
+
+    # Adds item to the back of the circular array (the lock must be held).
+    def _enqueue( self, item ) :
+        self._back = (self._back + 1) % len(self._qArray)
+        self._qArray[self._back] = item
+        self._count += 1
+
+    # Removes the item at the front of the circular array (the lock must be held).
+    def _dequeue( self ) :
+        item = self._qArray[self._front]
+        # Lets go of the item so it can be freed once the consumer is done with it.
+        self._qArray[self._front] = None
+        self._front = (self._front + 1) % len(self._qArray)
+        self._count -= 1
+        return item
+
+    # Adds item to the queue, waiting until there is space for it.
+    # Raises TimeoutError if there is still no space after timeout seconds.
+    def put( self, item, timeout = None ) :
+        with self._notFull :
+            if not self._notFull.wait_for( lambda: self._count < len(self._qArray), timeout ) :
+                raise TimeoutError( "Queue is still full." )
+            self._enqueue( item )
+            self._notEmpty.notify()
+
+    # Removes and returns the next item, waiting until there is one.
+    # Raises TimeoutError if the queue is still empty after timeout seconds.
+    def get( self, timeout = None ) :
+        with self._notEmpty :
+            if not self._notEmpty.wait_for( lambda: self._count > 0, timeout ) :
+                raise TimeoutError( "Queue is still empty." )
+            item = self._dequeue()
+            self._notFull.notify()
+            return item
+
+    # Removes and returns a list of up to n items, waiting until there is at least one.
+    # Taking many items under one lock is much faster than calling get() for each.
+    def get_many( self, n, timeout = None ) :
+        with self._notEmpty :
+            if not self._notEmpty.wait_for( lambda: self._count > 0, timeout ) :
+                raise TimeoutError( "Queue is still empty." )
+            items = [self._dequeue() for i in range( min( n, self._count ) )]
+            self._notFull.notify( len( items ) )
+            return items
+
+    # Same names as CQueue.
+    enqueue = put
+    dequeue = get
+
+
+# The same bounded circular array queue for coroutines in one asyncio event loop.
+# put() and get() are coroutines which wait (letting other coroutines run)
+# instead of blocking the thread.
+class AsyncCQueue :
+    def __init__( self, maxSize ) :
+        assert maxSize > 0, "Queue size must be > 0"
+        self._count = 0
+        self._front = 0
+        self._back = maxSize - 1
+        self._qArray = [None] * maxSize
+        self._lock = asyncio.Lock()
+        self._notEmpty = asyncio.Condition( self._lock )
+        self._notFull = asyncio.Condition( self._lock )
+
+    def isEmpty( self ) :
+        return self._count == 0
+
+    def isFull( self ) :
+        return self._count == len(self._qArray)
+
+    def __len__( self ) :
+        return self._count
+
+    _enqueue = BlockingCQueue._enqueue
+    _dequeue = BlockingCQueue._dequeue
+
+    # Adds item to the queue, waiting until there is space for it.
+    async def put( self, item ) :
+        async with self._notFull :
+            await self._notFull.wait_for( lambda: self._count < len(self._qArray) )
+            self._enqueue( item )
+            self._notEmpty.notify()
+
+    # Removes and returns the next item, waiting until there is one.
+    async def get( self ) :
+        async with self._notEmpty :
+            await self._notEmpty.wait_for( lambda: self._count > 0 )
+            item = self._dequeue()
+            self._notFull.notify()
+            return item
+
+    # Removes and returns a list of up to n items, waiting until there is at least one.
+    async def get_many( self, n ) :
+        async with self._notEmpty :
+            await self._notEmpty.wait_for( lambda: self._count > 0 )
+            items = [self._dequeue() for i in range( min( n, self._count ) )]
+            self._notFull.notify( len( items ) )
+            return items
+
+
+if __name__ == "__main__":
+    bq = BlockingCQueue(5)
+
+    # A producer thread adding more items than fit in the queue at once.
+    producer = threading.Thread( target = lambda: [bq.put(i) for i in range(10)] )
+    producer.start()
+    for i in range(10):
+        print(bq.get())
+    producer.join()
+
+    async def main():
+        aq = AsyncCQueue(5)
+        async def produce():
+            for i in range(10):
+                await aq.put(i)
+        task = asyncio.ensure_future( produce() )
+        items = []
+        while len(items) < 10:
+            items += await aq.get_many(10)
+        await task
+        print(items)
+
+    asyncio.run( main() )
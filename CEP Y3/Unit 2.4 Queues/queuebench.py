@@ -0,0 +1,73 @@
+import sys
+import time
+import queue
+import asyncio
+import threading
+from TSQueue import BlockingCQueue, AsyncCQueue
+
+ITEMS = 200000
+SIZE = 1024
+BATCH = 256
+
+# Sends ITEMS items from a number of producer threads to one consumer thread
+# and returns the items per second.
+def threadbench( makeQueue, producers, batch = False ):
+    q = makeQueue()
+    each = ITEMS // producers
+    put = q.put
+    def produce():
+        for i in range( each ):
+            put( i )
+    threads = [threading.Thread( target = produce ) for i in range( producers )]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    received = 0
+    while received < each * producers:
+        if batch:
+            received += len( q.get_many( BATCH ) )
+        else:
+            q.get()
+            received += 1
+    for thread in threads:
+        thread.join()
+    return each * producers / (time.perf_counter() - start)
+
+# Same as threadbench, but with producer coroutines and a consumer coroutine in one event loop.
+def asyncbench( makeQueue, producers, batch = False ):
+    async def main():
+        q = makeQueue()
+        each = ITEMS // producers
+        async def produce():
+            for i in range( each ):
+                await q.put( i )
+        start = time.perf_counter()
+        tasks = [asyncio.ensure_future( produce() ) for i in range( producers )]
+        received = 0
+        while received < each * producers:
+            if batch:
+                received += len( await q.get_many( BATCH ) )
+            else:
+                await q.get()
+                received += 1
+        await asyncio.gather( *tasks )
+        return each * producers / (time.perf_counter() - start)
+    return asyncio.run( main() )
+
+# Throughput of BlockingCQueue and AsyncCQueue (one item and BATCH items at a time)
+# against the standard library queues, with 1, 4 and 16 producers.
+# Run with: python queuebench.py [producers producers ...]
+def main( counts = (1, 4, 16) ):
+    cases = [("queue.Queue", threadbench, lambda: queue.Queue( SIZE ), False),
+             ("BlockingCQueue", threadbench, lambda: BlockingCQueue( SIZE ), False),
+             ("BlockingCQueue get_many", threadbench, lambda: BlockingCQueue( SIZE ), True),
+             ("asyncio.Queue", asyncbench, lambda: asyncio.Queue( SIZE ), False),
+             ("AsyncCQueue", asyncbench, lambda: AsyncCQueue( SIZE ), False),
+             ("AsyncCQueue get_many", asyncbench, lambda: AsyncCQueue( SIZE ), True)]
+    print("%-26s %-10s %-12s" % ("queue", "producers", "items/s"))
+    for name, bench, makeQueue, batch in cases:
+        for producers in counts:
+            print("%-26s %-10d %-12d" % (name, producers, bench( makeQueue, producers, batch )))
+
+if __name__ == "__main__":
+    main( *[[int(count) for count in sys.argv[1:]]] if sys.argv[1:] else [] )
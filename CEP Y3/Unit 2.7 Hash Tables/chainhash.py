@@ -1,13 +1,89 @@
 import sys
 import math
+import zlib
 import ctypes
 from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 if sys.version_info[0] == 3:
     _get_byte = lambda c: c
 else:
     _get_byte = ord
 
+FNV64_OFFSET = 0xcbf29ce484222325
+FNV64_PRIME = 0x100000001b3
+MASK64 = 2**64 - 1
+
+def _tobytes(key):
+    """
+    Converts strings, bytes and integers into bytes for hashing
+    (integers are hashed by their digits, anything else by its repr)
+    """
+    if isinstance(key, str):
+        return key.encode("utf-8")
+    if isinstance(key, (bytes, bytearray)):
+        return bytes(key)
+    if isinstance(key, int):
+        return str(key).encode("utf-8")
+    return repr(key).encode("utf-8")
+
+def fnv1a(key):
+    """
+    64-bit FNV-1a hash of the key: each byte is XORed in before multiplying,
+    and every bit of the 64-bit value is kept so large tables get distinct indexes.
+
+    Example usage:
+    >>> print(fnv1a("Tom"))
+    7855070609185612267                                                """
+    hval = FNV64_OFFSET
+    for byte in _tobytes(key):
+        hval = ((hval ^ _get_byte(byte)) * FNV64_PRIME) & MASK64
+    return hval
+
+def crc32(key):
+    """32-bit CRC of the key using zlib (written in C, so much faster than FNV-1a in Python)"""
+    return zlib.crc32(_tobytes(key)) & 0xffffffff
+
+def pyhash(key):
+    """Python's built-in hash of the key as an unsigned 64-bit value (fastest, but changes between runs for strings)"""
+    return hash(key) & MASK64
+
+HASHERS = {"fnv1a": fnv1a, "crc32": crc32, "python": pyhash}
+
+#Hashers which can give other hashes in another process (Python's string hash has a random seed in
+#each process, and processes started with spawn, the default on Windows and macOS, get their own),
+#so hashkeys never sends them to worker processes
+LOCAL_HASHERS = (pyhash,)
+
+#Below this many keys, starting worker processes takes longer than hashing everything in one process
+PARALLEL_MIN = 100000
+
+def _hashchunk(hasher, keys):
+    """Hashes a list of keys (run in the worker processes of hashkeys)"""
+    return [hasher(key) for key in keys]
+
+def hashkeys(hasher, keys, workers=None):
+    """
+    Hashes a list of keys in one batch, returning their hashes in the same order.
+
+    If workers is given and there are at least PARALLEL_MIN keys, the keys are split into chunks
+    and hashed in that many separate processes (the hasher must then be a function defined at the
+    top of a module, like the ones in HASHERS, so it can be sent to the other processes, and must
+    give the same hash in every process).  Hashers in LOCAL_HASHERS are always run in this process.
+
+    Example usage:
+    >>> print(hashkeys(crc32, ["Tom", "Jerry"]))
+    [1167209971, 3141328406]                                               """
+    if not workers or len(keys) < PARALLEL_MIN or hasher in LOCAL_HASHERS:
+        return list(map(hasher, keys))
+    size = -(-len(keys) // (workers * 4))
+    chunks = [keys[i:i+size] for i in range(0, len(keys), size)]
+    hashes = []
+    with ProcessPoolExecutor(workers) as executor:
+        for part in executor.map(_hashchunk, [hasher] * len(chunks), chunks):
+            hashes.extend(part)
+    return hashes
+
 class HashTable:
     """
     Hash table that uses separate chaining to assign to assign key-value pairs
@@ -16,20 +92,56 @@ class HashTable:
     by chaining values together in a list in the index(hashed key),
     and the FNV1 hash which is fast and random allows for more even spacing between
     values, reducing lookup times.
+
+    The hash function can be swapped out (64-bit FNV-1a by default, zlib's CRC32, Python's
+    hash, or any function of the key returning an integer). The full hash of each key is
+    stored in its chain alongside the key and value, so resizing never hashes a key again.
+
+    Adding a key already in the table replaces its value, and the array grows by itself
+    once there are more than <maxload> key-value pairs per index, so chains stay short.
+    With incremental resizing, the old array is moved over a few indexes per add/remove
+    instead of all at once, so no single add has to wait for the whole table to be rehashed.
     """
 
-    def __init__(self,size):
+    def __init__(self,size,hasher="fnv1a",maxload=1.0,incremental=False):
         """
         Initializes hash table array to the size specified. Prime numbers recommended.
 
+        The hasher can be "fnv1a" (default), "crc32", "python", or a function
+        which takes a key and returns an integer.
+
+        The array doubles in size when the number of key-value pairs exceeds maxload
+        times its length (1.0 by default, None turns automatic resizing off).
+        If incremental is True, the key-value pairs are moved into the new array bit by bit.
+
         Example usage:
-        >>> a = HashTable(37)                                                    """
+        >>> a = HashTable(37)
+        >>> b = HashTable(37, hasher="crc32")
+        >>> c = HashTable(37, maxload=0.75, incremental=True)                   """
 
+        assert maxload is None or maxload > 0, "Maximum load must be positive"
+
+        #Picks hash function
+        if callable(hasher):
+            self._hash = hasher
+        elif hasher in HASHERS:
+            self._hash = HASHERS[hasher]
+        else:
+            raise ValueError("Hasher must be a function or one of: " + ", ".join(HASHERS))
         #Initializes array and variables
         self._size = size
         self._taken = 0
+        self._count = 0
+        self._maxload = maxload
+        self._incremental = incremental
         PyArrayType  =  ctypes.py_object * self._size
         self._data = PyArrayType(*([None] * self._size))
+        #Old array (and how many of its indexes were moved) while resizing incrementally
+        self._olddata = None
+        self._oldsize = 0
+        self._moved = 0
+        #Moving this many old indexes per add/remove always finishes before the next resize
+        self._step = int(2 / maxload) + 1 if maxload else 1
 
     def __len__(self):
         """
@@ -61,6 +173,7 @@ class HashTable:
             Tom : Jerry                                                                                """
 
         #Heavily formats array into a readable format
+        self.__finish()
         string = ""
         substring = ""
         for index in range(self._size):
@@ -102,6 +215,7 @@ class HashTable:
         Jerry                                         """
 
         values = deque()
+        self.__finish()
         #Loops through original array
         for item in self._data:
             #ignores None values
@@ -123,67 +237,89 @@ class HashTable:
         "Same as self.remove(key): " + self.remove.__doc__
         return self.remove(key)
 
-    def __fnv1(self,data):
-        """
-        Function(hidden) that converts integers and strings into bytes
-        before hashing them into index values using the FNV1 algorithm,
-        designed for speed and randomness for less collisions.
-        """
-
-        #The hash has problems with 0, so it's converted to a string
-        if data == 0:
-            data = "0"
-        #Converts integers and strings to bytes
-        if isinstance(data, int):
-            data = bytes(data)
-        else:
-            data = bytes(data, 'utf-8')
-        #Hashes bytes through the __fnv1 algorithm into a 32-bit value
-        hval = 0x811c9dc5
-        for byte in data:
-            hval = (hval * 0x01000193) % (2**16)
-            hval = hval ^ _get_byte(byte)
-        #Returns modulus of hashed value by the size of the hash table
-        return hval % self._size
-
-    def __chain(self,key,value):
+    def __chain(self,key,value,hval):
         """
         Function(hidden) that adds value to the list in the index of the array.
         Since the collections.deque object has O(1) append time, this action is pretty fast.
+        The full hash is stored with the key and value so it never has to be worked out again.
         """
-        #Hashes the key into the index
-        index = self.__fnv1(key)
+        #Reduces the hash into the index
+        index = hval % self._size
         #Starts chain if it doesn't exist yet
         if self._data[index] is None:
             self._taken += 1
             self._data[index] = deque()
         #Adds value to deque in index
-        self._data[index].append((key,value))
+        self._data[index].append((key,value,hval))
 
-    def __search(self,key):
+    def __search(self,key,hval):
         """
-        Function(hidden) that attempts to find the value in the chain which
-        the key maps to. If the key is not found, None is returned.
+        Function(hidden) that attempts to find the position in the chain which
+        the key maps to. Returns the array, index and position, or None, None, None if not found.
+        While resizing incrementally, indexes of the old array not yet moved are searched too.
         """
-        #Hashes the key into the index
-        index = self.__fnv1(key)
+        places = [(self._data, hval % self._size)]
+        if self._olddata is not None and hval % self._oldsize >= self._moved:
+            places.append((self._olddata, hval % self._oldsize))
         #Search through any non-empty chains in the index
-        if self._data[index] is not None:
-            for i in range(len(self._data[index])):
-                if self._data[index][i][0] is key:
-                    return index, self._data[index][i][1]
-        #If the index is empty, return None, None
-        return None, None
+        for data, index in places:
+            if data[index] is not None:
+                for i in range(len(data[index])):
+                    #Compares the stored hash first, which is much cheaper than comparing keys
+                    if data[index][i][2] == hval and data[index][i][0] == key:
+                        return data, index, i
+        #If the index is empty, return None, None, None
+        return None, None, None
+
+    def __migrate(self,steps):
+        """
+        Function(hidden) that moves the chains in the next <steps> indexes
+        of the old array into the new one, while resizing incrementally.
+        """
+        end = min(self._moved + steps, self._oldsize)
+        for index in range(self._moved, end):
+            item = self._olddata[index]
+            if item is not None:
+                self._olddata[index] = None
+                self._taken -= 1
+                for subitem in item:
+                    self.__chain(subitem[0], subitem[1], subitem[2])
+        self._moved = end
+        #Old array is dropped once everything is moved
+        if end == self._oldsize:
+            self._olddata = None
+            self._oldsize = 0
+            self._moved = 0
+
+    def __finish(self):
+        """Function(hidden) that finishes any incremental resize in progress"""
+        if self._olddata is not None:
+            self.__migrate(self._oldsize)
+
+    def __grow(self):
+        """
+        Function(hidden) that doubles the array once there are too many key-value pairs per index,
+        either all at once or (if incremental) by keeping the old array to be moved over later.
+        """
+        size = self._size * 2 + 1
+        if not self._incremental:
+            self.rehash(size)
+            return
+        self.__finish()
+        self._olddata, self._oldsize, self._moved = self._data, self._size, 0
+        self._size = size
+        PyArrayType  =  ctypes.py_object * self._size
+        self._data = PyArrayType(*([None] * self._size))
 
     def add(self,key,value):
         """
         Function that assigns value to the hash table array using the
         FNV1-hashed version of the key as the array index
 
-        Two of the same keys CAN be used in one table, but when searching,
-        only the value of the first instance of the key will be returned until it is removed
+        If the key is already in the table, its value is replaced.
+        The array grows automatically once the table is more than <maxload> full.
 
-        Time complexity: O(1)
+        Time complexity(average): O(1)
 
         Example usage:
         >>> a = HashTable(4)
@@ -195,9 +331,56 @@ class HashTable:
         2   None
         3   Jerry : Tom
             Tom : Jerry                                             """
+        self.__put(key, value, self._hash(key))
+
+    def __put(self,key,value,hval):
+        """
+        Function(hidden) that adds or replaces a key-value pair whose key has already been hashed,
+        growing the array if needed.
+        """
+        if self._olddata is not None:
+            self.__migrate(self._step)
+        #Replaces value if key is already in the table
+        data, index, position = self.__search(key, hval)
+        if data is not None:
+            data[index][position] = (key, value, hval)
+            return
         #Chains value to the chain in that index
         #The collection.deque allows appending to be O(1), hence the fast speed
-        self.__chain(key, value)
+        self.__chain(key, value, hval)
+        self._count += 1
+        if self._maxload and self._count > self._size * self._maxload:
+            self.__grow()
+
+    @classmethod
+    def from_items(cls,items,expected_size=None,workers=None,**options):
+        """
+        Function that builds a hash table from an iterable of (key, value) pairs in one go.
+
+        The array is sized once for expected_size pairs (the number of pairs by default),
+        so it never has to grow while the pairs are added, and all the keys are hashed in
+        one batch first (across <workers> processes if given, for very large inputs).
+        Any other options (hasher, maxload, incremental) are passed on to HashTable().
+        Like add(), a key given more than once keeps the last value.
+
+        Time complexity: O(n)
+
+        Example usage:
+        >>> a = HashTable.from_items([("Jerry", "Tom"), ("Tom", "Jerry")])
+        >>> print(a.get("Tom"))
+        Jerry
+        >>> b = HashTable.from_items(enumerate(open("db.txt")), hasher="crc32")
+        >>> print(b.count())
+        100                                                                 """
+
+        items = items if isinstance(items, list) else list(items)
+        if expected_size is None:
+            expected_size = len(items)
+        table = cls(int(expected_size / (options.get("maxload", 1.0) or 1.0)) + 1, **options)
+        hashes = hashkeys(table._hash, [item[0] for item in items], workers)
+        for (key, value), hval in zip(items, hashes):
+            table.__put(key, value, hval)
+        return table
 
     def get(self,key):
         """
@@ -212,7 +395,10 @@ class HashTable:
         >>> a.add("Jerry", "Tom")
         >>> print(a.get("Jerry"))
         Tom                                                                                                 """
-        return self.__search(key)[1]
+        data, index, position = self.__search(key, self._hash(key))
+        if data is None:
+            return None
+        return data[index][position][1]
 
     def remove(self,key):
         """
@@ -239,17 +425,36 @@ class HashTable:
         2   None
         3   Jerry : Tom                                                                """
 
-        index = self.__search(key)
-        try:
-            #removes value from the deque in the index
-            self._data[index[0]].remove((key,index[1]))
-            if len(self._data[index[0]]) == 0:
-                #account for loss of a filled deque
-                self._taken -= 1
-            return index
-        #return None if index is not a deque object
-        except ValueError:
+        if self._olddata is not None:
+            self.__migrate(self._step)
+        data, index, position = self.__search(key, self._hash(key))
+        if data is None:
             return None
+        #removes value from the deque in the index
+        chain = data[index]
+        value = chain[position][1]
+        del chain[position]
+        self._count -= 1
+        if len(chain) == 0:
+            #account for loss of a filled deque
+            data[index] = None
+            self._taken -= 1
+        return index, value
+
+    def count(self):
+        """
+        Function that returns the number of key-value pairs in the table
+        (unlike len(), which returns the length of the array)
+
+        Time complexity: O(1)
+
+        Example usage:
+        >>> a = HashTable(37)
+        >>> a.add("Jerry", "Tom")
+        >>> a.add("Jerry", "Spike")
+        >>> print(a.count())
+        1                                                                    """
+        return self._count
 
     def used(self):
         """
@@ -313,15 +518,41 @@ class HashTable:
         >>> print(len(a))
         128                                                                              """
 
+        self.__finish()
         self._size = size
         self._taken = 0
         self._olddata = self._data
         #Makes new array of specified size
         PyArrayType  =  ctypes.py_object * self._size
         self._data = PyArrayType(*([None] * self._size))
-        #If index is not None, it is added to the new array
+        #If index is not None, it is added to the new array using its stored hash
         for item in self._olddata:
             if item is not None:
                 for subitem in item:
-                    self.add(subitem[0], subitem[1])
-        self._olddata = 0
+                    self.__chain(subitem[0], subitem[1], subitem[2])
+        self._olddata = None
+
+    def stats(self):
+        """
+        Function that reports how evenly keys are spread through the array:
+        the number of key-value pairs, the longest chain, the average length
+        of non-empty chains, and the fraction of the array that is empty.
+
+        Time complexity: O(n)
+
+        Example usage:
+        >>> a = HashTable(4)
+        >>> a.add("Jerry", "Tom")
+        >>> a.add("Tom", "Jerry")
+        >>> print(a.stats())
+        {'size': 4, 'entries': 2, 'chains': 1, 'max': 2, 'avg': 2.0, 'empty': 0.75}       """
+
+        self.__finish()
+        lengths = [len(item) for item in self._data if item is not None]
+        entries = sum(lengths)
+        return {"size": self._size,
+                "entries": entries,
+                "chains": len(lengths),
+                "max": max(lengths) if lengths else 0,
+                "avg": entries / len(lengths) if lengths else 0.0,
+                "empty": 1 - len(lengths) / self._size}
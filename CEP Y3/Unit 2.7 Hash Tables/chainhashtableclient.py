@@ -1,3 +1,6 @@
+import sys
+import time
+import random
 from chainhash import HashTable
 
 def chainhashclient():
@@ -8,7 +11,8 @@ def chainhashclient():
     testfile = open("db.txt").readlines()
 #-------------INITIALIZATION-------------------
     """Initialization: Prime numbers recommended for size"""
-    a = HashTable(257)
+    #automatic resizing is turned off for a, so checkrehash can be shown below
+    a = HashTable(257, maxload=None)
     b = HashTable(127)
 
     print("~~~~~~~~~~~~~~ANALYSIS FOR IMPORTANT FUNCTIONS~~~~~~~~~~~~~~~\n")
@@ -75,8 +79,42 @@ def chainhashclient():
     print("\nAfter checking and rehashing:")
     a.checkrehash()
     print(len(a), a.used())
+#-----------------------------------------------------------
+#-----------------------FROM_ITEMS--------------------------
+    print("\nHashTable.from_items(items, expected_size, workers):\n" + HashTable.from_items.__doc__)
+    #builds the whole table at once instead of adding line by line
+    c = HashTable.from_items(enumerate(testfile))
+    print("\nLength and number of key-value pairs after building from all testitems:")
+    print(len(c), c.count())
 #-----------------------------------------------------------
     print("~~~~~~END OF ANALYSIS FOR SEPARATE CHAINING HASH TABLE~~~~~~~")
 
-chainhashclient()
-print("\n" +chainhashclient.__doc__)
+def chainhashbench(sizes=(10**3, 10**4, 10**5, 10**6), lookups=100000, incremental=False):
+    """Benchmark of lookup time as the table grows by itself from a size of 17.
+    Run with: python chainhashtableclient.py bench [incremental]
+    With automatic resizing, the time per lookup should stay about the same for every size."""
+
+    print("%-10s %-10s %-12s %-10s %-10s" % ("keys", "size", "insert(s)", "get(us)", "max chain"))
+    for n in sizes:
+        keys = ["key" + str(i) for i in range(n)]
+        random.Random(n).shuffle(keys)
+        table = HashTable(17, incremental=incremental)
+        start = time.perf_counter()
+        for key in keys:
+            table.add(key, key)
+        insert = time.perf_counter() - start
+        #looks up random keys that are in the table
+        picks = [keys[random.randrange(n)] for i in range(lookups)]
+        start = time.perf_counter()
+        for key in picks:
+            table.get(key)
+        get = (time.perf_counter() - start) / lookups * 10**6
+        stats = table.stats()
+        print("%-10d %-10d %-12.2f %-10.2f %-10d" % (n, len(table), insert, get, stats["max"]))
+
+if __name__ == "__main__":
+    if "bench" in sys.argv[1:]:
+        chainhashbench(incremental="incremental" in sys.argv[1:])
+    else:
+        chainhashclient()
+        print("\n" +chainhashclient.__doc__)
@@ -0,0 +1,405 @@
+import os
+import math
+import mmap
+import zlib
+import struct
+from collections import deque
+
+MAGIC = b"CEPHASH1"
+#Magic, number of slots, number of keys, number of deleted slots, bytes used in the heap
+HEADER = struct.Struct("<8sQQQQ")
+#State, hash, key offset, value offset, key length, value length (32 bytes per slot)
+SLOT = struct.Struct("<BxxxIQQII")
+EMPTY, USED, DELETED = 0, 1, 2
+#Slots in use (including deleted ones) allowed before the table is rehashed
+MAXLOAD = 0.75
+#Bytes the heap starts with, doubled whenever it runs out
+HEAPSTART = 4096
+
+def _encode(data):
+    """Function that converts a string, integer or bytes into bytes tagged with its type"""
+    if isinstance(data, str):
+        return b"s" + data.encode("utf-8")
+    if isinstance(data, int) and not isinstance(data, bool):
+        return b"i" + str(data).encode("ascii")
+    if isinstance(data, (bytes, bytearray)):
+        return b"b" + bytes(data)
+    raise TypeError("Only strings, integers and bytes can be stored, not " + type(data).__name__)
+
+def _decode(data):
+    """Function that converts tagged bytes from _encode back into a string, integer or bytes"""
+    tag, data = data[:1], data[1:]
+    if tag == b"s":
+        return data.decode("utf-8")
+    if tag == b"i":
+        return int(data)
+    return data
+
+class HashTable:
+    """
+    Hash table stored in a memory-mapped file, using quadratic probing to assign key-value pairs
+
+    The file holds a header (number of slots, number of keys, number of deleted slots and bytes
+    used in the heap), an array of fixed-size slots, and a heap of the key and value bytes.
+    Each slot holds the hash of its key and where its key and value are in the heap, so a
+    probe only reads the slot, and a key is only read from the heap when the hashes match.
+    Since the file is memory-mapped rather than read, opening a table of any size is instant,
+    and a lookup only touches the pages of the slots it probes and the key and value it finds.
+
+    Keys and values can be strings, integers or bytes. The keys are hashed with CRC32, which
+    (unlike Python's hash) gives the same hash every run, so the table can be reopened.
+
+    Like the quadratic probing HashTable, removing a key leaves a deleted slot behind for the
+    probe to continue past. The table size (a power of 2) doubles once more than 3/4 of the slots
+    are in use, and rehashing writes a fresh file, which also drops deleted slots and old values.
+    """
+
+    def __init__(self, filename, size=64, autocal=False):
+        """
+        Opens the hash table stored in the file given, or creates a new one of the size given
+        (64 by default) if the file does not exist yet.
+
+        The size must be a power of 2. AssertionError raised if the table size given
+        is not a power if 2 (unless autocal is enabled).
+
+        Example usage:
+        >>> a = HashTable("students.hash")
+        >>> a.add("20001051", "WEE BOWEN")
+        >>> a.close()
+        >>> b = HashTable("students.hash")
+        >>> print(b.get("20001051"))
+        WEE BOWEN                                                                                     """
+
+        self._filename = filename
+        self._map = None
+        if not os.path.exists(filename):
+            if autocal:
+                size = 2 ** max(1, math.ceil(math.log2(size)))
+            assert math.log2(size).is_integer(), "Hash table size must be a power of 2"
+            self.__create(filename, size, HEAPSTART)
+        self.__open()
+
+    def __len__(self):
+        """
+        Returns current length of hash table array (number of slots)
+
+        Time complexity: O(1)
+
+        Example usage:
+        >>> a = HashTable("students.hash", 64)
+        >>> print(len(a))
+        64                                     """
+        return self._size
+
+    def __str__(self):
+        """
+        Returns string of hash table array, containing (in order) each array index, key and value it maps to
+
+        Time complexity: O(n)
+
+        Example usage:
+        >>> a = HashTable("tom.hash", 4)
+        >>> a.add("Tom" , "Tom")
+        >>> print(a)
+        0    None
+        1    None
+        2    None
+        3    Tom : Tom                                                                                       """
+
+        string = ""
+        for i in range(self._size):
+            slot = self.__slot(i)
+            if slot[0] == USED:
+                string += str(i) + "    " + str(self.__read(slot[2], slot[4])) + " : " + str(self.__read(slot[3], slot[5])) + "\n"
+            else:
+                string += str(i) + "    None\n"
+        return string
+
+    __repr__ = __str__
+
+    def __iter__(self):
+        """
+        Loops through the values (not keys) of the hash table
+
+        Time complexity: O(n)
+
+        Example usage:
+        >>> a = HashTable("tom.hash", 4)
+        >>> a.add("Tom", "Tom")
+        >>> for i in a:
+        >>>     print(i)
+        Tom                                                       """
+
+        values = deque()
+        for key, value in self.items():
+            values.append(value)
+        return iter(values)
+
+    def __contains__(self, key):
+        """Returns whether the key is in the hash table"""
+        return self.__find(_encode(key))[0] is not None
+
+    def __setitem__(self,key,value):
+        "Same as self.add(key,value): " + self.add.__doc__
+        self.add(key, value)
+
+    def __getitem__(self,key):
+        "Same as self.get(key): " + self.get.__doc__
+        return self.get(key)
+
+    def __delitem__(self,key):
+        "Same as self.remove(key): " + self.remove.__doc__
+        return self.remove(key)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __create(self, filename, size, heapsize):
+        """Function(hidden) that writes an empty table file (the slots and heap are left as zeroes)"""
+        with open(filename, "wb") as file:
+            file.write(HEADER.pack(MAGIC, size, 0, 0, 0))
+            #truncating fills the rest of the file with zeroes without writing them
+            file.truncate(HEADER.size + size * SLOT.size + heapsize)
+
+    def __open(self):
+        """Function(hidden) that memory-maps the file and reads its header (nothing else is read)"""
+        self._file = open(self._filename, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, self._size, self._taken, self._deleted, self._heapend = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(self._filename + " is not a hash table file")
+        self._mask = self._size - 1
+        self._heapstart = HEADER.size + self._size * SLOT.size
+
+    def __writeheader(self):
+        """Function(hidden) that updates the counts in the header"""
+        HEADER.pack_into(self._map, 0, MAGIC, self._size, self._taken, self._deleted, self._heapend)
+
+    def __slot(self, index):
+        """Function(hidden) that returns (state, hash, key offset, value offset, key length, value length) of a slot"""
+        return SLOT.unpack_from(self._map, HEADER.size + index * SLOT.size)
+
+    def __read(self, offset, length):
+        """Function(hidden) that returns the decoded key or value at an offset in the heap"""
+        start = self._heapstart + offset
+        return _decode(self._map[start:start + length])
+
+    def __store(self, data):
+        """
+        Function(hidden) that adds bytes to the end of the heap and returns their offset.
+        If the heap is full, the file is made bigger (the heap doubles) and mapped again.
+        """
+        offset = self._heapend
+        if self._heapstart + offset + len(data) > len(self._map):
+            heapsize = max(2 * (len(self._map) - self._heapstart), offset + len(data))
+            self._map.close()
+            self._file.truncate(self._heapstart + heapsize)
+            self._map = mmap.mmap(self._file.fileno(), 0)
+        start = self._heapstart + offset
+        self._map[start:start + len(data)] = data
+        self._heapend += len(data)
+        return offset
+
+    def __find(self, rawkey):
+        """
+        Function(hidden) that follows the quadratic probe of the key, returning the index of the key
+        (None if not found), the first empty or deleted slot passed (where the key would be added),
+        and the hash of the key.
+        """
+
+        hval = zlib.crc32(rawkey)
+        baseindex = hval & self._mask
+        testindex, free = baseindex, None
+        for i in range(1, self._size+1):
+            state, shash, keyoff, valueoff, keylen, valuelen = self.__slot(testindex)
+            if state == EMPTY:
+                return None, (testindex if free is None else free), hval
+            if state == DELETED:
+                if free is None:
+                    free = testindex
+            #Only reads the key from the heap if the hashes match
+            elif shash == hval and keylen == len(rawkey):
+                start = self._heapstart + keyoff
+                if self._map[start:start + keylen] == rawkey:
+                    return testindex, free, hval
+            #Applies probe and tries again if it fails
+            testindex = (baseindex + (i*i+i)//2) & self._mask
+        return None, free, hval
+
+    def add(self,key,value):
+        """
+        Function that assigns the given value to the hash table with the hashed key as the starting index
+        If the key is already in the table, its value is replaced.
+
+        Also doubles array size if more than 3/4 of the slots are in use
+
+        Time complexity(average): O(1)
+        Time complexity(worst-case): O(n)
+
+        Example usage:
+        >>> a = HashTable("tom.hash", 4)
+        >>> a.add("Jerry", "Tom")
+        >>> print(a.get("Jerry"))
+        Tom                                                     """
+
+        rawkey, rawvalue = _encode(key), _encode(value)
+        #Rehashes when too many slots are in use (to the same size if most of them are deleted slots)
+        if self._taken + self._deleted + 1 > self._size * MAXLOAD:
+            self.rehash(self._size * 2 if self._taken + 1 > self._size * MAXLOAD / 2 else self._size)
+        index, free, hval = self.__find(rawkey)
+        if index is not None:
+            #Replaces value (the old value is left in the heap until the next rehash)
+            state, shash, keyoff, valueoff, keylen, valuelen = self.__slot(index)
+            valueoff = self.__store(rawvalue)
+            SLOT.pack_into(self._map, HEADER.size + index * SLOT.size, USED, hval, keyoff, valueoff, keylen, len(rawvalue))
+        else:
+            if self.__slot(free)[0] == DELETED:
+                self._deleted -= 1
+            keyoff = self.__store(rawkey)
+            valueoff = self.__store(rawvalue)
+            SLOT.pack_into(self._map, HEADER.size + free * SLOT.size, USED, hval, keyoff, valueoff, len(rawkey), len(rawvalue))
+            self._taken += 1
+        self.__writeheader()
+
+    def get(self,key):
+        """
+        Function that retrieves and returns the value which the given key maps to
+        If the key is not in the hash table, it returns None.
+
+        Time complexity(average): O(1)
+        Time complexity(worst-case): O(n)
+
+        Example usage:
+        >>> a = HashTable("tom.hash", 4)
+        >>> a.add("Jerry", "Tom")
+        >>> print(a.get("Jerry"))
+        Tom                                                                             """
+
+        index = self.__find(_encode(key))[0]
+        if index is None:
+            return None
+        slot = self.__slot(index)
+        return self.__read(slot[3], slot[5])
+
+    def remove(self,key):
+        """
+        Function that removes the key-value pair with the given key and returns the value,
+        leaving a deleted slot behind which the probe continues past.
+        If the key is not in the hash table, it returns None.
+
+        Time complexity(average): O(1)
+        Time complexity(worst-case): O(n)
+
+        Example usage:
+        >>> a = HashTable("tom.hash", 4)
+        >>> a.add("Jerry", "Tom")
+        >>> print(a.remove("Jerry"))
+        Tom
+        >>> print(a.get("Jerry"))
+        None                                                                        """
+
+        index = self.__find(_encode(key))[0]
+        if index is None:
+            return None
+        slot = self.__slot(index)
+        value = self.__read(slot[3], slot[5])
+        SLOT.pack_into(self._map, HEADER.size + index * SLOT.size, DELETED, 0, 0, 0, 0, 0)
+        self._taken -= 1
+        self._deleted += 1
+        self.__writeheader()
+        return value
+
+    def items(self):
+        """
+        Function that loops through all (key, value) pairs of the hash table
+
+        Time complexity: O(n)
+
+        Example usage:
+        >>> a = HashTable("tom.hash", 4)
+        >>> a.add("Tom", "Jerry")
+        >>> for i in a.items():
+        >>>     print(i)
+        ('Tom', 'Jerry')                                                  """
+
+        for i in range(self._size):
+            slot = self.__slot(i)
+            if slot[0] == USED:
+                yield self.__read(slot[2], slot[4]), self.__read(slot[3], slot[5])
+
+    def used(self):
+        """
+        Function that returns the number of keys in the hash table
+
+        Time complexity: O(1)
+
+        E.g:
+        >>> a = HashTable("tom.hash", 4)
+        >>> a.add("Tom", "Tom")
+        >>> a.add(1, "hi")
+        >>> print(a.used())
+        2                                                                   """
+        return self._taken
+
+    def rehash(self,size,autocal=False):
+        """
+        Function that resizes the hash table to the specified size by writing a new file
+        with every key-value pair, which also drops deleted slots and replaced values.
+
+        The specified size must be a power of 2 and able to fit all elements.
+        If not, AssertionError is raised (unless autocal is enabled).
+
+        Time complexity: O(n)
+
+        Example usage:
+        >>> a = HashTable("tom.hash")
+        >>> a.rehash(128)
+        >>> print(len(a))
+        128                                                                              """
+
+        if autocal:
+            size = 2 ** max(1, math.ceil(math.log2(size)))
+        assert math.log2(size).is_integer(), "Hash table size must be a power of 2"
+        assert self._taken <= size * MAXLOAD, "Existing elements cannot fit within array of size specified"
+        newname = self._filename + ".rehash"
+        if os.path.exists(newname):
+            os.remove(newname)
+        self.__create(newname, size, max(self._heapend, HEAPSTART))
+        newtable = HashTable(newname)
+        for key, value in self.items():
+            newtable.add(key, value)
+        newtable.close()
+        self.close()
+        os.replace(newname, self._filename)
+        self.__open()
+
+    def flush(self):
+        """
+        Function that makes sure every change so far is written to the file
+
+        Time complexity: O(n) (only for the pages that were changed)
+
+        Example usage:
+        >>> a = HashTable("tom.hash")
+        >>> a.add("Tom", "Jerry")
+        >>> a.flush()                                                                 """
+        self.__writeheader()
+        self._map.flush()
+
+    def close(self):
+        """
+        Function that flushes and closes the file (the table cannot be used afterwards)
+
+        Example usage:
+        >>> a = HashTable("tom.hash")
+        >>> a.close()                                                                 """
+        if self._map is not None and not self._map.closed:
+            if self._map[:len(MAGIC)] == MAGIC:
+                self.flush()
+            self._map.close()
+        self._file.close()
@@ -0,0 +1,295 @@
+import os
+import sys
+import time
+import ctypes
+import random
+import tempfile
+import tracemalloc
+import quadhash
+import robinhash
+import chainhash
+import diskhash
+
+#ds_hashtable (the cuckoo hash table of the Final Project) is in another folder
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Unit 2.10 Final Project"))
+import ds_hashtable
+
+class TupleQuadTable:
+    """
+    The old layout of quadhash.HashTable, for memorybench: one ctypes array of (key, value) tuples,
+    so every add makes a tuple and every probe reads the key out of a tuple (no cached hashes).
+    The hash and the probe are the same as quadhash, so only the layout is different.
+    """
+
+    def __init__(self, size):
+        self._size = size
+        self._data = (ctypes.py_object * size)(*[(None, None)] * size)
+
+    def add(self, key, value):
+        data, baseindex = self._data, quadhash.fnv1(key) % self._size
+        testindex = baseindex
+        for i in range(1, self._size+1):
+            if data[testindex][0] is None:
+                data[testindex] = (key, value)
+                return
+            testindex = (baseindex + (i*i+i)//2) % self._size
+
+    def get(self, key):
+        data, baseindex = self._data, quadhash.fnv1(key) % self._size
+        testindex = baseindex
+        for i in range(1, self._size+1):
+            slot = data[testindex]
+            if slot[0] == key:
+                return slot[1]
+            elif slot[0] is None:
+                return None
+            testindex = (baseindex + (i*i+i)//2) % self._size
+        return None
+
+class TupleCuckooTable:
+    """
+    The old layout of ds_hashtable.HashTable, for memorybench: one ctypes array of (key, value) tuples,
+    with the same two hashes and cuckoo kicks as ds_hashtable, but keys compared without cached hashes.
+    """
+
+    _hash = ds_hashtable.HashTable._hash
+    _fnv1 = ds_hashtable.HashTable._fnv1
+    _crc32 = ds_hashtable.HashTable._crc32
+
+    def __init__(self, size):
+        self.size = size
+        self.data = (ctypes.py_object * size)(*[(None, None)] * size)
+
+    def __setitem__(self, key, value):
+        data, prev = self.data, None
+        for kicks in range(self.size + 1):
+            hval = self._hash(key)
+            hash1, hash2 = (hval >> 32) % self.size, (hval & 0xFFFFFFFF) % self.size
+            if data[hash1][0] is None or data[hash1][0] == key:
+                data[hash1] = (key, value)
+                return
+            if data[hash2][0] is None or data[hash2][0] == key:
+                data[hash2] = (key, value)
+                return
+            index = hash2 if hash1 == prev else hash1
+            (key, value), data[index] = data[index], (key, value)
+            prev = index
+        raise RuntimeError("the old layout bench table is too small for the keys")
+
+    def __getitem__(self, key):
+        hval = self._hash(key)
+        hash1 = (hval >> 32) % self.size
+        if self.data[hash1][0] == key: return self.data[hash1][1]
+        hash2 = (hval & 0xFFFFFFFF) % self.size
+        if self.data[hash2][0] == key: return self.data[hash2][1]
+        return None
+
+def mixedbench(table, n, ops, seed):
+    """
+    Runs a workload on an empty table and returns the seconds taken by each phase:
+    insert n keys, then <ops> rounds of churn (delete a key, insert a new one, look up a key
+    that was deleted), then <ops> lookups of keys that are not in the table.
+    Churn leaves tombstones behind in the quadratic probing table, which slows down misses.
+    """
+
+    rand = random.Random(seed)
+    keys = ["key" + str(i) for i in range(n)]
+    live = list(keys)
+    times = []
+
+    start = time.perf_counter()
+    for key in keys:
+        table.add(key, key)
+    times.append(time.perf_counter() - start)
+
+    newkeys = ["new" + str(i) for i in range(ops)]
+    picks = [rand.randrange(n) for i in range(ops)]
+    start = time.perf_counter()
+    for i in range(ops):
+        #swaps a random live key for a new one, then looks up the deleted key
+        old = live[picks[i]]
+        table.remove(old)
+        table.add(newkeys[i], i)
+        live[picks[i]] = newkeys[i]
+        table.get(old)
+    times.append(time.perf_counter() - start)
+
+    misses = ["miss" + str(i) for i in range(ops)]
+    start = time.perf_counter()
+    for key in misses:
+        table.get(key)
+    times.append(time.perf_counter() - start)
+    return times
+
+def hashtablebench(sizes=(10**3, 10**4), ops=2000):
+    """Benchmark of the quadratic probing table against the Robin Hood table (times are per operation)
+    Run with: python hashtablebench.py [size size ...]"""
+
+    print("%-10s %-10s %-12s %-12s %-12s" % ("table", "keys", "insert(us)", "churn(us)", "miss(us)"))
+    for n in sizes:
+        tables = (("quadhash", quadhash.HashTable(n * 2, autocal=True)),
+                  ("robinhash", robinhash.HashTable(n * 2, autocal=True)))
+        for name, table in tables:
+            times = mixedbench(table, n, ops, n)
+            print("%-10s %-10d %-12.2f %-12.2f %-12.2f" % (name, n, times[0] / n * 10**6, times[1] / ops * 10**6, times[2] / ops * 10**6))
+        print("Robin Hood table: " + str(tables[1][1].stats()))
+
+def memorybench(n=100000, lookups=100000):
+    """Memory taken per key-value pair (not counting the key and value objects themselves)
+    and lookups (probes) per second of each table filled with n keys: the old layout of one array of
+    (key, value) tuples against the parallel key / value / hash arrays of quadhash and ds_hashtable
+    (each pair with the same number of slots), and the Robin Hood table
+    Run with: python hashtablebench.py memory"""
+
+    keys = ["key" + str(i) for i in range(n)]
+    picks = [keys[random.randrange(n)] for i in range(lookups)]
+    misses = ["miss" + str(i) for i in range(lookups)]
+    quadsize = quadhash.HashTable(n * 2, autocal=True)._size
+    #a quarter full, so the cuckoo tables never have to be resized while they are filled
+    cuckoosize = 4 * n
+    tables = (("quadhash", "tuples", lambda: TupleQuadTable(quadsize), "add", "get"),
+              ("quadhash", "arrays", lambda: quadhash.HashTable(quadsize), "add", "get"),
+              ("ds_hashtable", "tuples", lambda: TupleCuckooTable(cuckoosize), "__setitem__", "__getitem__"),
+              ("ds_hashtable", "arrays", lambda: ds_hashtable.HashTable(cuckoosize), "__setitem__", "__getitem__"),
+              ("robinhash", "arrays", lambda: robinhash.HashTable(n * 2, autocal=True), "add", "get"))
+    print("%-14s %-8s %-14s %-12s %-12s" % ("table", "layout", "bytes/entry", "hits/s", "misses/s"))
+    for name, layout, make, add, get in tables:
+        tracemalloc.start()
+        table = make()
+        add = getattr(table, add)
+        for key in keys:
+            add(key, key)
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        get = getattr(table, get)
+        assert all(get(key) == key for key in keys[:1000])
+        rates = []
+        for lyst in (picks, misses):
+            start = time.perf_counter()
+            for key in lyst:
+                get(key)
+            rates.append(lookups / (time.perf_counter() - start))
+        print("%-14s %-8s %-14.1f %-12d %-12d" % (name, layout, used / n, rates[0], rates[1]))
+        del table, add, get
+
+def dbbench(rounds=1000):
+    """Regression benchmark for key matching: the tables are filled with the student IDs in db.txt,
+    then searched with the same IDs read from the file again (equal strings, but different objects)
+    Every lookup should hit, since keys are matched by hash and then ==, not by identity
+    Run with: python hashtablebench.py db"""
+
+    def readids():
+        with open("db.txt") as file:
+            return [line.split("\t")[0] for line in file if line.strip()]
+    ids, searchids = readids(), readids()
+    print("%-10s %-8s %-10s %-10s" % ("table", "keys", "hit rate", "get(us)"))
+    for name, table in (("chainhash", chainhash.HashTable(127)),
+                        ("quadhash", quadhash.HashTable(len(ids), autocal=True)),
+                        ("robinhash", robinhash.HashTable(len(ids), autocal=True))):
+        for i in range(len(ids)):
+            table.add(ids[i], i)
+        hits = sum(table.get(key) is not None for key in searchids)
+        start = time.perf_counter()
+        for i in range(rounds):
+            for key in searchids:
+                table.get(key)
+        get = (time.perf_counter() - start) / (rounds * len(searchids)) * 10**6
+        print("%-10s %-8d %-10s %-10.2f" % (name, len(ids), "%.1f%%" % (hits / len(searchids) * 100), get))
+
+def bulkbench(lines=10**6):
+    """Lines per second loaded into each table from a file like db.txt with <lines> lines,
+    adding line by line against HashTable.from_items (in one process, then across all CPUs)
+    Run with: python hashtablebench.py bulk [lines]"""
+
+    #writes a big copy of db.txt with unique student IDs
+    with open("db.txt") as file:
+        rows = [line.rstrip("\n").split("\t") for line in file if line.strip()]
+    handle, filename = tempfile.mkstemp(suffix=".txt")
+    with os.fdopen(handle, "w") as file:
+        for i in range(lines):
+            row = rows[i % len(rows)]
+            file.write(str(30000000 + i) + "\t" + row[1] + "\t" + row[2] + "\n")
+    try:
+        print("%-10s %-24s %-10s %-12s" % ("table", "method", "seconds", "lines/s"))
+        for name, module in (("chainhash", chainhash), ("quadhash", quadhash)):
+            methods = (("add", None), ("from_items", None), ("from_items x" + str(os.cpu_count()), os.cpu_count()))
+            for method, workers in methods:
+                start = time.perf_counter()
+                with open(filename) as file:
+                    items = [(line.split("\t", 1)[0], line) for line in file]
+                if method == "add":
+                    table = module.HashTable(64)
+                    for key, value in items:
+                        table.add(key, value)
+                else:
+                    table = module.HashTable.from_items(items, workers=workers)
+                taken = time.perf_counter() - start
+                print("%-10s %-24s %-10.2f %-12d" % (name, method, taken, lines / taken))
+                del table, items
+    finally:
+        os.remove(filename)
+
+def spawnbench(n=2000, workers=2):
+    """Checks that tables built by HashTable.from_items with worker processes started by spawn
+    (the default on Windows and macOS) find every key, with each hasher of chainhash and with quadhash
+    Run with: python hashtablebench.py spawn"""
+
+    import multiprocessing
+    multiprocessing.set_start_method("spawn", force=True)
+    #so that even n keys are hashed by the workers
+    chainhash.PARALLEL_MIN = 0
+    keys = ["key" + str(i) for i in range(n)]
+    items = [(key, key) for key in keys]
+    print("%-10s %-8s %-10s" % ("table", "hasher", "found"))
+    for name, hasher in [("chainhash", hasher) for hasher in chainhash.HASHERS] + [("quadhash", "fnv1")]:
+        if name == "chainhash":
+            table = chainhash.HashTable.from_items(items, workers=workers, hasher=hasher)
+        else:
+            table = quadhash.HashTable.from_items(items, workers=workers)
+        found = sum(table.get(key) == key for key in keys)
+        print("%-10s %-8s %d/%d" % (name, hasher, found, n))
+    chainhash.PARALLEL_MIN = 100000
+
+def diskbench(n=10**6, lookups=100000):
+    """Time taken to reopen a disk hash table holding n students, and to look up keys in it
+    (reopening only reads the header, so it takes the same time for any size)
+    Run with: python hashtablebench.py disk [keys]"""
+
+    filename = os.path.join(tempfile.mkdtemp(), "bench.hash")
+    keys = [str(30000000 + i) for i in range(n)]
+    start = time.perf_counter()
+    with diskhash.HashTable(filename, n * 2, autocal=True) as table:
+        for i in range(n):
+            table.add(keys[i], "STUDENT " + str(i))
+    build = time.perf_counter() - start
+    try:
+        start = time.perf_counter()
+        table = diskhash.HashTable(filename)
+        reopen = time.perf_counter() - start
+        picks = [keys[random.randrange(n)] for i in range(lookups)]
+        start = time.perf_counter()
+        for key in picks:
+            table.get(key)
+        get = (time.perf_counter() - start) / lookups * 10**6
+        table.close()
+        print("keys: %d  file: %.1f MB  build: %.2fs (%d adds/s)  reopen: %.3f ms  get: %.2f us" %
+              (n, os.path.getsize(filename) / 2**20, build, n / build, reopen * 1000, get))
+    finally:
+        os.remove(filename)
+        os.rmdir(os.path.dirname(filename))
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["memory"]:
+        memorybench()
+    elif sys.argv[1:2] == ["disk"]:
+        diskbench(*[int(keys) for keys in sys.argv[2:3]])
+    elif sys.argv[1:2] == ["bulk"]:
+        bulkbench(*[int(lines) for lines in sys.argv[2:3]])
+    elif sys.argv[1:] == ["spawn"]:
+        spawnbench()
+    elif sys.argv[1:] == ["db"]:
+        dbbench()
+    elif sys.argv[1:]:
+        hashtablebench([int(size) for size in sys.argv[1:]])
+    else:
+        hashtablebench()
@@ -1,13 +1,39 @@
 import sys
 import math
-import ctypes
+from array import array
 from collections import deque
+from chainhash import hashkeys
 
 if sys.version_info[0] == 3:
     _get_byte = lambda c: c
 else:
     _get_byte = ord
 
+#Special key left in a slot when its key is removed, which allows the search probe to continue past it
+DELETED = object()
+
+def fnv1(data):
+    """
+    Function that converts integers and strings into bytes
+    before hashing them into a 32-bit value using the FNV1 algorithm,
+    designed for speed and randomness for less collisions.
+    The full value is returned, so it can be stored and reused when resizing.
+    (It is outside the class so it can be sent to other processes by HashTable.from_items)
+    """
+
+    #Converts integers (by their digits, so 0 and huge or negative numbers are fine) and strings to bytes
+    if isinstance(data, int):
+        data = str(data).encode("utf-8")
+    else:
+        data = bytes(data, "utf-8")
+    #Hashes bytes through the FNV1 algorithm into a 32-bit value
+    hval = 0x811c9dc5
+    for byte in data:
+        hval = (hval * 0x01000193) % (2**32)
+        hval = hval ^ _get_byte(byte)
+    #Returns hashed value (the index is its modulus by the size of the hash table)
+    return hval
+
 class HashTable:
     """
     Hash table that uses quadratic probing and the FNV1 hash to assign key-value pairs
@@ -18,6 +44,9 @@ class HashTable:
 
     When a key is called, the value can be returned, since the value is mapped to the key.
     In addition, the table size (which must be a power of 2) is doubled when the table is full.
+
+    The keys, values and hashes are kept in 3 parallel arrays instead of one array of (key, value)
+    tuples, so adding never creates a tuple, and probes compare the stored hash before the key.
     """
 
     def __init__(self, size=64, autocal=False):
@@ -50,10 +79,9 @@ class HashTable:
         #If not, asserts power of 2 table size
             assert math.log2(size).is_integer(), "Hash table size must be a power of 2"
             self._size = size
-        #Initializes starting array and variables
+        #Initializes starting arrays and variables
         self._taken = 0
-        PyArrayType  =  ctypes.py_object * self._size
-        self._data = PyArrayType((*[(None, None)] * self._size))
+        self.__newarrays()
 
     def __len__(self):
         """
@@ -85,12 +113,12 @@ class HashTable:
         string = ""
         #formats array to a string that doesn't make you feel nauseous
         for i in range(self._size):
-            if self._data[i][1] is not None:
+            if self._values[i] is not None:
                 string += str(i) +\
                 "    " +\
-                str(self._data[i][0]).strip("\n") +\
+                str(self._keys[i]).strip("\n") +\
                 " : " +\
-                str(self._data[i][1]).strip("\n") +\
+                str(self._values[i]).strip("\n") +\
                 "\n"
             else:
                 string += str(i) + "    None\n"
@@ -116,15 +144,15 @@ class HashTable:
 
         values = deque()
         #Loops through original array
-        for i in self._data:
+        for i in self._values:
             #Excludes None values since they're useless
-            if i[1] is not None:
+            if i is not None:
                 #Adds them to a new list
-                values.append(i[1])
+                values.append(i)
         return iter(values)
 
     def __setitem__(self,key,value):
-        "Same as self.add(key,value): " + self._add.__doc__
+        "Same as self.add(key,value): " + self.add.__doc__
         self.add(key, value)
 
     def __getitem__(self,key):
@@ -135,57 +163,57 @@ class HashTable:
         "Same as self.remove(key): " + self.remove.__doc__
         return self.remove(key)
 
-    def __fnv1(self, data):
+    def __newarrays(self):
         """
-        Function (hidden) that converts integers and strings into bytes
-        before hashing them into index values using the FNV1 algorithm,
-        designed for speed and randomness for less collisions.
+        Function (hidden) that makes new empty arrays of keys, values and hashes.
+        Plain lists are used for keys and values since indexing them is faster than a ctypes array,
+        and the hashes are stored as unboxed 64-bit integers.
         """
+        self._keys = [None] * self._size
+        self._values = [None] * self._size
+        self._hashes = array("Q", bytes(8 * self._size))
 
-        #The hash has problems with 0, so it's converted to a string
-        if data == 0:
-            data = "0"
-        #Converts integers and strings to bytes
-        if isinstance(data, int):
-            data = bytes(data)
-        else:
-            data = bytes(data, "utf-8")
-        #Hashes bytes through the FNV1 algorithm into a 32-bit value
-        hval = 0x811c9dc5
-        for byte in data:
-            hval = (hval * 0x01000193) % (2**32)
-            hval = hval ^ _get_byte(byte)
-        #Returns modulus of hashed value by the size of the hash table
-        return hval % self._size
-
-    def __quadprobe(self,key,value):
+    def __quadprobe(self,key,value,hval):
         """
         Function (hidden) that attempts to assigns values to the given index(hashed key).
         Should the index already be filled, a quadratic probe of (i*i+1)/2 will be
         applied to the original index until the value is assigned.
 
+        The probe goes on past DELETED slots up to the first empty slot, so an equal key further
+        along is still found (and raises ValueError), and the value goes in the first free slot passed.
+
         With this probe, along with the hash table being a power of two, every index
         in the hash table array will be visited, ensuring there is no unused space
         in the array before it is resized and rehashed, eliminating wasted memory.
         """
 
-        #Derives array index from hashed key using the self.__fnv1 function
-        index = self.__fnv1(key)
+        #Derives array index from hashed key
+        keys, hashes = self._keys, self._hashes
+        index = hval % self._size
         baseindex = index
         testindex = index
-        #Tries to assign value to every index, looping through the entire array if need
+        free = None
+        #Looks at every index, looping through the entire array if need, until an empty slot
         for i in range(1, self._size+1):
-            #Assign value if that slot is empty
-            if self._data[testindex][0] is None or self._data[testindex][0] is "":
-                self._data[testindex] = (key, value)
-                return
-            elif self._data[testindex][0] is not key:
-                #Applies probe and tries again if it fails
-                testindex = int(baseindex + (i**2+i)/2)
-                testindex %= self._size
-            else:
+            if keys[testindex] is None:
+                if free is None:
+                    free = testindex
+                break
+            elif keys[testindex] is DELETED:
+                #Remembers the first deleted slot, but keeps looking for an equal key
+                if free is None:
+                    free = testindex
+            elif hashes[testindex] == hval and keys[testindex] == key:
                 #Returns error for duplicate keys
                 raise ValueError("Key has already been used in hash table")
+            #Applies probe and tries again if it fails
+            testindex = int(baseindex + (i**2+i)/2)
+            testindex %= self._size
+        #Assign value to the first free slot
+        if free is not None:
+            keys[free] = key
+            self._values[free] = value
+            hashes[free] = hval
 
     def __search(self,key):
         """
@@ -193,15 +221,17 @@ class HashTable:
         to look for which value the key maps to before returning the found value.
         """
 
-        #Derives array index from hashed key using the self.__fnv1 function
-        index = self.__fnv1(key)
+        #Derives array index from hashed key using the fnv1 function
+        keys, hashes = self._keys, self._hashes
+        hval = fnv1(key)
+        index = hval % self._size
         baseindex = index
         testindex = index
         for i in range(1, self._size+1):
-            #Checks if data in array's index corresponds to the hash value
-            if self._data[testindex][0] == key:
-                return testindex, self._data[testindex][1]
-            elif self._data[testindex][0] is None:
+            #Checks if data in array's index corresponds to the hash value (comparing the stored hash first)
+            if hashes[testindex] == hval and keys[testindex] == key:
+                return testindex, self._values[testindex]
+            elif keys[testindex] is None:
                 return None, None
             else:
                 #Applies the probe and tries again if it fails
@@ -234,9 +264,43 @@ class HashTable:
         if self._taken + 1 == self._size:
             self.rehash(self._size*2)
         #Attempts to assign value to the index, and applies quadratic probe if needed using the self.__quadprobe function
-        self.__quadprobe(key,value)
+        self.__quadprobe(key,value,fnv1(key))
         self._taken += 1
 
+    @classmethod
+    def from_items(cls,items,expected_size=None,workers=None):
+        """
+        Function that builds a hash table from an iterable of (key, value) pairs in one go.
+
+        The array is sized once to twice expected_size (the number of pairs by default, rounded
+        up to a power of 2), so it never has to be resized while the pairs are added, and all the
+        keys are hashed in one batch first (across <workers> processes if given, for very large inputs).
+
+        Raises ValueError if two of the same keys are given, like add().
+
+        Time complexity(average): O(n)
+
+        Example usage:
+        >>> a = HashTable.from_items([("Jerry", "Tom"), ("Tom", "Jerry")])
+        >>> print(a.get("Tom"))
+        Jerry
+        >>> b = HashTable.from_items((line, line) for line in open("db.txt"))
+        >>> print(b.used(), len(b))
+        100 256                                                             """
+
+        items = items if isinstance(items, list) else list(items)
+        if expected_size is None:
+            expected_size = len(items)
+        table = cls(max(expected_size * 2, 2), autocal=True)
+        hashes = hashkeys(fnv1, [item[0] for item in items], workers)
+        for (key, value), hval in zip(items, hashes):
+            #Only resizes if more pairs were given than expected
+            if table._taken + 1 == table._size:
+                table.rehash(table._size*2)
+            table.__quadprobe(key,value,hval)
+            table._taken += 1
+        return table
+
     def get(self,key):
         """
         Function that retrieves and returns the value which the given key maps to
@@ -280,10 +344,11 @@ class HashTable:
                                                                                     """
         #Finds index using self.__search function
         foundindex = self.__search(key)
-        #Sets key value in found index to "", our special flag that allows the search probe to continue in the future
+        #Sets key in found index to DELETED, our special flag that allows the search probe to continue in the future
         #also sets value to None
         if foundindex[0] is not None:
-            self._data[foundindex[0]] = ("", None)
+            self._keys[foundindex[0]] = DELETED
+            self._values[foundindex[0]] = None
             self._taken -= 1
         #Returns index, like in self.__search()
         return foundindex[1]
@@ -366,13 +431,12 @@ class HashTable:
             assert self._taken <= size, "Existing elements cannot fit within array of size specified"
             self._size = size
 
-        self._taken = 0
-        self._olddata = self._data
-        #Makes new array twice the original size
-        PyArrayType  =  ctypes.py_object * self._size
-        self._data = PyArrayType(*([(None, None)] * self._size))
-        #Assigns each value in the old array one-by-one to the new array
-        for i in self._olddata:
-            if i[0] is not None and i[0] is not "":
-                self.add(i[0], i[1])
-        self._olddata = 0
+        taken = self._taken
+        oldkeys, oldvalues, oldhashes = self._keys, self._values, self._hashes
+        #Makes new arrays of the new size
+        self.__newarrays()
+        #Assigns each value in the old arrays one-by-one to the new arrays, reusing the stored hashes
+        for i in range(len(oldkeys)):
+            if oldkeys[i] is not None and oldkeys[i] is not DELETED:
+                self.__quadprobe(oldkeys[i], oldvalues[i], oldhashes[i])
+        self._taken = taken
@@ -1,4 +1,4 @@
-from quadhash2 import HashTable
+from quadhash import HashTable
 
 def quadhashclient():
     """
@@ -100,6 +100,13 @@ def quadhashclient():
         c.add(i, i)
     print("\nAfter hash table gets full and automatically resizes:")
     print(len(c))
+#---------------------------------------------------
+#-------------------FROM_ITEMS----------------------
+    print("\nHashTable.from_items(items, expected_size, workers):\n" + HashTable.from_items.__doc__)
+    #builds the whole table at once, sized to fit, instead of adding line by line
+    d = HashTable.from_items(enumerate(testfile))
+    print("\nLength and amount of spaces used after building from all testitems:")
+    print(len(d), d.used())
     print("~~~~~~END OF ANALYSIS FOR QUADRATIC PROBING HASH TABLE~~~~~~~")
 
 quadhashclient()
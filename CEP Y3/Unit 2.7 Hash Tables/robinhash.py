@@ -0,0 +1,330 @@
+import math
+import ctypes
+from collections import deque
+from chainhash import HASHERS
+
+class HashTable:
+    """
+    Hash table that uses Robin Hood hashing (linear probing) to assign key-value pairs
+
+    Every key is stored as close as possible to the index its hash maps to. When a key being
+    added has probed further from its index than the key already in a slot, they swap places
+    ("take from the rich, give to the poor"), so no key ends up much further away than the rest.
+
+    Removing a key shifts the keys after it back by one slot instead of leaving a tombstone,
+    so the table never fills up with deleted slots and searches never get slower over time.
+
+    The furthest any key has been placed from its index (max displacement) is tracked,
+    so a search for a key that is not in the table stops after at most that many probes.
+    The table size (which must be a power of 2) doubles once it is more than <maxload> full,
+    or if a key has to be placed more than <maxprobe> slots away from its index.
+    """
+
+    def __init__(self, size=64, autocal=False, maxload=0.9, maxprobe=32, hasher="fnv1a"):
+        """
+        Initializes the hash table array of size given (64 by default)
+
+        The size of the array must be 64 by default, or any other power of 2 specified.
+        AssertionError raised if the table size given is not a power if 2 (unless autocal is enabled).
+        When autocal is enabled, any non-power of 2 is upsized to the next highest power of 2.
+
+        The hasher can be "fnv1a" (default), "crc32", "python", or a function
+        which takes a key and returns an integer.
+
+        Example usage:
+        >>> a = HashTable()
+        >>> print(len(a))
+        64
+        >>> b = HashTable(5, autocal = True)
+        >>> print(len(b))
+        8
+        >>> c = HashTable(16, maxload=0.75, hasher="crc32")                                           """
+
+        assert 0 < maxload <= 1, "Maximum load must be between 0 and 1"
+        if callable(hasher):
+            self._hash = hasher
+        elif hasher in HASHERS:
+            self._hash = HASHERS[hasher]
+        else:
+            raise ValueError("Hasher must be a function or one of: " + ", ".join(HASHERS))
+        self._maxload = maxload
+        self._maxprobe = maxprobe
+        self.__resize(self.__fitsize(size, autocal))
+
+    def __len__(self):
+        """
+        Returns current length of hash table array
+
+        Time complexity: O(1)
+
+        Example usage:
+        >>> a = HashTable(64)
+        >>> print(len(a))
+        64                                     """
+        return self._size
+
+    def __str__(self):
+        """
+        Returns string of hash table array, containing (in order) each array index, key and value it maps to
+
+        Time complexity: O(n)
+
+        Example usage:
+        >>> a = HashTable(4)
+        >>> a.add("Tom" , "Tom")
+        >>> print(a)
+        0    None
+        1    None
+        2    None
+        3    Tom : Tom                                                                                    """
+
+        string = ""
+        for i in range(self._size):
+            if self._data[i] is not None:
+                string += str(i) + "    " + str(self._data[i][1]).strip("\n") + " : " + str(self._data[i][2]).strip("\n") + "\n"
+            else:
+                string += str(i) + "    None\n"
+        return string
+
+    __repr__ = __str__
+
+    def __iter__(self):
+        """
+        Loops through the values (not keys) of the hash table array
+
+        Time complexity: O(n)
+
+        Example usage:
+        >>> a = HashTable(4)
+        >>> a.add("Tom", "Tom")
+        >>> for i in a:
+        >>>     print(i)
+        Tom                                                       """
+
+        values = deque()
+        for entry in self._data:
+            if entry is not None:
+                values.append(entry[2])
+        return iter(values)
+
+    def __setitem__(self,key,value):
+        "Same as self.add(key,value): " + self.add.__doc__
+        self.add(key, value)
+
+    def __getitem__(self,key):
+        "Same as self.get(key): " + self.get.__doc__
+        return self.get(key)
+
+    def __delitem__(self,key):
+        "Same as self.remove(key): " + self.remove.__doc__
+        return self.remove(key)
+
+    def __fitsize(self, size, autocal):
+        """Function(hidden) that checks the size is a power of 2, or rounds it up to one if autocal is enabled"""
+        if autocal:
+            fitted = 2
+            while size > fitted:
+                fitted *= 2
+            return fitted
+        assert math.log2(size).is_integer(), "Hash table size must be a power of 2"
+        return size
+
+    def __resize(self, size):
+        """Function(hidden) that makes a new empty array of the given size"""
+        self._size = size
+        self._mask = size - 1
+        self._taken = 0
+        self._maxdist = 0
+        PyArrayType  =  ctypes.py_object * self._size
+        self._data = PyArrayType(*([None] * self._size))
+
+    def __place(self, hval, key, value):
+        """
+        Function(hidden) that places a key that is not in the table yet,
+        swapping it with any key that is closer to its own index (Robin Hood).
+        Returns how far the last key placed ended up from its index.
+        """
+
+        data, mask = self._data, self._mask
+        entry = (hval, key, value)
+        index, dist = hval & mask, 0
+        while True:
+            current = data[index]
+            if current is None:
+                data[index] = entry
+                if dist > self._maxdist:
+                    self._maxdist = dist
+                return dist
+            #Distance of the key already in this slot from its own index
+            currentdist = (index - current[0]) & mask
+            if currentdist < dist:
+                #The key in the slot is "richer", so it gives up its slot and is placed further on instead
+                data[index] = entry
+                if dist > self._maxdist:
+                    self._maxdist = dist
+                entry, dist = current, currentdist
+            index = (index + 1) & mask
+            dist += 1
+
+    def __search(self, key, hval):
+        """
+        Function(hidden) that returns the index of the key in the array, or None if it is not there.
+        Stops as soon as it passes max displacement, an empty slot, or a key closer to its index
+        than the key being searched for would be (it would have taken that slot).
+        """
+
+        data, mask = self._data, self._mask
+        index = hval & mask
+        for dist in range(self._maxdist + 1):
+            entry = data[index]
+            if entry is None or ((index - entry[0]) & mask) < dist:
+                return None
+            #Compares the full hashes first, which is much cheaper than comparing keys
+            if entry[0] == hval and entry[1] == key:
+                return index
+            index = (index + 1) & mask
+        return None
+
+    def add(self,key,value):
+        """
+        Function that assigns the given value to the hash table array
+        with the hashed key as the starting index
+
+        If the key is already in the table, its value is replaced.
+        Doubles array size if the table is more than <maxload> full.
+
+        Time complexity(average): O(1)
+        Time complexity(worst-case): O(log n)
+
+        Example usage:
+        >>> a = HashTable(4)
+        >>> a.add("Jerry", "Tom")
+        >>> print(a.get("Jerry"))
+        Tom                                                     """
+
+        hval = self._hash(key)
+        index = self.__search(key, hval)
+        if index is not None:
+            self._data[index] = (hval, key, value)
+            return
+        #Resizes array when table is too full
+        if self._taken + 1 > self._size * self._maxload:
+            self.rehash(self._size * 2)
+        dist = self.__place(hval, key, value)
+        self._taken += 1
+        #Resizes array if keys are being pushed too far from their index (only if it is reasonably full,
+        #since many keys with the same hash would otherwise keep doubling the table)
+        if dist > self._maxprobe and self._taken * 4 >= self._size:
+            self.rehash(self._size * 2)
+
+    def get(self,key):
+        """
+        Function that retrieves and returns the value which the given key maps to
+        If the key is not in the hash table, it returns None.
+
+        Time complexity(average): O(1)
+        Time complexity(worst-case): O(log n)
+
+        Example usage:
+        >>> a = HashTable(4)
+        >>> a.add("Jerry", "Tom")
+        >>> print(a.get("Jerry"))
+        Tom                                                                             """
+
+        index = self.__search(key, self._hash(key))
+        return None if index is None else self._data[index][2]
+
+    def remove(self,key):
+        """
+        Function that removes the key-value pair from the hash table and returns the value.
+        If the key is not in the hash table, it returns None.
+
+        The keys after it are shifted back by one slot (until an empty slot or a key already
+        in its own index), so no tombstones are left behind.
+
+        Time complexity(average): O(1)
+        Time complexity(worst-case): O(log n)
+
+        Example usage:
+        >>> a = HashTable(4)
+        >>> a.add("Jerry", "Tom")
+        >>> print(a.remove("Jerry"))
+        Tom
+        >>> print(a.get("Jerry"))
+        None                                                                        """
+
+        index = self.__search(key, self._hash(key))
+        if index is None:
+            return None
+        data, mask = self._data, self._mask
+        value = data[index][2]
+        #Backward shift deletion
+        following = (index + 1) & mask
+        while data[following] is not None and ((following - data[following][0]) & mask) > 0:
+            data[index] = data[following]
+            index = following
+            following = (following + 1) & mask
+        data[index] = None
+        self._taken -= 1
+        return value
+
+    def used(self):
+        """
+        Function that returns the number of key-value pairs in the table
+
+        Time complexity: O(1)
+
+        E.g:
+        >>> a = HashTable(4)
+        >>> a.add("Tom", "Tom")
+        >>> a.add(1, "hi")
+        >>> print(a.used())
+        2                                                                   """
+        return self._taken
+
+    count = used
+
+    def rehash(self,size,autocal=False):
+        """
+        Function that resizes the hash table array to the specified size.
+        The stored hashes are reused, so no key is hashed again.
+
+        The specified size must be a power of 2 and able to fit all elements.
+        If not, AssertionError is raised (unless autocal is enabled).
+
+        Time complexity: O(n)
+
+        Example usage:
+        >>> a = HashTable()
+        >>> a.rehash(128)
+        >>> print(len(a))
+        128                                                                              """
+
+        size = self.__fitsize(size, autocal)
+        assert self._taken <= size, "Existing elements cannot fit within array of size specified"
+        olddata, taken = self._data, self._taken
+        self.__resize(size)
+        for entry in olddata:
+            if entry is not None:
+                self.__place(*entry)
+        self._taken = taken
+
+    def stats(self):
+        """
+        Function that reports the number of key-value pairs, how full the array is,
+        the max displacement (longest probe a search can take) and the average displacement.
+
+        Time complexity: O(n)
+
+        Example usage:
+        >>> a = HashTable(4)
+        >>> a.add("Jerry", "Tom")
+        >>> print(a.stats())
+        {'size': 4, 'entries': 1, 'load': 0.25, 'maxdist': 0, 'avgdist': 0.0}       """
+
+        dists = [(i - entry[0]) & self._mask for i, entry in enumerate(self._data) if entry is not None]
+        return {"size": self._size,
+                "entries": self._taken,
+                "load": self._taken / self._size,
+                "maxdist": self._maxdist,
+                "avgdist": sum(dists) / len(dists) if dists else 0.0}